@@ -11,6 +11,7 @@ import os
 import ctypes
 
 from msl.loadlib import Server32
+from msl.loadlib.buffers import as_ctypes, empty
 
 
 # TODO: Compile "cpp_lib.cpp" in Linux/Mac
@@ -35,93 +36,63 @@ class Cpp32(Server32):
         :class:`~msl.loadlib.start_server32`, cannot create an instance of the
         :class:`~msl.loadlib.server32.Server32` subclass.
     """
-    def __init__(self, host, port, quiet):
-        # By not specifying the extension of the library file the server will open
-        # the appropriate file based on the operating system.
-        Server32.__init__(self, os.path.join(os.path.dirname(__file__), 'cpp_lib32'),
-                          'cdll', host, port, quiet)
-
-    def add(self, a, b):
-        """
-        Add two integers.
-
-        The corresponding C++ code is
-
-        .. code-block:: cpp
-
-            int add(int a, int b) {
-                return a + b;
-            }
 
-        See the corresponding 64-bit :meth:`~.cpp64.Cpp64.add` method.
+    exposed32 = {
+        'add': {
+            'restype': ctypes.c_int32,
+            'argtypes': [('a', ctypes.c_int32), ('b', ctypes.c_int32)],
+        },
+        'subtract': {
+            'restype': ctypes.c_float,
+            'argtypes': [('a', ctypes.c_float), ('b', ctypes.c_float)],
+        },
+        'add_or_subtract': {
+            'restype': ctypes.c_double,
+            'argtypes': [('a', ctypes.c_double), ('b', ctypes.c_double), ('do_addition', ctypes.c_bool)],
+        },
+    }
+    """
+    The functions that a client can call without a wrapper method, see
+    :attr:`.Server32.exposed32`. The corresponding C++ code is
 
-        Args:
-            a (int): The first integer.
-            b (int): The second integer.
+    .. code-block:: cpp
 
-        Returns:
-            :py:class:`int`: The sum of ``a`` and ``b``.
-        """
-        return self.lib.add(ctypes.c_int32(a), ctypes.c_int32(b))
+        int add(int a, int b) {
+            return a + b;
+        }
 
-    def subtract(self, a, b):
-        """
-        Subtract two floating-point numbers. *Note: 'float' refers to the C++
-        data type*.
+        float subtract(float a, float b) {
+            return a - b;
+        }
 
-        The corresponding C++ code is
-
-        .. code-block:: cpp
-
-            float subtract(float a, float b) {
+        double add_or_subtract(double a, double b, bool do_addition) {
+            if (do_addition) {
+                return a + b;
+            } else {
                 return a - b;
             }
+        }
 
-        See the corresponding 64-bit :meth:`~.cpp64.Cpp64.subtract` method.
-
-        Args:
-            a (float): The first floating-point number.
-            b (float): The second floating-point number.
-
-        Returns:
-            :py:class:`float`: The difference between ``a`` and ``b``.
-        """
-        self.lib.subtract.restype = ctypes.c_float
-        return self.lib.subtract(ctypes.c_float(a), ctypes.c_float(b))
-
-    def add_or_subtract(self, a, b, do_addition):
-        """
-        Add or subtract two double-precision numbers. *Note: 'double' refers to
-        the C++ data type*.
-
-        The corresponding C++ code is
-
-        .. code-block:: cpp
-
-            double add_or_subtract(double a, double b, bool do_addition) {
-                if (do_addition) {
-                    return a + b;
-                } else {
-                    return a - b;
-                }
-            }
-
-        See the corresponding 64-bit :meth:`~.cpp64.Cpp64.add_or_subtract` method.
+    See the corresponding 64-bit :meth:`~.cpp64.Cpp64.add`, :meth:`~.cpp64.Cpp64.subtract`
+    and :meth:`~.cpp64.Cpp64.add_or_subtract` methods.
+    """
 
-        Args:
-            a (float): The first double-precision number.
-            b (float): The second double-precision number.
-            do_addition (bool): Whether to **add**, :py:data:`True`, or **subtract**,
-                :py:data:`False`, the numbers.
+    def __init__(self, host, port, quiet):
+        # By not specifying the extension of the library file the server will open
+        # the appropriate file based on the operating system.
+        Server32.__init__(self, os.path.join(os.path.dirname(__file__), 'cpp_lib32'),
+                          'cdll', host, port, quiet)
 
-        Returns:
-            :py:class:`float`: Either ``a`` + ``b`` if ``do_addition`` is
-            :py:data:`True` or ``a`` - ``b`` otherwise.
-        """
-        self.lib.add_or_subtract.restype = ctypes.c_double
-        return self.lib.add_or_subtract(ctypes.c_double(a), ctypes.c_double(b), do_addition)
+        # declare the signature of each function only once
+        c_double_p = ctypes.POINTER(ctypes.c_double)
+        self._scalar_multiply = self.declare('scalar_multiply', None,
+                                             [ctypes.c_double, c_double_p, ctypes.c_int32, c_double_p])
+        self._reverse_string_v1 = self.declare('reverse_string_v1', None,
+                                               [ctypes.c_char_p, ctypes.c_int32, ctypes.c_char_p])
+        self._reverse_string_v2 = self.declare('reverse_string_v2', ctypes.c_void_p,
+                                               [ctypes.c_char_p, ctypes.c_int32])
 
-    def scalar_multiply(self, a, xin):
+    def scalar_multiply(self, a, xin, out=None):
         """
         Multiply each element in an array by a number.
 
@@ -139,22 +110,27 @@ class Cpp32(Server32):
 
         Args:
             a (float): The scalar value.
-            xin (list[float]): The array to modify.
+            xin (list[float]): The array to modify. Any object that supports the buffer
+                protocol (e.g., an :class:`array.array` of type code ``'d'``) is passed
+                to the library without converting each element.
+            out (:class:`~msl.loadlib.buffers.SharedArray`, optional): The array to
+                write the result to. A :class:`~msl.loadlib.buffers.SharedArray` is
+                passed to the library without copying the data.
 
         Returns:
-            A :py:class:`list` of :py:class:`float`'s: A new array with each
-            element in ``xin`` multiplied by ``a``.
+            :class:`array.array`: A new array (of type code ``'d'``) with each
+            element in ``xin`` multiplied by ``a``, or ``out`` if specified.
+
+        Raises:
+            ValueError: If ``out`` is smaller than ``xin``.
         """
         n = len(xin)
-        xout = (ctypes.c_double * n)()  # allocate memory
-
-        self.lib.scalar_multiply.restype = None
-
-        self.lib.scalar_multiply(ctypes.c_double(float(a)),
-                                 (ctypes.c_double * n)(*xin),
-                                 ctypes.c_int32(n),
-                                 ctypes.byref(xout))
-        return [value for value in xout]
+        if out is None:
+            out = empty(ctypes.c_double, n, use_numpy=False)  # allocate memory
+        elif len(out) < n:
+            raise ValueError('The out array must contain at least {} elements'.format(n))
+        self._scalar_multiply(a, as_ctypes(xin, ctypes.c_double), n, as_ctypes(out, ctypes.c_double))
+        return out
 
     def reverse_string_v1(self, original):
         """
@@ -183,14 +159,11 @@ class Cpp32(Server32):
         """
         n = len(original)
 
-        # use create_string_buffer since 'rev' gets modified in the library
-        rev = ctypes.create_string_buffer(n)
-
-        self.lib.reverse_string_v1.restype = None
-        self.lib.reverse_string_v1(ctypes.c_char_p(original.encode()),
-                                   ctypes.c_int32(n),
-                                   rev)
-        return rev.raw.decode()
+        # borrow a buffer since 'rev' gets modified in the library, the buffer
+        # is returned to the pool (and reused by the next request) afterwards
+        with self.buffer_pool.borrow(ctypes.c_char, n) as rev:
+            self._reverse_string_v1(original.encode(), n, rev)
+            return rev.raw.decode()
 
     def reverse_string_v2(self, original):
         """
@@ -220,7 +193,5 @@ class Cpp32(Server32):
             :py:class:`str`: The string reversed.
         """
         n = len(original)
-        self.lib.reverse_string_v2.restype = ctypes.c_char_p
-        rev = self.lib.reverse_string_v2(ctypes.c_char_p(original.encode()),
-                                         ctypes.c_int32(n))
+        rev = self._reverse_string_v2(original.encode(), n)
         return ctypes.string_at(rev, n).decode()
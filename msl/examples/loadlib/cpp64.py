@@ -33,7 +33,7 @@ class Cpp64(Client64):
         """
         Add two integers.
 
-        See the corresponding 32-bit :meth:`~.cpp32.Cpp32.add` method.
+        See the corresponding 32-bit :attr:`~.cpp32.Cpp32.exposed32` function.
 
         Args:
             a (int): The first integer.
@@ -49,7 +49,7 @@ class Cpp64(Client64):
         Subtract two floating-point numbers. *Note: 'float' refers to the C++
         data type*.
 
-        See the corresponding 32-bit :meth:`~.cpp32.Cpp32.subtract` method.
+        See the corresponding 32-bit :attr:`~.cpp32.Cpp32.exposed32` function.
 
         Args:
             a (float): The first floating-point number.
@@ -65,7 +65,7 @@ class Cpp64(Client64):
         Add or subtract two floating-point numbers. *Note: 'double' refers to
         the C++ data type*.
 
-        See the corresponding 32-bit :meth:`~.cpp32.Cpp32.add_or_subtract` method.
+        See the corresponding 32-bit :attr:`~.cpp32.Cpp32.exposed32` function.
 
         Args:
             a (float): The first floating-point number.
@@ -79,7 +79,7 @@ class Cpp64(Client64):
         """
         return self.request32('add_or_subtract', a, b, do_addition)
 
-    def scalar_multiply(self, a, xin):
+    def scalar_multiply(self, a, xin, out=None):
         """
         Multiply each element in an array by a number.
 
@@ -88,12 +88,16 @@ class Cpp64(Client64):
         Args:
             a (float): The scalar value.
             xin (list[float]): The array to modify.
+            out (:class:`~msl.loadlib.buffers.SharedArray`, optional): The shared memory
+                that the 32-bit library writes the result to. The result is not
+                serialized if ``out`` is specified.
 
         Returns:
-            A :py:class:`list` of :py:class:`float`'s: A new array with each element
-            in ``xin`` multiplied by ``a``.
+            :class:`array.array`: A new array (of type code ``'d'``) with each element
+            in ``xin`` multiplied by ``a``, or ``out`` if specified. A :class:`numpy.ndarray`
+            is returned if :attr:`~msl.loadlib.client64.Client64.numpy_arrays` is :py:data:`True`.
         """
-        return self.request32('scalar_multiply', a, xin)
+        return self.request32('scalar_multiply', a, xin, out=out)
 
     def reverse_string_v1(self, original):
         """
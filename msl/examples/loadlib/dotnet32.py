@@ -56,7 +56,7 @@ class DotNet32(Server32):
 
         See the corresponding 64-bit :meth:`~.dotnet64.DotNet64.get_class_names` method.
         """
-        return ';'.join(str(name) for name in self.net.GetExportedTypes()).split(';')
+        return self.net_index.type_names()
 
     def get_class_functions(self, cls):
         """
@@ -67,5 +67,11 @@ class DotNet32(Server32):
         Args:
             cls (str): The name of a ``SpelNetLib`` class.
         """
+        try:
+            if 'error' not in self.net_index.get_type(cls):
+                return self.net_index.member_names(cls)
+        except KeyError:
+            pass  # getattr() raises AttributeError for a class that does not exist
+        # the members of the class could not be reflected when the index was built
         names = dir(getattr(self.lib, cls))
         return ';'.join(str(name) for name in names if not name.startswith('_')).split(';')
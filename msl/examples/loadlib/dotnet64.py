@@ -18,6 +18,7 @@ is the 32-bit server for `inter-process communication <ipc_>`_.
 import os
 
 from msl.loadlib import Client64
+from msl.loadlib.client64 import idempotent
 
 
 class DotNet64(Client64):
@@ -36,6 +37,7 @@ class DotNet64(Client64):
         # the 32-bit .NET library -- dotnet_lib32.dll.
         Client64.__init__(self, module32='dotnet32', append_path=os.path.dirname(__file__))
 
+    @idempotent
     def get_module_name(self):
         """
         Request the name of the .NET module.
@@ -44,6 +46,7 @@ class DotNet64(Client64):
         """
         return self.request32('get_module_name')
 
+    @idempotent
     def get_class_names(self):
         """
         Request the names of the classes that are available in the ``SpelNetLib`` module.
@@ -52,6 +55,7 @@ class DotNet64(Client64):
         """
         return self.request32('get_class_names')
 
+    @idempotent
     def get_class_functions(self, cls):
         """
         Request the names of the functions that are available in a ``SpelNetLib`` class.
@@ -11,6 +11,7 @@ import os
 import ctypes
 
 from msl.loadlib import Server32
+from msl.loadlib.buffers import empty
 
 
 # TODO: Compile "fortran_lib.f90" in Linux/Mac
@@ -42,6 +43,32 @@ class Fortran32(Server32):
         Server32.__init__(self, os.path.join(os.path.dirname(__file__), 'fortran_lib32'),
                           'cdll', host, port, quiet)
 
+        # declare the signature of each function only once, the arguments are passed
+        # by reference and the arrays are passed in column-major order automatically
+        double_array = ctypes.POINTER(ctypes.c_double)
+        fortran = self.declare_fortran
+        self._sum_8bit = fortran('sum_8bit', ctypes.c_int8, [ctypes.c_int8] * 2)
+        self._sum_16bit = fortran('sum_16bit', ctypes.c_int16, [ctypes.c_int16] * 2)
+        self._sum_32bit = fortran('sum_32bit', ctypes.c_int32, [ctypes.c_int32] * 2)
+        self._sum_64bit = fortran('sum_64bit', ctypes.c_int64, [ctypes.c_int64] * 2)
+        self._multiply_float32 = fortran('multiply_float32', ctypes.c_float, [ctypes.c_float] * 2)
+        self._multiply_float64 = fortran('multiply_float64', ctypes.c_double, [ctypes.c_double] * 2)
+        self._is_positive = fortran('is_positive', ctypes.c_bool, [ctypes.c_double])
+        self._add_or_subtract = fortran('add_or_subtract', ctypes.c_int32,
+                                        [ctypes.c_int32, ctypes.c_int32, ctypes.c_bool])
+        self._factorial = fortran('factorial', ctypes.c_double, [ctypes.c_int8])
+        self._stdev = fortran('stdev', ctypes.c_double, [double_array, ctypes.c_int32])
+        self._besselJ0 = fortran('besselJ0', ctypes.c_double, [ctypes.c_double])
+        # the strings have the REFERENCE attribute so their lengths are not passed
+        self._reverse_string = fortran('reverse_string', None,
+                                       [ctypes.c_char_p, ctypes.c_int32, ctypes.c_char_p],
+                                       string_lengths=None)
+        self._add_1D_arrays = fortran('add_1D_arrays', None,
+                                      [double_array, double_array, double_array, ctypes.c_int32])
+        self._matrix_multiply = fortran('matrix_multiply', None,
+                                        [double_array, double_array, ctypes.c_int32, ctypes.c_int32,
+                                         double_array, ctypes.c_int32, ctypes.c_int32])
+
     def sum_8bit(self, a, b):
         """
         Add two 8-bit signed integers. *Note: Python only has one* :py:class:`int`
@@ -68,10 +95,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`int`: The sum of ``a`` and ``b``.
         """
-        ac = ctypes.c_int8(a)
-        bc = ctypes.c_int8(b)
-        self.lib.sum_8bit.restype = ctypes.c_int8
-        return self.lib.sum_8bit(ctypes.byref(ac), ctypes.byref(bc))
+        return self._sum_8bit(a, b)
 
     def sum_16bit(self, a, b):
         """
@@ -99,10 +123,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`int`: The sum of ``a`` and ``b``.
         """
-        ac = ctypes.c_int16(a)
-        bc = ctypes.c_int16(b)
-        self.lib.sum_16bit.restype = ctypes.c_int16
-        return self.lib.sum_16bit(ctypes.byref(ac), ctypes.byref(bc))
+        return self._sum_16bit(a, b)
 
     def sum_32bit(self, a, b):
         """
@@ -130,10 +151,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`int`: The sum of ``a`` and ``b``.
         """
-        ac = ctypes.c_int32(a)
-        bc = ctypes.c_int32(b)
-        self.lib.sum_32bit.restype = ctypes.c_int32
-        return self.lib.sum_32bit(ctypes.byref(ac), ctypes.byref(bc))
+        return self._sum_32bit(a, b)
 
     def sum_64bit(self, a, b):
         """
@@ -161,10 +179,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`int`: The sum of ``a`` and ``b``.
         """
-        ac = ctypes.c_int64(a)
-        bc = ctypes.c_int64(b)
-        self.lib.sum_64bit.restype = ctypes.c_int64
-        return self.lib.sum_64bit(ctypes.byref(ac), ctypes.byref(bc))
+        return self._sum_64bit(a, b)
 
     def multiply_float32(self, a, b):
         """
@@ -190,10 +205,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`float`: The product of ``a`` and ``b``.
         """
-        ac = ctypes.c_float(a)
-        bc = ctypes.c_float(b)
-        self.lib.multiply_float32.restype = ctypes.c_float
-        return self.lib.multiply_float32(ctypes.byref(ac), ctypes.byref(bc))
+        return self._multiply_float32(a, b)
 
     def multiply_float64(self, a, b):
         """
@@ -219,10 +231,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`float`: The product of ``a`` and ``b``.
         """
-        ac = ctypes.c_double(a)
-        bc = ctypes.c_double(b)
-        self.lib.multiply_float64.restype = ctypes.c_double
-        return self.lib.multiply_float64(ctypes.byref(ac), ctypes.byref(bc))
+        return self._multiply_float64(a, b)
 
     def is_positive(self, a):
         """
@@ -248,9 +257,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`bool`: Whether the value of ``a`` is > 0.
         """
-        ac = ctypes.c_double(a)
-        self.lib.is_positive.restype = ctypes.c_bool
-        return self.lib.is_positive(ctypes.byref(ac))
+        return self._is_positive(a)
 
     def add_or_subtract(self, a, b, do_addition):
         """
@@ -284,11 +291,7 @@ class Fortran32(Server32):
             :py:class:`int`: Either ``a`` + ``b`` if ``do_addition`` is
             :py:data:`True` or ``a`` - ``b`` otherwise.
         """
-        ac = ctypes.c_int32(a)
-        bc = ctypes.c_int32(b)
-        logical = ctypes.c_bool(do_addition)
-        self.lib.add_or_subtract.restype = ctypes.c_int32
-        return self.lib.add_or_subtract(ctypes.byref(ac), ctypes.byref(bc), ctypes.byref(logical))
+        return self._add_or_subtract(a, b, do_addition)
 
     def factorial(self, n):
         """
@@ -323,9 +326,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`float`: The factorial of ``n``.
         """
-        ac = ctypes.c_int8(n)
-        self.lib.factorial.restype = ctypes.c_double
-        return self.lib.factorial(ctypes.byref(ac))
+        return self._factorial(n)
 
     def standard_deviation(self, data):
         """
@@ -351,11 +352,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`float`: The standard deviation of ``data``.
         """
-        n = len(data)
-        nc = ctypes.c_int32(n)
-        datac = (ctypes.c_double * n)(*data)
-        self.lib.stdev.restype = ctypes.c_double
-        return self.lib.stdev(ctypes.byref(datac), ctypes.byref(nc))
+        return self._stdev(data, len(data))
 
     def besselJ0(self, x):
         """
@@ -379,9 +376,7 @@ class Fortran32(Server32):
         Returns:
             :py:class:`float`: The value of ``BESSEL_J0(x)``.
         """
-        xc = ctypes.c_double(x)
-        self.lib.besselJ0.restype = ctypes.c_double
-        return self.lib.besselJ0(ctypes.byref(xc))
+        return self._besselJ0(x)
 
     def reverse_string(self, original):
         """
@@ -411,15 +406,11 @@ class Fortran32(Server32):
             :py:class:`str`: The string reversed.
         """
         n = len(original)
-        nc = ctypes.c_int32(n)
-        rev = ctypes.create_string_buffer(n)
-        self.lib.reverse_string.restype = None
-        self.lib.reverse_string(ctypes.c_char_p(original.encode()),
-                                ctypes.byref(nc),
-                                rev)
-        return rev.raw.decode()
-
-    def add_1D_arrays(self, a1, a2):
+        with self.buffer_pool.borrow(ctypes.c_char, n) as rev:
+            self._reverse_string(original, n, rev)
+            return rev.raw.decode()
+
+    def add_1D_arrays(self, a1, a2, out=None):
         """
         Perform an element-wise addition of two 1D double-precision arrays.
 
@@ -441,21 +432,24 @@ class Fortran32(Server32):
         Args:
             a1 (list[float]): The first array.
             a2 (list[float]): The second array.
+            out (:class:`~msl.loadlib.buffers.SharedArray`, optional): The array to
+                write the result to. A :class:`~msl.loadlib.buffers.SharedArray` is
+                passed to the library without copying the data.
 
         Returns:
-             A :py:class:`list` of :py:class:`float`'s: The element-wise addition of
-             ``a1`` + ``a2``.
+             :class:`array.array`: The element-wise addition of ``a1`` + ``a2``
+             (of type code ``'d'``), or ``out`` if specified.
+
+        Raises:
+            ValueError: If ``out`` is smaller than ``a1``.
         """
         n = len(a1)
-        nc = ctypes.c_int32(n)
-        out = (ctypes.c_double * n)()
-
-        self.lib.add_1D_arrays.restype = None
-        self.lib.add_1D_arrays(out,
-                               (ctypes.c_double * n)(*a1),
-                               (ctypes.c_double * n)(*a2),
-                               ctypes.byref(nc))
-        return [val for val in out]
+        if out is None:
+            out = empty(ctypes.c_double, n, use_numpy=False)
+        elif len(out) < n:
+            raise ValueError('The out array must contain at least {} elements'.format(n))
+        self._add_1D_arrays(out, a1, a2, n)
+        return out
 
     def matrix_multiply(self, a1, a2):
         """
@@ -463,9 +457,9 @@ class Fortran32(Server32):
 
         .. note::
             FORTRAN stores multi-dimensional arrays in `column-major order <order_>`_, as
-            opposed to `row-major order <order_>`_ for C (Python) arrays. Therefore the
-            input matrices need to be transposed before sending the matrices to FORTRAN
-            and also the result needs to be transposed before returning the result.
+            opposed to `row-major order <order_>`_ for C (Python) arrays. The input matrices
+            are flattened in column-major order by :meth:`~msl.loadlib.load_library.LoadLibrary.declare_fortran`
+            (a :class:`numpy.ndarray` that was created with ``order='F'`` is not copied).
 
         The corresponding FORTRAN code is
 
@@ -491,31 +485,13 @@ class Fortran32(Server32):
 
         .. _order: https://en.wikipedia.org/wiki/Row-_and_column-major_order
         """
-        nrows1 = ctypes.c_int32(len(a1))
-        ncols1 = ctypes.c_int32(len(a1[0]))
-
-        nrows2 = ctypes.c_int32(len(a2))
-        ncols2 = ctypes.c_int32(len(a2[0]))
-
-        if not ncols1.value == nrows2.value:
+        nrows1, ncols1 = len(a1), len(a1[0])
+        nrows2, ncols2 = len(a2), len(a2[0])
+        if not ncols1 == nrows2:
             msg = "Cannot multiply a {}x{} matrix with a {}x{} matrix"
-            raise ValueError(msg.format(nrows1.value, ncols1.value, nrows2.value, ncols2.value))
-
-        m1 = ((ctypes.c_double * nrows1.value) * ncols1.value)()
-        for r in range(nrows1.value):
-            for c in range(ncols1.value):
-                m1[c][r] = a1[r][c]
-
-        m2 = ((ctypes.c_double * nrows2.value) * ncols2.value)()
-        for r in range(nrows2.value):
-            for c in range(ncols2.value):
-                m2[c][r] = a2[r][c]
-
-        out = ((ctypes.c_double * nrows1.value) * ncols2.value)()
-
-        self.lib.matrix_multiply.restype = None
-        self.lib.matrix_multiply(out,
-                                 m1, ctypes.byref(nrows1), ctypes.byref(ncols1),
-                                 m2, ctypes.byref(nrows2), ctypes.byref(ncols2))
+            raise ValueError(msg.format(nrows1, ncols1, nrows2, ncols2))
 
-        return [[out[c][r] for c in range(ncols2.value)] for r in range(nrows1.value)]
+        # the elements of the resultant matrix are in column-major order
+        out = empty(ctypes.c_double, nrows1 * ncols2, use_numpy=False)
+        self._matrix_multiply(out, a1, nrows1, ncols1, a2, nrows2, ncols2)
+        return [out[r::nrows1].tolist() for r in range(nrows1)]
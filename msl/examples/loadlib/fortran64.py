@@ -208,7 +208,7 @@ class Fortran64(Client64):
         """
         return self.request32('reverse_string', original)
 
-    def add_1D_arrays(self, a1, a2):
+    def add_1D_arrays(self, a1, a2, out=None):
         """
         Perform an element-wise addition of two 1D double-precision arrays.
 
@@ -217,12 +217,16 @@ class Fortran64(Client64):
         Args:
             a1 (list[float]): The first array.
             a2 (list[float]): The second array.
+            out (:class:`~msl.loadlib.buffers.SharedArray`, optional): The shared memory
+                that the 32-bit library writes the result to. The result is not
+                serialized if ``out`` is specified.
 
         Returns:
-             A :py:class:`list` of :py:class:`float`'s: The element-wise addition of
-             ``a1`` + ``a2``.
+             :class:`array.array`: The element-wise addition of ``a1`` + ``a2``, or ``out``
+             if specified. A :class:`numpy.ndarray` is returned if
+             :attr:`~msl.loadlib.client64.Client64.numpy_arrays` is :py:data:`True`.
         """
-        return self.request32('add_1D_arrays', a1, a2)
+        return self.request32('add_1D_arrays', a1, a2, out=out)
 
     def matrix_multiply(self, a1, a2):
         """
@@ -19,9 +19,9 @@ is the 64-bit client for `inter-process communication <ipc_>`_.
 .. _kernel: http://www.geoffchappell.com/studies/windows/win32/kernel32/api/
 """
 import ctypes
-import datetime
 
 from msl.loadlib import Server32
+from msl.loadlib.buffers import StructArray
 
 
 class Kernel32(Server32):
@@ -53,13 +53,13 @@ class Kernel32(Server32):
         See the corresponding 64-bit :meth:`~.kernel64.Kernel64.get_local_time` method.
 
         Returns:
-            A :py:class:`~datetime.datetime` object of the current date and time.
+            :class:`~msl.loadlib.buffers.StructArray`: The :class:`SystemTime` structure.
+            The structure is sent to the client as raw bytes and the client converts
+            the structure to a :py:class:`~datetime.datetime` object.
         """
         st = SystemTime()
         self.lib.GetLocalTime(ctypes.pointer(st))
-        return datetime.datetime(st.wYear, month=st.wMonth, day=st.wDay,
-                                 hour=st.wHour, minute=st.wMinute, second=st.wSecond,
-                                 microsecond=st.wMilliseconds * 1000)
+        return StructArray.from_ctypes(st)
 
 
 class SystemTime(ctypes.Structure):
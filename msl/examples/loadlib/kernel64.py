@@ -18,8 +18,10 @@ is the 32-bit server for `inter-process communication <ipc_>`_.
 .. _kernel: http://www.geoffchappell.com/studies/windows/win32/kernel32/api/
 """
 import os
+import datetime
 
 from msl.loadlib import Client64
+from msl.loadlib.buffers import StructArray
 
 
 class Kernel64(Client64):
@@ -48,7 +50,16 @@ class Kernel64(Client64):
 
         .. _time: https://msdn.microsoft.com/en-us/library/windows/desktop/ms724338(v=vs.85).aspx
         """
-        return self.request32('get_time')
+        st = self.request32('get_time')
+        if isinstance(st, StructArray):
+            st = st.to_ctypes()
+            fields = dict((name, getattr(st, name)) for name, _ in st._fields_)
+        else:
+            # the structure was converted to a numpy.void, see the numpy_arrays argument of Client64
+            fields = dict((name, int(st[name])) for name in st.dtype.names)
+        return datetime.datetime(fields['wYear'], month=fields['wMonth'], day=fields['wDay'],
+                                 hour=fields['wHour'], minute=fields['wMinute'], second=fields['wSecond'],
+                                 microsecond=fields['wMilliseconds'] * 1000)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,588 @@
+"""
+Generate :py:mod:`ctypes` bindings from a C header file.
+
+A C header file (functions, scalar types, pointers, simple structs, unions and enums)
+is parsed by :func:`parse_header` and the result can be used to generate
+
+* a Python module that declares the :py:mod:`ctypes` prototype of every function,
+  see :func:`generate_bindings`,
+* a :class:`~.server32.Server32` subclass, see :func:`generate_server32`, and
+* the corresponding :class:`~.client64.Client64` subclass, see :func:`generate_client64`.
+
+For example::
+
+    >>> from msl.loadlib import bindings  # doctest: +SKIP
+    >>> header = bindings.parse_header('cpp_lib.h')  # doctest: +SKIP
+    >>> with open('cpp_lib_bindings.py', 'w') as fp:  # doctest: +SKIP
+    ...     fp.write(bindings.generate_bindings(header))
+
+The parser is not a C compiler. Preprocessor directives are ignored (except for
+``#define`` macros that expand to nothing or to a calling-convention/export
+attribute, which are removed) and a declaration that cannot be parsed is skipped
+and a warning is logged.
+"""
+import os
+import re
+import logging
+from collections import namedtuple
+
+Function = namedtuple('Function', 'name restype params stdcall')
+""":func:`~collections.namedtuple`: A function prototype. The ``restype`` and the type of each
+(name, type) item in ``params`` is a string of Python code, e.g., ``'ctypes.c_int'``."""
+
+Struct = namedtuple('Struct', 'name fields is_union')
+""":func:`~collections.namedtuple`: A struct (or union). Each item in ``fields`` is a
+(name, type) or a (name, type, bits) :class:`tuple`."""
+
+Enum = namedtuple('Enum', 'name values')
+""":func:`~collections.namedtuple`: An enum. Each item in ``values`` is a (name, value) :class:`tuple`."""
+
+Header = namedtuple('Header', 'path functions structs enums typedefs constants')
+""":func:`~collections.namedtuple`: The result of :func:`parse_header`. The ``constants`` are
+the (name, value) of each ``#define`` macro that is a number."""
+
+# the ctypes type of the C types that are not built from the fundamental keywords
+_KNOWN_TYPES = {
+    'void': 'None',
+    'bool': 'ctypes.c_bool',
+    '_Bool': 'ctypes.c_bool',
+    'wchar_t': 'ctypes.c_wchar',
+    'size_t': 'ctypes.c_size_t',
+    'ssize_t': 'ctypes.c_ssize_t',
+    'int8_t': 'ctypes.c_int8',
+    'int16_t': 'ctypes.c_int16',
+    'int32_t': 'ctypes.c_int32',
+    'int64_t': 'ctypes.c_int64',
+    'uint8_t': 'ctypes.c_uint8',
+    'uint16_t': 'ctypes.c_uint16',
+    'uint32_t': 'ctypes.c_uint32',
+    'uint64_t': 'ctypes.c_uint64',
+    'BOOL': 'ctypes.c_int',
+    'BYTE': 'ctypes.c_ubyte',
+    'CHAR': 'ctypes.c_char',
+    'WORD': 'ctypes.c_uint16',
+    'DWORD': 'ctypes.c_uint32',
+    'INT': 'ctypes.c_int',
+    'UINT': 'ctypes.c_uint',
+    'LONG': 'ctypes.c_long',
+    'ULONG': 'ctypes.c_ulong',
+    'HRESULT': 'ctypes.c_long',
+    'HANDLE': 'ctypes.c_void_p',
+    'LPVOID': 'ctypes.c_void_p',
+    'LPSTR': 'ctypes.c_char_p',
+    'LPCSTR': 'ctypes.c_char_p',
+    'LPWSTR': 'ctypes.c_wchar_p',
+    'LPCWSTR': 'ctypes.c_wchar_p',
+}
+
+_FUNDAMENTAL = {'char', 'short', 'int', 'long', 'float', 'double', 'signed', 'unsigned'}
+
+_QUALIFIERS = {'const', 'volatile', 'extern', 'static', 'inline', '__inline', 'register',
+               'restrict', '__restrict', 'struct', 'enum', 'union', '__cdecl', '__declspec',
+               'dllexport', 'dllimport'}
+
+_STDCALL = {'__stdcall', 'WINAPI', 'CALLBACK', 'APIENTRY', 'STDCALL'}
+
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+
+
+def parse_header(path):
+    """
+    Parse a C header file.
+
+    Args:
+        path (str): The path to the header file.
+
+    Returns:
+        :data:`~.bindings.Header`: The functions, structs, enums and typedefs in the header file.
+    """
+    with open(path) as fp:
+        text = fp.read()
+    return parse_string(text, path=path)
+
+
+def parse_string(text, path=None):
+    """
+    Parse the contents of a C header file.
+
+    Args:
+        text (str): The contents of the header file.
+        path (str, optional): The path to the header file (only used in messages).
+
+    Returns:
+        :data:`~.bindings.Header`: The functions, structs, enums and typedefs in ``text``.
+    """
+    return _Parser(path).parse(text)
+
+
+def generate_bindings(header, module_docstring=None):
+    """
+    Generate the source code of a Python module that declares every function in a header file.
+
+    The module defines the enum values as constants, the structs and unions as
+    :py:class:`ctypes.Structure` and :py:class:`ctypes.Union` subclasses, a ``FUNCTIONS``
+    :class:`dict` that maps the name of each function to its (restype, argtypes) and a
+    ``load(path, libtype='cdll')`` function that returns a :class:`~.load_library.LoadLibrary`
+    object with every function already declared (see :meth:`.LoadLibrary.declare`).
+
+    Args:
+        header (:data:`~.bindings.Header`): The parsed header file, see :func:`parse_header`.
+        module_docstring (str, optional): The docstring of the module.
+
+    Returns:
+        :py:class:`str`: The source code.
+    """
+    if module_docstring is None:
+        name = os.path.basename(header.path) if header.path else 'a C header file'
+        module_docstring = 'ctypes bindings for {}.\n\nGenerated by msl.loadlib.bindings.'.format(name)
+
+    lines = ['"""', module_docstring, '"""', 'import ctypes', '', 'from msl.loadlib import LoadLibrary', '']
+
+    if header.constants:
+        lines.append('')
+        for name, value in header.constants:
+            lines.append('{} = {}'.format(name, value))
+
+    for enum in header.enums:
+        lines.append('')
+        lines.append('# enum {}'.format(enum.name or '(anonymous)'))
+        for name, value in enum.values:
+            lines.append('{} = {}'.format(name, value))
+
+    if header.structs:
+        lines.append('')
+        for struct in header.structs:
+            lines.append('')
+            base = 'ctypes.Union' if struct.is_union else 'ctypes.Structure'
+            lines.append('class {}({}):'.format(struct.name, base))
+            lines.append('    pass')
+        # assign the fields after all classes exist so that a struct can reference any struct
+        lines.append('')
+        for struct in header.structs:
+            lines.append('')
+            lines.append('{}._fields_ = ['.format(struct.name))
+            for field in struct.fields:
+                lines.append('    {},'.format(_tuple_code(field)))
+            lines.append(']')
+
+    lines.extend(['', '', 'FUNCTIONS = {'])
+    for function in header.functions:
+        params = ', '.join("('{}', {})".format(name, ctype) for name, ctype in function.params)
+        lines.append("    '{}': ({}, [{}]),".format(function.name, function.restype, params))
+    lines.append('}')
+    lines.append('"""dict: The (restype, argtypes) of each function."""')
+
+    libtype = 'windll' if any(f.stdcall for f in header.functions) else 'cdll'
+    lines.extend([
+        '', '',
+        "def load(path, libtype='{}'):".format(libtype),
+        '    """',
+        '    Load the shared library and declare all functions in :data:`FUNCTIONS`.',
+        '',
+        '    Args:',
+        '        path (str): The path to the shared library.',
+        "        libtype (str, optional): The library type. Default is '{}'.".format(libtype),
+        '',
+        '    Returns:',
+        '        :class:`~msl.loadlib.load_library.LoadLibrary`: The loaded library. The declared',
+        '        functions are available in :attr:`~msl.loadlib.load_library.LoadLibrary.functions`.',
+        '    """',
+        '    library = LoadLibrary(path, libtype)',
+        '    for name, (restype, argtypes) in FUNCTIONS.items():',
+        '        library.declare(name, restype, argtypes)',
+        '    return library',
+        '',
+    ])
+    return '\n'.join(lines)
+
+
+def generate_server32(header, class_name, path, bindings_module, libtype=None):
+    """
+    Generate the source code of a :class:`~.server32.Server32` subclass.
+
+    The subclass has one method for each function in the header file. Each method calls the
+    function that was declared once in the constructor. The generated code is a starting point,
+    a method that has a pointer parameter must be edited to convert the value that is received
+    from the :class:`~.client64.Client64` into a :py:mod:`ctypes` object.
+
+    Args:
+        header (:data:`~.bindings.Header`): The parsed header file, see :func:`parse_header`.
+        class_name (str): The name of the :class:`~.server32.Server32` subclass.
+        path (str): The path to the 32-bit shared library.
+        bindings_module (str): The name of the module that was created by :func:`generate_bindings`.
+        libtype (str, optional): The library type. Default is **'windll'** if a function
+            uses the __stdcall calling convention, otherwise **'cdll'**.
+
+    Returns:
+        :py:class:`str`: The source code.
+    """
+    if libtype is None:
+        libtype = 'windll' if any(f.stdcall for f in header.functions) else 'cdll'
+
+    lines = [
+        '"""', 'A wrapper around a 32-bit library.', '', 'Generated by msl.loadlib.bindings.', '"""',
+        'from msl.loadlib import Server32', '',
+        'from {} import FUNCTIONS'.format(bindings_module), '', '',
+        'class {}(Server32):'.format(class_name), '',
+        '    def __init__(self, host, port, quiet):',
+        '        Server32.__init__(self, {!r}, {!r}, host, port, quiet)'.format(path, libtype),
+    ]
+    for function in header.functions:
+        lines.append("        self._{0} = self.declare('{0}', *FUNCTIONS['{0}'])".format(function.name))
+
+    for function in header.functions:
+        names = _parameter_names(function)
+        lines.append('')
+        lines.append('    def {}({}):'.format(function.name, ', '.join(['self'] + names)))
+        lines.append('        return self._{}({})'.format(function.name, ', '.join(names)))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_client64(header, class_name, module32):
+    """
+    Generate the source code of a :class:`~.client64.Client64` subclass.
+
+    The subclass has one method for each function in the header file and
+    each method sends a request to the :class:`~.server32.Server32` subclass
+    that was created by :func:`generate_server32`.
+
+    Args:
+        header (:data:`~.bindings.Header`): The parsed header file, see :func:`parse_header`.
+        class_name (str): The name of the :class:`~.client64.Client64` subclass.
+        module32 (str): The name of the module that contains the :class:`~.server32.Server32` subclass.
+
+    Returns:
+        :py:class:`str`: The source code.
+    """
+    lines = [
+        '"""', 'Communicates with a 32-bit library.', '', 'Generated by msl.loadlib.bindings.', '"""',
+        'import os', '', 'from msl.loadlib import Client64', '', '',
+        'class {}(Client64):'.format(class_name), '',
+        '    def __init__(self):',
+        "        Client64.__init__(self, module32='{}', append_path=os.path.dirname(__file__))".format(module32),
+    ]
+    for function in header.functions:
+        names = _parameter_names(function)
+        lines.append('')
+        lines.append('    def {}({}):'.format(function.name, ', '.join(['self'] + names)))
+        lines.append("        return self.request32({})".format(', '.join(["'{}'".format(function.name)] + names)))
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def _strip_suffix(value):
+    """Remove the suffix of the integer literals in a C expression, e.g., 1UL -> 1."""
+    return re.sub(r'\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b', r'\1', value)
+
+
+def _parameter_names(function):
+    return [name for name, _ in function.params]
+
+
+def _tuple_code(item):
+    return '(' + ', '.join(["'{}'".format(item[0])] + [str(v) for v in item[1:]]) + ')'
+
+
+class _Parser(object):
+    """Parses the declarations in a C header file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.functions = []
+        self.structs = []
+        self.enums = []
+        self.typedefs = {}
+        self.struct_names = {}  # the struct tag or typedef name -> the name of the ctypes class
+        self.constants = []
+        self.ignored_macros = set()
+        self.stdcall = set(_STDCALL)
+
+    def parse(self, text):
+        text = self._preprocess(text)
+        for statement in self._statements(text):
+            try:
+                self._parse_statement(statement)
+            except ValueError as err:
+                logging.warning('Skipped "{}" in {}: {}'.format(
+                    ' '.join(statement.split()), self.path or 'header', err))
+        return Header(self.path, self.functions, self.structs, self.enums, self.typedefs, self.constants)
+
+    def _preprocess(self, text):
+        text = re.sub(r'/\*.*?\*/', ' ', text, flags=re.DOTALL)
+        text = re.sub(r'//[^\n]*', '', text)
+        text = re.sub(r'\\\n', ' ', text)  # line continuation
+
+        lines = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped.startswith('#'):
+                lines.append(line)
+                continue
+            match = re.match(r'#\s*define\s+(\w+)(?:\s+(.*))?$', stripped)
+            if match:
+                name, value = match.group(1), (match.group(2) or '').strip()
+                number = re.match(r'\(?\s*(-?(?:0[xX][0-9a-fA-F]+|\d+\.?\d*(?:[eE][-+]?\d+)?))[uUlLfF]*\s*\)?$', value)
+                if number:
+                    self.constants.append((name, number.group(1)))
+                elif value in self.stdcall:
+                    self.stdcall.add(name)
+                elif not value or '__declspec' in value or '__attribute__' in value or \
+                        value in ('__cdecl', 'extern', 'extern "C"'):
+                    self.ignored_macros.add(name)
+
+        text = '\n'.join(lines)
+        text = re.sub(r'__declspec\s*\([^)]*\)', ' ', text)
+        text = re.sub(r'__attribute__\s*\(\(.*?\)\)', ' ', text)
+        text = re.sub(r'extern\s+"C"\s*\{', ' ', text)
+        text = re.sub(r'extern\s+"C"', ' ', text)
+        for macro in self.ignored_macros:
+            text = re.sub(r'\b{}\b'.format(macro), ' ', text)
+        return text
+
+    @staticmethod
+    def _statements(text):
+        """Split the text into the top-level statements that end with a semicolon."""
+        depth, start = 0, 0
+        for index, char in enumerate(text):
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if depth == 0:  # the closing brace of an extern "C" block
+                    start = index + 1
+                else:
+                    depth -= 1
+            elif char == ';' and depth == 0:
+                statement = text[start:index].strip()
+                start = index + 1
+                if statement:
+                    yield statement
+
+    def _parse_statement(self, statement):
+        match = re.match(r'(typedef\s+)?(struct|union|enum)\s*(\w*)\s*\{(.*)\}\s*([^{}]*)$', statement, re.DOTALL)
+        if match:
+            is_typedef, kind, tag, body, names = match.groups()
+            aliases = [n.strip() for n in names.split(',') if n.strip()]
+            if kind == 'enum':
+                self._parse_enum(tag, body, aliases)
+            else:
+                self._parse_struct(tag, body, aliases, kind == 'union')
+            return
+
+        if statement.startswith('typedef'):
+            self._parse_typedef(statement[len('typedef'):].strip())
+            return
+
+        if re.match(r'(struct|union|enum)\s+\w+$', statement):
+            return  # a forward declaration
+
+        # the declarator must come before the parameter list, otherwise it is a
+        # function that has a function pointer as a parameter
+        if re.match(r'[^(]*\(\s*\*\s*\w*\s*\)\s*\(', statement):
+            return  # a variable that is a function pointer
+
+        match = re.match(r'(.*?)\b(\w+)\s*\((.*)\)$', statement, re.DOTALL)
+        if match:
+            self._parse_function(*match.groups())
+            return
+
+        raise ValueError('not a function, struct, union, enum or typedef')
+
+    def _parse_function(self, before, name, params):
+        tokens = self._tokens(before)
+        stdcall = any(t in self.stdcall for t in tokens)
+        restype, _ = self._resolve([t for t in tokens if t not in self.stdcall] + ['*'] * before.count('*'))
+
+        params = params.strip()
+        resolved = []
+        if params and params != 'void':
+            for index, param in enumerate(self._split_commas(params)):
+                if param.strip() == '...':
+                    raise ValueError('variadic functions are not supported')
+                pname, ctype = self._declaration(param, default_name='arg{}'.format(index))
+                resolved.append((pname, ctype))
+        self.functions.append(Function(name, restype, resolved, stdcall))
+
+    def _parse_struct(self, tag, body, aliases, is_union):
+        names = [a for a in aliases if not a.startswith('*')]
+        class_name = names[0] if names else tag
+        if not class_name:
+            raise ValueError('an anonymous struct is not supported')
+        if '{' in body:
+            raise ValueError('a nested struct is not supported')
+
+        # register the name before parsing the fields so that a field can be a pointer to this struct
+        for key in [tag] + names:
+            if key:
+                self.struct_names[key] = class_name
+        for alias in aliases:
+            if alias.startswith('*'):
+                self.typedefs[alias.lstrip('*').strip()] = 'ctypes.POINTER({})'.format(class_name)
+
+        fields = []
+        for declaration in body.split(';'):
+            if not declaration.strip():
+                continue
+            bits = None
+            match = re.match(r'(.*?):\s*(\d+)\s*$', declaration, re.DOTALL)
+            if match:
+                declaration, bits = match.group(1), int(match.group(2))
+            # support multiple fields in one declaration, e.g., int x, y;
+            parts = self._split_commas(declaration)
+            base = self._tokens(parts[0])[:-1] if len(parts) > 1 else []
+            for index, part in enumerate(parts):
+                if index > 0:
+                    part = ' '.join(base) + ' ' + part
+                name, ctype = self._declaration(part)
+                fields.append((name, ctype) if bits is None else (name, ctype, bits))
+        self.structs.append(Struct(class_name, fields, is_union))
+
+    def _parse_enum(self, tag, body, aliases):
+        values = []
+        previous = None
+        for item in self._split_commas(body):
+            item = item.strip()
+            if not item:
+                continue
+            if '=' in item:
+                name, value = [s.strip() for s in item.split('=', 1)]
+            elif previous is None:
+                name, value = item, '0'
+            else:
+                name = item
+                try:
+                    value = str(int(previous, 0) + 1)
+                except ValueError:
+                    value = '{} + 1'.format(values[-1][0])
+            value = _strip_suffix(value)
+            values.append((name, value))
+            previous = value
+        for key in [tag] + aliases:
+            if key:
+                self.typedefs[key] = 'ctypes.c_int'
+        self.enums.append(Enum(aliases[0] if aliases else tag, values))
+
+    def _parse_typedef(self, declaration):
+        if re.search(r'\(\s*\w*\s*\*\s*\w+\s*\)\s*\(', declaration):
+            match = re.search(r'\(\s*\w*\s*\*\s*(\w+)\s*\)', declaration)
+            self.typedefs[match.group(1)] = 'ctypes.c_void_p'  # a function pointer
+            return
+        match = re.match(r'(struct|union)\s+(\w+)\s+(\**)\s*(\w+)$', declaration)
+        if match:  # e.g., typedef struct _Point Point;
+            _, tag, stars, name = match.groups()
+            class_name = self.struct_names.get(tag, tag)
+            if stars:
+                self.typedefs[name] = self._pointer(class_name, len(stars))
+            else:
+                self.struct_names[name] = class_name
+            return
+        name, ctype = self._declaration(declaration)
+        self.typedefs[name] = ctype
+
+    def _declaration(self, text, default_name=None):
+        """Returns the (name, ctypes type) of a variable declaration."""
+        if re.search(r'\(\s*\*', text):  # a function pointer
+            match = re.search(r'\(\s*\*\s*(\w*)\s*\)', text)
+            return match.group(1) or default_name, 'ctypes.c_void_p'
+
+        dimensions = [d.strip() for d in re.findall(r'\[([^\]]*)\]', text)]
+        text = re.sub(r'\[[^\]]*\]', ' ', text)
+        tokens = [t for t in self._tokens(text) if t not in self.stdcall and t not in _QUALIFIERS]
+        stars = text.count('*')
+
+        if len(tokens) > 1 and tokens[-1] not in _FUNDAMENTAL and not self._is_type(tokens):
+            name, tokens = tokens[-1], tokens[:-1]
+        else:
+            name = default_name
+        if name is None:
+            raise ValueError('the variable does not have a name')
+
+        ctype, _ = self._resolve(tokens + ['*'] * stars)
+        for dimension in reversed(dimensions):
+            if not dimension:  # e.g., double values[] is a pointer
+                ctype = self._pointer(ctype, 1)
+            else:
+                ctype = '{} * {}'.format(ctype, dimension) if ' * ' not in ctype \
+                    else '({}) * {}'.format(ctype, dimension)
+        return name, ctype
+
+    def _is_type(self, tokens):
+        """Whether all tokens together are a type (i.e., the declaration does not include a name)."""
+        if all(t in _FUNDAMENTAL for t in tokens):
+            return True
+        return len(tokens) == 1 and self._lookup(tokens[0]) is not None
+
+    def _resolve(self, tokens):
+        """Returns the ctypes type of the type tokens (which may contain '*')."""
+        stars = tokens.count('*')
+        words = [t for t in tokens if t != '*' and t not in _QUALIFIERS and t not in self.ignored_macros]
+        if not words:
+            raise ValueError('missing type')
+
+        if all(w in _FUNDAMENTAL for w in words):
+            base = self._fundamental(words)
+        elif len(words) == 1:
+            base = self._lookup(words[0])
+            if base is None:
+                raise ValueError('unknown type {!r}'.format(words[0]))
+        else:
+            raise ValueError('cannot parse the type {!r}'.format(' '.join(words)))
+        return self._pointer(base, stars), stars
+
+    def _lookup(self, word):
+        if word in self.typedefs:
+            return self.typedefs[word]
+        if word in self.struct_names:
+            return self.struct_names[word]
+        return _KNOWN_TYPES.get(word)
+
+    @staticmethod
+    def _fundamental(words):
+        unsigned = 'unsigned' in words
+        signed = 'signed' in words
+        longs = words.count('long')
+        if 'char' in words:
+            return 'ctypes.c_ubyte' if unsigned else ('ctypes.c_byte' if signed else 'ctypes.c_char')
+        if 'short' in words:
+            return 'ctypes.c_ushort' if unsigned else 'ctypes.c_short'
+        if 'double' in words:
+            return 'ctypes.c_longdouble' if longs else 'ctypes.c_double'
+        if 'float' in words:
+            return 'ctypes.c_float'
+        if longs >= 2:
+            return 'ctypes.c_ulonglong' if unsigned else 'ctypes.c_longlong'
+        if longs == 1:
+            return 'ctypes.c_ulong' if unsigned else 'ctypes.c_long'
+        return 'ctypes.c_uint' if unsigned else 'ctypes.c_int'
+
+    @staticmethod
+    def _pointer(ctype, count):
+        for _ in range(count):
+            if ctype == 'ctypes.c_char':
+                ctype = 'ctypes.c_char_p'
+            elif ctype == 'ctypes.c_wchar':
+                ctype = 'ctypes.c_wchar_p'
+            elif ctype == 'None':
+                ctype = 'ctypes.c_void_p'
+            else:
+                ctype = 'ctypes.POINTER({})'.format(ctype)
+        return ctype
+
+    @staticmethod
+    def _tokens(text):
+        return _IDENTIFIER.findall(text)
+
+    @staticmethod
+    def _split_commas(text):
+        """Split on the commas that are not within parentheses."""
+        parts, depth, start = [], 0, 0
+        for index, char in enumerate(text):
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == ',' and depth == 0:
+                parts.append(text[start:index])
+                start = index + 1
+        parts.append(text[start:])
+        return parts
@@ -0,0 +1,716 @@
+"""
+Pass arrays to, and receive arrays from, a shared library without per-element conversions.
+
+Any object that supports the `buffer protocol <https://docs.python.org/3/c-api/buffer.html>`_
+(e.g., a :class:`numpy.ndarray`, an :class:`array.array`, a :class:`bytearray` or a
+:class:`memoryview`) is passed to a shared library as a pointer to the memory of the object
+if the data type and the memory layout are compatible with the :py:mod:`ctypes` type that
+the library expects. The data is only copied if necessary.
+
+For example, to call the C function ``void scalar_multiply(double a, double* xin, int n, double* xout)``
+with a :mod:`numpy` array::
+
+    >>> import numpy as np  # doctest: +SKIP
+    >>> xin = np.arange(1e6)  # doctest: +SKIP
+    >>> xout = buffers.empty(ctypes.c_double, xin.size)  # doctest: +SKIP
+    >>> lib.scalar_multiply(ctypes.c_double(2.0),
+    ...                     buffers.as_ctypes(xin, ctypes.c_double),
+    ...                     ctypes.c_int(xin.size),
+    ...                     buffers.as_ctypes(xout, ctypes.c_double))  # doctest: +SKIP
+"""
+import os
+import re
+import sys
+import mmap
+import array
+import ctypes
+import weakref
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# the kind of each struct-module format character
+_FORMAT_KINDS = {}
+_FORMAT_KINDS.update((c, 'i') for c in 'bhilqn')
+_FORMAT_KINDS.update((c, 'u') for c in 'BHILQN')
+_FORMAT_KINDS.update((c, 'f') for c in 'efd')
+_FORMAT_KINDS.update({'?': 'b', 'c': 'c', 'P': 'u'})
+
+_NATIVE_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+# the (kind, size) of a layout format and the ctypes type to rebuild it
+_LAYOUT_CTYPES = {}
+for _ctype in (ctypes.c_int8, ctypes.c_int16, ctypes.c_int32, ctypes.c_int64):
+    _LAYOUT_CTYPES[('i', ctypes.sizeof(_ctype))] = _ctype
+for _ctype in (ctypes.c_uint8, ctypes.c_uint16, ctypes.c_uint32, ctypes.c_uint64):
+    _LAYOUT_CTYPES[('u', ctypes.sizeof(_ctype))] = _ctype
+_LAYOUT_CTYPES[('f', 4)] = ctypes.c_float
+_LAYOUT_CTYPES[('f', 8)] = ctypes.c_double
+_LAYOUT_CTYPES[('b', 1)] = ctypes.c_bool
+
+_LAYOUT_FORMAT = re.compile(r'^(?:\((\d+(?:,\d+)*),?\))?([<>|=]?)([a-zA-Z?])(\d*)$')
+
+# the structure classes that were rebuilt from a layout
+_STRUCTURES = {}
+
+# the SharedArray's that are open in this process, see _attach_shared_array()
+_SHARED_ARRAYS = weakref.WeakValueDictionary()
+
+
+def as_ctypes(obj, ctype, copy=False, order='C'):
+    """
+    Get a :py:mod:`ctypes` array that can be passed to a shared library.
+
+    If ``obj`` supports the buffer protocol, is contiguous in the requested ``order``
+    and its data type is compatible with ``ctype`` then the returned array shares the
+    memory of ``obj`` (no data is copied) so the shared library can also write to
+    ``obj``. If ``obj`` is read only (e.g., :class:`bytes`) then the data is copied in
+    a single memory copy. Otherwise, e.g., if ``obj`` is a :class:`list` or if the data
+    type of ``obj`` is not compatible with ``ctype``, then each element is converted.
+
+    Args:
+        obj: The object that contains the data, e.g., a :class:`numpy.ndarray`,
+            an :class:`array.array` or a (nested) :class:`list`.
+        ctype: The :py:mod:`ctypes` type of each element, e.g., :class:`ctypes.c_double`.
+        copy (bool, optional): Whether to always return a copy of the data.
+        order (str, optional): The memory layout that the shared library expects for a
+            multi-dimensional array, either ``'C'`` (row major) or ``'F'`` (column major,
+            e.g., for a FORTRAN library). A :class:`numpy.ndarray` that was created with
+            ``order='F'`` is not copied if ``order`` is ``'F'``.
+
+    Returns:
+        A one-dimensional :py:mod:`ctypes` array of ``ctype``.
+
+    Raises:
+        ValueError: If ``order`` is not ``'C'`` or ``'F'``.
+    """
+    if order not in ('C', 'F'):
+        raise ValueError("The order must be 'C' or 'F', got {!r}".format(order))
+
+    if isinstance(obj, ctypes.Array) and obj._type_ is ctype and not copy:
+        return obj
+
+    if isinstance(obj, SharedArray):
+        if ctypes.sizeof(ctype) != obj.itemsize:
+            raise TypeError('Cannot use a SharedArray of {} as an array of {}'.format(obj.ctype, ctype))
+        if copy:
+            return (ctype * obj.size).from_buffer_copy(obj.mmap)
+        return (ctype * obj.size).from_buffer(obj.mmap)
+
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        values = _flatten(list(obj), order)
+        return (ctype * len(values))(*values)
+
+    if (order == 'C' or view.ndim < 2) and _is_compatible(view, ctype):
+        n = _nbytes(view) // ctypes.sizeof(ctype)
+        if view.readonly or copy:
+            return (ctype * n).from_buffer_copy(view)
+        return (ctype * n).from_buffer(view)
+
+    try:
+        import numpy as np
+    except ImportError:
+        pass
+    else:
+        if isinstance(obj, np.ndarray):
+            # ravel() returns a view if the array is already contiguous in the requested order
+            converted = np.asarray(obj, dtype=np.dtype(ctype), order=order).ravel(order=order)
+            if copy and np.may_share_memory(converted, obj):
+                converted = converted.copy()
+            return (ctype * converted.size).from_buffer(converted)
+
+    values = _flatten(view.tolist(), order)
+    return (ctype * len(values))(*values)
+
+
+def empty(ctype, shape, use_numpy=None, order='C'):
+    """
+    Allocate an array (initialized with zeros) to pass to a shared library as an output array.
+
+    Use :func:`as_ctypes` to get the :py:mod:`ctypes` array that shares memory with
+    the returned array.
+
+    Args:
+        ctype: The :py:mod:`ctypes` type of each element, e.g., :class:`ctypes.c_double`.
+        shape (int or tuple[int]): The number of elements or the shape of the array.
+        use_numpy (bool, optional): Whether to return a :class:`numpy.ndarray` (:py:data:`True`)
+            or an :class:`array.array` (:py:data:`False`). Default is to return a
+            :class:`numpy.ndarray` if :mod:`numpy` is installed.
+        order (str, optional): The memory layout of a multi-dimensional :class:`numpy.ndarray`,
+            either ``'C'`` (row major) or ``'F'`` (column major). An :class:`array.array`
+            is always one dimensional and contains the elements in the order that the
+            shared library writes them.
+
+    Returns:
+        A :class:`numpy.ndarray` or an :class:`array.array`.
+
+    Raises:
+        ImportError: If ``use_numpy`` is :py:data:`True` and :mod:`numpy` is not installed.
+        TypeError: If ``ctype`` is not supported by :class:`array.array`.
+    """
+    if use_numpy is None or use_numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            if use_numpy:
+                raise
+        else:
+            return np.zeros(shape, dtype=np.dtype(ctype), order=order)
+
+    size = 1
+    for n in (shape if isinstance(shape, (tuple, list)) else (shape,)):
+        size *= n
+    return array.array(typecode(ctype), [0]) * size
+
+
+class StructArray(object):
+    """
+    A :py:class:`ctypes.Structure` (or an array of structures) that can be
+    transferred between processes in a single memory copy.
+
+    The raw bytes of the structure(s) are sent together with a description of the
+    memory layout (the name, format and offset of each field) so that the receiver
+    does not need to import the :py:class:`ctypes.Structure` class and so that the
+    layout of the 32-bit process is preserved in the 64-bit process (e.g., the size
+    of a pointer differs). The receiver can rebuild the structure(s) with
+    :meth:`to_ctypes` or view the data as a :mod:`numpy` structured array with
+    :meth:`to_numpy`.
+
+    Create an instance with :meth:`from_ctypes`, for example, a
+    :class:`~msl.loadlib.server32.Server32` method can return::
+
+        records = (Record * 1000)()
+        self.lib.get_records(records, 1000)
+        return StructArray.from_ctypes(records)
+
+    Args:
+        data (bytes): The raw bytes of the structure(s).
+        layout (dict): The memory layout of one structure. The :class:`dict` can be
+            passed to :class:`numpy.dtype`.
+        count (int, optional): The number of structures in ``data``, or :py:data:`None`
+            if ``data`` is a single structure.
+        name (str, optional): The name of the :py:class:`ctypes.Structure` class.
+    """
+
+    def __init__(self, data, layout, count=None, name='Structure'):
+        self.data = data
+        self.layout = layout
+        self.count = count
+        self.name = name
+
+    def __len__(self):
+        return 1 if self.count is None else self.count
+
+    def __repr__(self):
+        if self.count is None:
+            return '<StructArray {}>'.format(self.name)
+        return '<StructArray {}[{}]>'.format(self.name, self.count)
+
+    @classmethod
+    def from_ctypes(cls, obj):
+        """
+        Create a :class:`StructArray` from :py:mod:`ctypes` structure(s).
+
+        Args:
+            obj: A :py:class:`ctypes.Structure` (or :py:class:`ctypes.Union`) instance,
+                a :py:mod:`ctypes` array of structures or a :class:`list` of structures
+                of the same type.
+
+        Returns:
+            :class:`StructArray`: The raw bytes and the layout of the structure(s).
+
+        Raises:
+            TypeError: If ``obj`` is not a structure or if a field of the structure is
+                not supported (e.g., a bit field).
+        """
+        if isinstance(obj, (ctypes.Structure, ctypes.Union)):
+            struct, count = type(obj), None
+            data = ctypes.string_at(ctypes.addressof(obj), ctypes.sizeof(obj))
+        elif isinstance(obj, ctypes.Array) and issubclass(obj._type_, (ctypes.Structure, ctypes.Union)):
+            struct, count = obj._type_, len(obj)
+            data = ctypes.string_at(ctypes.addressof(obj), ctypes.sizeof(obj))
+        elif isinstance(obj, (list, tuple)) and obj and isinstance(obj[0], (ctypes.Structure, ctypes.Union)):
+            struct, count = type(obj[0]), len(obj)
+            if not all(type(item) is struct for item in obj):
+                raise TypeError('All structures must be of type {}'.format(struct.__name__))
+            data = b''.join(ctypes.string_at(ctypes.addressof(item), ctypes.sizeof(item)) for item in obj)
+        else:
+            raise TypeError('Expected a ctypes Structure or an array of Structures, got {}'.format(type(obj)))
+        return cls(data, _layout(struct), count=count, name=struct.__name__)
+
+    def to_ctypes(self):
+        """
+        Rebuild the :py:class:`ctypes.Structure` (or the array of structures).
+
+        The data is copied in a single memory copy. The returned structure class has
+        the same field names as the original class (and it has additional padding
+        fields if necessary so that each field is at the same offset).
+
+        Returns:
+            A :py:class:`ctypes.Structure` instance or a :py:mod:`ctypes` array of structures.
+        """
+        struct = _structure(self.name, self.layout)
+        if self.count is None:
+            return struct.from_buffer_copy(self.data)
+        return (struct * self.count).from_buffer_copy(self.data)
+
+    def to_numpy(self):
+        """
+        View the data as a :mod:`numpy` structured array.
+
+        The data is not copied and therefore the returned array is read only.
+
+        Returns:
+            A :class:`numpy.ndarray` (or a :class:`numpy.void` if the data
+            is a single structure).
+
+        Raises:
+            ImportError: If :mod:`numpy` is not installed.
+        """
+        import numpy as np
+        records = np.frombuffer(self.data, dtype=np.dtype(self.layout))
+        return records[0] if self.count is None else records
+
+
+class BufferPool(object):
+    """
+    A pool of :py:mod:`ctypes` arrays that can be reused for the output of a shared library.
+
+    Allocating a new buffer for every call to a shared library function (e.g., with
+    :func:`ctypes.create_string_buffer`) is slow and, in a 32-bit process, fragments
+    the small address space. A buffer that is borrowed from the pool is returned to
+    the pool when it is no longer needed and the next request for a buffer of the
+    same type and size reuses it. For example::
+
+        with pool.borrow(ctypes.c_char, n) as buffer:
+            lib.reverse_string(original, n, buffer)
+            return buffer.raw.decode()
+
+    Each :class:`~msl.loadlib.server32.Server32` has a pool, see
+    :attr:`~msl.loadlib.server32.Server32.buffer_pool`.
+
+    Args:
+        max_per_size (int, optional): The maximum number of unused buffers to keep for
+            each (type, size) pair. A buffer that is returned to a pool that already
+            has this many unused buffers is released.
+    """
+
+    def __init__(self, max_per_size=8):
+        self._max_per_size = max_per_size
+        self._free = {}
+        self._lock = threading.Lock()
+        self._allocated = 0
+        self._reused = 0
+        self._discarded = 0
+
+    def acquire(self, ctype, size, zero=False):
+        """
+        Get a buffer from the pool (or allocate a new buffer if none are available).
+
+        Use :meth:`release` to return the buffer to the pool.
+
+        Args:
+            ctype: The :py:mod:`ctypes` type of each element, e.g., :class:`ctypes.c_double`.
+            size (int): The number of elements.
+            zero (bool, optional): Whether to fill a reused buffer with zeros. A new
+                buffer is always filled with zeros.
+
+        Returns:
+            A :py:mod:`ctypes` array of ``ctype``.
+        """
+        with self._lock:
+            free = self._free.get((ctype, size))
+            buffer = free.pop() if free else None
+            if buffer is None:
+                self._allocated += 1
+            else:
+                self._reused += 1
+
+        if buffer is None:
+            return (ctype * size)()
+        if zero:
+            ctypes.memset(buffer, 0, ctypes.sizeof(buffer))
+        return buffer
+
+    def release(self, buffer):
+        """
+        Return a buffer to the pool.
+
+        Args:
+            buffer: A :py:mod:`ctypes` array that was acquired from the pool. The
+                buffer must not be used after it has been returned.
+        """
+        with self._lock:
+            free = self._free.setdefault((buffer._type_, len(buffer)), [])
+            if len(free) < self._max_per_size:
+                free.append(buffer)
+            else:
+                self._discarded += 1
+
+    @contextmanager
+    def borrow(self, ctype, size, zero=False):
+        """
+        A context manager that acquires a buffer from the pool and then releases it.
+
+        See :meth:`acquire` for a description of the arguments.
+
+        Yields:
+            A :py:mod:`ctypes` array of ``ctype``.
+        """
+        buffer = self.acquire(ctype, size, zero=zero)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def clear(self):
+        """Release all unused buffers."""
+        with self._lock:
+            self._free.clear()
+
+    def statistics(self):
+        """
+        Get the statistics of the pool.
+
+        Returns:
+            :py:class:`dict`: The number of buffers that were ``'allocated'``, ``'reused'``
+            and ``'discarded'`` (because the pool was full), the number of unused
+            buffers that are ``'available'`` in the pool, the number of bytes that the
+            unused buffers occupy (``'nbytes'``) and the fraction of requests that
+            reused a buffer (``'reuse_ratio'``).
+        """
+        with self._lock:
+            buffers = [buffer for free in self._free.values() for buffer in free]
+            total = self._allocated + self._reused
+            return {
+                'allocated': self._allocated,
+                'reused': self._reused,
+                'discarded': self._discarded,
+                'available': len(buffers),
+                'nbytes': sum(ctypes.sizeof(buffer) for buffer in buffers),
+                'reuse_ratio': float(self._reused) / total if total else 0.0,
+            }
+
+
+class SharedArray(object):
+    """
+    A one-dimensional array in memory that is shared between the 64-bit client and the 32-bit server.
+
+    The memory is a memory-mapped temporary file. When a :class:`SharedArray` is passed
+    to (or returned by) a :class:`~msl.loadlib.server32.Server32` method only a reference
+    to the memory is serialized, not the data, so a shared library can write directly
+    into memory that the client can read, for example::
+
+        out = SharedArray(ctypes.c_double, 1000)
+        values = out.to_numpy()  # a view of the shared memory
+        cpp.scalar_multiply(2.0, xin, out=out)  # the library writes to 'values'
+
+    The process that creates the :class:`SharedArray` owns the memory and the
+    temporary file is deleted when :meth:`close` is called (or when the
+    :class:`SharedArray` is garbage collected).
+
+    Args:
+        ctype: The :py:mod:`ctypes` type of each element, e.g., :class:`ctypes.c_double`.
+        size (int): The number of elements.
+        path (str, optional): The path of the file of an existing :class:`SharedArray`
+            to attach to. Default is to create a new file.
+
+    Raises:
+        ValueError: If ``size`` is not > 0.
+    """
+
+    def __init__(self, ctype, size, path=None):
+        if size < 1:
+            raise ValueError('The size of a SharedArray must be > 0, got {}'.format(size))
+
+        self.ctype = ctype
+        self.size = size
+        self.itemsize = ctypes.sizeof(ctype)
+        nbytes = size * self.itemsize
+
+        self._owner = path is None
+        if self._owner:
+            fd, path = tempfile.mkstemp(prefix='msl-loadlib-shared-', suffix='.bin')
+            with os.fdopen(fd, 'wb') as f:
+                f.seek(nbytes - 1)
+                f.write(b'\0')
+        self.path = path
+        with open(path, 'r+b') as f:
+            self.mmap = mmap.mmap(f.fileno(), nbytes)
+        self.closed = False
+        if _SHARED_ARRAYS.get(path) is None:
+            _SHARED_ARRAYS[path] = self
+
+    def __reduce__(self):
+        return _attach_shared_array, (self.path, self.ctype, self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, item):
+        return as_ctypes(self, self.ctype)[item]
+
+    def __setitem__(self, item, value):
+        as_ctypes(self, self.ctype)[item] = value
+
+    def __repr__(self):
+        return '<SharedArray {}[{}] {!r}>'.format(self.ctype.__name__, self.size, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore):
+        self.close()
+
+    def __del__(self):
+        if hasattr(self, 'closed'):
+            self.close()
+
+    def close(self):
+        """
+        Close the shared memory.
+
+        If this process created the :class:`SharedArray` then the temporary file is also
+        deleted. All :py:mod:`ctypes` and :mod:`numpy` arrays that are views of the shared
+        memory must be deleted before the shared memory can be closed.
+        """
+        if self.closed:
+            return
+        self.mmap.close()
+        self.closed = True
+        if _SHARED_ARRAYS.get(self.path) is self:
+            del _SHARED_ARRAYS[self.path]
+        if self._owner:
+            try:
+                os.remove(self.path)
+            except OSError:  # e.g., another process still has the file open on Windows
+                pass
+
+    def tolist(self):
+        """
+        Returns:
+            :py:class:`list`: A copy of the values.
+        """
+        return list(as_ctypes(self, self.ctype))
+
+    def to_numpy(self):
+        """
+        View the shared memory as a :class:`numpy.ndarray`.
+
+        The data is not copied, so the returned array changes when a shared library
+        (in either process) writes to the shared memory.
+
+        Returns:
+            A :class:`numpy.ndarray`.
+
+        Raises:
+            ImportError: If :mod:`numpy` is not installed.
+        """
+        import numpy as np
+        return np.frombuffer(self.mmap, dtype=np.dtype(self.ctype), count=self.size)
+
+
+def _attach_shared_array(path, ctype, size):
+    """Get the :class:`SharedArray` of ``path`` that is open in this process, or attach to it."""
+    shared = _SHARED_ARRAYS.get(path)
+    if shared is None:
+        shared = SharedArray(ctype, size, path=path)
+    return shared
+
+
+def to_numpy(value):
+    """
+    Convert an :class:`array.array`, :class:`StructArray` or :class:`SharedArray` to :mod:`numpy` without copying the data.
+
+    A :class:`~.server32.Server32` can return an :class:`array.array` or a :class:`StructArray`,
+    which are serialized as raw bytes (and therefore are much smaller and faster to transfer
+    than a :class:`list` of numbers), and the :class:`~.client64.Client64` can then use this
+    function to view the data as a :class:`numpy.ndarray`.
+
+    Args:
+        value: The object to convert. If ``value`` is a :class:`tuple` or a :class:`list`
+            then each item in ``value`` is converted.
+
+    Returns:
+        A :class:`numpy.ndarray` if ``value`` is an :class:`array.array`, a :class:`StructArray`
+        or a :class:`SharedArray`, otherwise ``value`` (with its items converted).
+
+    Raises:
+        ImportError: If :mod:`numpy` is not installed.
+    """
+    import numpy as np
+    if isinstance(value, array.array):
+        return np.frombuffer(value, dtype=np.dtype(value.typecode))
+    if isinstance(value, (StructArray, SharedArray)):
+        return value.to_numpy()
+    if isinstance(value, (tuple, list)) and any(isinstance(item, (array.array, StructArray, SharedArray))
+                                                for item in value):
+        return type(value)(to_numpy(item) for item in value)
+    return value
+
+
+def typecode(ctype):
+    """
+    Get the :class:`array.array` type code of a :py:mod:`ctypes` type.
+
+    Args:
+        ctype: A :py:mod:`ctypes` type, e.g., :class:`ctypes.c_double`.
+
+    Returns:
+        :py:class:`str`: The type code, e.g., ``'d'``.
+
+    Raises:
+        TypeError: If ``ctype`` is not supported by :class:`array.array`.
+    """
+    code = getattr(ctype, '_type_', None)
+    if not isinstance(code, str) or code not in array.typecodes:
+        raise TypeError('{} is not supported by array.array'.format(ctype))
+    return code
+
+
+def _layout(struct):
+    """Get the memory layout of a :py:class:`ctypes.Structure` class as a :class:`numpy.dtype` :class:`dict`."""
+    names, formats, offsets = [], [], []
+    for field in struct._fields_:
+        if len(field) != 2:
+            raise TypeError('The bit field {!r} of {} is not supported'.format(field[0], struct.__name__))
+        name, ctype = field
+        names.append(name)
+        formats.append(_field_format(ctype))
+        offsets.append(getattr(struct, name).offset)
+    return {'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': ctypes.sizeof(struct)}
+
+
+def _field_format(ctype):
+    """Get the layout format of a :py:mod:`ctypes` type, e.g., ``'<u2'`` or ``'(3,)<f8'``."""
+    if issubclass(ctype, (ctypes.Structure, ctypes.Union)):
+        return _layout(ctype)
+
+    shape = []
+    while issubclass(ctype, ctypes.Array):
+        shape.append(ctype._length_)
+        ctype = ctype._type_
+    if issubclass(ctype, (ctypes.Structure, ctypes.Union)):
+        raise TypeError('An array of structures in a structure is not supported')
+
+    code = ctype._type_
+    size = ctypes.sizeof(ctype)
+    if code == 'c':
+        if shape:  # a char[n] array is a string
+            fmt = 'S{}'.format(shape.pop())
+        else:
+            fmt = 'S1'
+    elif code == '?':
+        fmt = '|b1'
+    elif code in 'fdg' and ('f', size) in _LAYOUT_CTYPES:
+        fmt = '{}f{}'.format(_NATIVE_BYTE_ORDER, size)
+    elif code in 'bhilq':
+        fmt = '{}i{}'.format(_NATIVE_BYTE_ORDER, size)
+    elif code in 'BHILQzZPu':  # a pointer is preserved as an unsigned integer
+        fmt = '{}u{}'.format(_NATIVE_BYTE_ORDER, size)
+    else:
+        fmt = '|V{}'.format(size)
+
+    if shape:
+        return '({}{}){}'.format(','.join(str(n) for n in shape), ',' if len(shape) == 1 else '', fmt)
+    return fmt
+
+
+def _structure(name, layout):
+    """Create (or get a cached) :py:class:`ctypes.Structure` class from a layout."""
+    key = (name, repr(layout))
+    try:
+        return _STRUCTURES[key]
+    except KeyError:
+        pass
+
+    offsets = layout['offsets']
+    fields, position = [], 0
+    for field, fmt, offset in sorted(zip(layout['names'], layout['formats'], offsets), key=lambda item: item[2]):
+        ctype = _layout_ctype(name, fmt)
+        if offset > position:
+            fields.append(('_pad{}'.format(position), ctypes.c_ubyte * (offset - position)))
+        fields.append((field, ctype))
+        position = max(position, offset + ctypes.sizeof(ctype))
+
+    is_union = len(offsets) > 1 and not any(offsets)
+    if is_union:
+        fields = [(field, ctype) for field, ctype in fields if not field.startswith('_pad')]
+        position = max(ctypes.sizeof(ctype) for _, ctype in fields)
+    if layout['itemsize'] > position:
+        fields.append(('_pad{}'.format(position), ctypes.c_ubyte * (layout['itemsize'] - position)))
+
+    base = ctypes.Union if is_union else ctypes.Structure
+    struct = type(str(name), (base,), {'_pack_': 1, '_fields_': fields})
+    _STRUCTURES[key] = struct
+    return struct
+
+
+def _layout_ctype(name, fmt):
+    """Get the :py:mod:`ctypes` type of a layout format."""
+    if isinstance(fmt, dict):
+        return _structure(name + '_nested', fmt)
+
+    match = _LAYOUT_FORMAT.match(fmt)
+    if not match:
+        raise TypeError('Unsupported layout format {!r}'.format(fmt))
+    shape, byte_order, kind, size = match.groups()
+    size = int(size or 1)
+    if byte_order and byte_order in '<>' and byte_order != _NATIVE_BYTE_ORDER and size > 1:
+        raise TypeError('The byte order of {!r} is not the native byte order'.format(fmt))
+
+    if kind == 'S':
+        ctype = ctypes.c_char * size
+    elif kind == 'V':
+        ctype = ctypes.c_ubyte * size
+    else:
+        try:
+            ctype = _LAYOUT_CTYPES[(kind, size)]
+        except KeyError:
+            raise TypeError('Unsupported layout format {!r}'.format(fmt))
+
+    if shape:
+        for n in reversed(shape.split(',')):
+            ctype = ctype * int(n)
+    return ctype
+
+
+def _flatten(values, order):
+    """Flatten a nested :class:`list` in row-major (``'C'``) or column-major (``'F'``) order."""
+    if not values or not isinstance(values[0], (list, tuple)):
+        return values
+    rows = [_flatten(list(item), order) for item in values]
+    if order == 'C':
+        return [item for row in rows for item in row]
+    # the first index varies the fastest in column-major order
+    return [item for group in zip(*rows) for item in group]
+
+
+def _nbytes(view):
+    """The number of bytes of a :class:`memoryview` (Python 2 does not have the ``nbytes`` attribute)."""
+    nbytes = view.itemsize
+    for size in view.shape or ():
+        nbytes *= size
+    return nbytes
+
+
+def _is_compatible(view, ctype):
+    """Whether a :class:`memoryview` can be reinterpreted as a C-contiguous array of ``ctype``."""
+    if not getattr(view, 'c_contiguous', True):
+        return False
+    fmt = view.format
+    byte_order = _NATIVE_BYTE_ORDER
+    if fmt[:1] in '@=<>!':
+        if fmt[0] in '<>!':
+            byte_order = '>' if fmt[0] == '!' else fmt[0]
+        fmt = fmt[1:]
+    if byte_order != _NATIVE_BYTE_ORDER and view.itemsize > 1:
+        return False
+    code = getattr(ctype, '_type_', None)
+    if not isinstance(code, str) or len(fmt) != 1:
+        return False
+    if code == 'c':  # a char array can reinterpret any bytes
+        return view.itemsize == 1
+    return _FORMAT_KINDS.get(fmt) == _FORMAT_KINDS.get(code) and view.itemsize == ctypes.sizeof(ctype)
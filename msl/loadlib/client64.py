@@ -8,18 +8,35 @@ from 64-bit Python.
 import os
 import sys
 import site
+import array
+import time
+import json
+import hashlib
 import uuid
+import struct
+import functools
+import contextlib
 import random
 import socket
 import subprocess
 import tempfile
+import threading
+from collections import OrderedDict
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
+try:
+    from concurrent.futures import Future, ThreadPoolExecutor
+except ImportError:  # Python 2 without the "futures" backport
+    Future, ThreadPoolExecutor = None, None
 
 from msl.loadlib import IS_PYTHON2, IS_PYTHON3
+from msl.loadlib import serializers
+from msl.loadlib.buffers import to_numpy
 from msl.loadlib.freeze_server32 import SERVER_FILENAME
+from msl.loadlib.server32 import CODEC_HEADER
+from msl.loadlib.server32 import ARGUMENT_CACHE_HEADER
 
 if IS_PYTHON2:
     from httplib import HTTPConnection
@@ -30,6 +47,24 @@ elif IS_PYTHON3:
 else:
     raise NotImplementedError('Python major version is not 2 or 3')
 
+PRIORITIES = {'interactive': 0, 'normal': 1, 'bulk': 2}
+""":class:`dict`: The priority classes of a request, see :meth:`.Client64.priority`.
+
+A request with a smaller value is processed first by the 32-bit server."""
+
+PROXY_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.msl', 'loadlib', 'proxy-cache')
+""":class:`str`: The directory where :meth:`.Client64.proxy32` caches the methods of a 32-bit module.
+
+The name of a file is the hash of the full path, and of the contents, of the module."""
+
+
+# the requests that the 32-bit server handles itself (not a method of the Server32 subclass)
+_RESERVED = ('SHUTDOWN_SERVER', 'LIB32_PATH', 'QUEUE_LENGTH', 'BATCH_REQUEST', 'BUFFER_POOL_STATISTICS',
+             'INTROSPECT', 'BLOB_REQUEST')
+
+# the maximum number of digests of the arguments that the client remembers sending
+_MAX_SENT_BLOBS = 1024
+
 
 class Client64(HTTPConnection):
     """
@@ -78,15 +113,77 @@ class Client64(HTTPConnection):
                 in :py:data:`sys.path` so that those modules can be imported when ``module32``
                 is imported.
 
+        numpy_arrays (bool, optional): Whether to convert each :class:`array.array` and
+            :class:`~.buffers.StructArray` that the 32-bit server returns into a
+            :class:`numpy.ndarray`, see :func:`~.buffers.to_numpy`. The conversion does
+            not copy the data. Can also be changed later by setting the :attr:`numpy_arrays`
+            attribute. Default is :py:data:`False`.
+
+        serializer (str or :class:`~.serializers.Serializer`, optional): How to
+            serialize the arguments and the returned value of a request, see
+            :mod:`~msl.loadlib.serializers`. Either the name of a registered serializer
+            (e.g., ``'typed'``) or a :class:`~.serializers.Serializer` object.
+            Default is ``'pickle'``.
+
+        max_connections (int, optional): The maximum number of connections to the 32-bit
+            server that the threads of the 64-bit process share. A thread waits for a
+            connection if they are all in use. Default is 8.
+
     Raises:
         IOError: If the frozen executable cannot be found.
+        ValueError: If there is no serializer with the name ``serializer``.
         :py:class:`~http.client.HTTPException`: If the connection to the 32-bit server cannot
             be established.
     """
     def __init__(self, module32, host='127.0.0.1', port=None, timeout=10.0,
-                 quiet=True, append_path=None):
+                 quiet=True, append_path=None, numpy_arrays=False, serializer='pickle',
+                 max_connections=8):
 
         self._is_active = False
+        self._module32 = module32
+        self._introspection = None
+        self.numpy_arrays = numpy_arrays
+        self._executor = None
+
+        # batching of requests is disabled until enable_batching() is called
+        self._batch_window = None
+        self._batch_max_size = None
+        self._batch_pending = []
+        self._batch_cond = threading.Condition()
+
+        # the server rejects requests when it is overloaded, see set_busy_policy()
+        self._busy_retries = 0
+        self._busy_backoff = 0.05
+
+        # identical requests to idempotent methods that are in progress
+        self._idempotent32 = set()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+        # the priority of the requests of each thread, see priority()
+        self._local = threading.local()
+
+        # the threads share a pool of connections (and temporary files), see _connection()
+        self._connections = []
+        self._idle_connections = []
+        self._connections_lock = threading.Lock()
+        self._connections_available = threading.Semaphore(max_connections)
+
+        # the priority of a request, see priority() and set_priority()
+        self._method_priorities = {}
+
+        # the path of each request, (method32, priority, temp_file, codec) -> path
+        self._request_paths = {}
+
+        # large arguments are sent by their digest, see enable_argument_cache()
+        self._blob_min_size = None
+        self._blob_max_size = None  # the 32-bit server does not cache a larger argument
+        self._sent_blobs = OrderedDict()
+        self._sent_blobs_lock = threading.Lock()
+
+        # the struct codecs of the methods that have a scalar signature, the 32-bit
+        # server sends the formats of a codec in the response to a request, see _send_request32()
+        self._codecs = {}
 
         if port is None:
             # then find a port that is not being used
@@ -99,7 +196,10 @@ class Client64(HTTPConnection):
                     break
                 s.close()
 
-        # the temporary file to use to save the pickle'd data
+        # identifies the requests of this client, see the max_client_requests argument of Server32
+        self._client_id = uuid.uuid4().hex
+
+        # the base name of the temporary files to use to save the serialized data
         self._pickle_temp_file = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
 
         # select the highest-level pickle protocol to use based on the version of python
@@ -113,6 +213,10 @@ class Client64(HTTPConnection):
         else:
             self._pickle_protocol = pickle.HIGHEST_PROTOCOL
 
+        if serializer == 'pickle':
+            serializer = serializers.PickleSerializer(self._pickle_protocol)
+        self._serializer = serializers.get(serializer)
+
         # make sure that the server32 executable exists
         found_server = False
         for name in os.listdir(os.path.dirname(__file__)):
@@ -140,6 +244,7 @@ class Client64(HTTPConnection):
                 _append_path.append(append_path)
             else:
                 _append_path.extend(append_path)
+        self._append_path = _append_path
         cmd.extend(['--append-path', '[' + ','.join(_append_path) + ']'])
 
         if quiet:
@@ -183,6 +288,23 @@ class Client64(HTTPConnection):
         """
         return self.request32('LIB32_PATH')
 
+    @property
+    def queue_length32(self):
+        """
+        Returns:
+            :py:class:`int`: The number of requests that are waiting on the 32-bit server.
+        """
+        return self.request32('QUEUE_LENGTH')
+
+    @property
+    def buffer_pool32(self):
+        """
+        Returns:
+            :py:class:`dict`: The statistics of the pool of output buffers on the 32-bit
+            server, see :meth:`.BufferPool.statistics`.
+        """
+        return self.request32('BUFFER_POOL_STATISTICS')
+
     def request32(self, method32, *args, **kwargs):
         """
         Send a request to the 32-bit server.
@@ -203,6 +325,8 @@ class Client64(HTTPConnection):
         Raises:
             :py:class:`~http.client.HTTPException`: If there was an error
                 processing the request on the 32-bit server.
+            :class:`~.client64.ServerBusyError`: If the 32-bit server is too busy
+                to accept the request, see :meth:`.set_busy_policy`.
         """
         if not self._is_active:
             raise HTTPException('The server is not active')
@@ -211,35 +335,747 @@ class Client64(HTTPConnection):
             self.request('GET', '/' + method32)
             return
 
-        request = '/{}:{}:{}'.format(method32, self._pickle_protocol, self._pickle_temp_file)
-        with open(self._pickle_temp_file, 'wb') as f:
-            pickle.dump(args, f, protocol=self._pickle_protocol)
-            pickle.dump(kwargs, f, protocol=self._pickle_protocol)
-        self.request('GET', request)
+        priority = self._get_priority(method32)
+        if method32 in self._idempotent32:
+            key = ('request32', method32, args, sorted(kwargs.items()))
+            return self._deduplicate(key, self._request32, (method32, args, kwargs, priority), {})
+
+        return self._request32(method32, args, kwargs, priority)
+
+    def vectorize32(self, method32, typecode=None):
+        """
+        Get a function that calls a scalar ``method32`` for each element of arrays in a single request.
+
+        The returned function accepts the same arguments as ``method32`` except that each
+        argument can also be an array. The arguments are broadcast against each other
+        (like a :mod:`numpy` ufunc) and the loop over the elements is performed by the
+        32-bit server, see :meth:`.Server32.vectorize`. For example::
+
+            besselJ0 = fortran.vectorize32('besselJ0', typecode='d')
+            y = besselJ0(numpy.linspace(0, 10, 1000))
+
+        Args:
+            method32 (str): The name of the method to call in the
+                :class:`~.server32.Server32` subclass.
+            typecode (str, optional): The :class:`array.array` type code of the values
+                that ``method32`` returns. Specifying the type code reduces the size of
+                the response.
 
-        response = self.getresponse()
-        if response.status == 200:  # everything is OK
-            with open(self._pickle_temp_file, 'rb') as f:
-                result = pickle.load(f)
+        Returns:
+            A function. If an argument is a :class:`numpy.ndarray` then the function
+            returns a :class:`numpy.ndarray` with the broadcast shape of the arguments,
+            otherwise a :class:`list` (or an :class:`array.array` if ``typecode`` is
+            specified).
+        """
+        def vectorized(*args):
+            shape = None
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+            else:
+                if any(isinstance(arg, np.ndarray) for arg in args):
+                    shape = np.broadcast(*args).shape
+                    args = [_ndarray_argument(np, arg, shape) for arg in args]
+
+            result = self.request32('vectorize', method32, list(args), typecode)
+            if shape is not None:
+                result = np.asarray(result).reshape(shape)
             return result
-        raise HTTPException(response.read().decode())
+
+        vectorized.__name__ = str(method32)
+        return vectorized
+
+    def proxy32(self, use_cache=True):
+        """
+        Create an object that has a method for each method of the :class:`~.server32.Server32` subclass.
+
+        The 32-bit server describes its methods, see :meth:`.Server32.introspect`, and a
+        method that sends the request is created for each one, so that a
+        :class:`~.client64.Client64` subclass does not have to mirror each method by hand::
+
+            cpp = Client64('cpp32').proxy32()
+            cpp.add(1, 2)
+
+        The description is saved in :data:`~.client64.PROXY_CACHE_DIRECTORY` and the
+        32-bit server only sends the description again if the version of the module
+        (i.e., its ``__version__`` or its source code) has changed.
+
+        Args:
+            use_cache (bool, optional): Whether to use (and update) the cached description.
+
+        Returns:
+            :class:`~.client64.Proxy32`: The object that calls the methods of the
+            :class:`~.server32.Server32` subclass.
+        """
+        return Proxy32(self, self.introspect32(use_cache)['methods'])
+
+    def introspect32(self, use_cache=False):
+        """
+        Get the description of the methods of the :class:`~.server32.Server32` subclass.
+
+        Args:
+            use_cache (bool, optional): Whether to use (and update) the description
+                that is cached in :data:`~.client64.PROXY_CACHE_DIRECTORY`, see :meth:`.proxy32`.
+
+        Returns:
+            :class:`dict`: The description, see :meth:`.Server32.introspect`.
+        """
+        if self._introspection is None:
+            path = self._proxy_cache_path() if use_cache else None
+            cached = _read_json(path) if path else None
+            if cached is not None and cached.get('module32') != self._module32:
+                cached = None
+            version = cached['version'] if cached is not None else None
+            description = self._send_request32('INTROSPECT', (version,), {}, self._get_priority('INTROSPECT'))
+            if 'methods' in description:
+                description['module32'] = self._module32
+                if use_cache:
+                    _write_json(path, description)
+            else:
+                description = cached
+            self._introspection = description
+        return self._introspection
+
+    def _proxy_cache_path(self):
+        """
+        Returns the path of the file that caches the description of the methods.
+
+        The name of the file is the hash of the full path of ``module32`` and of its
+        contents (if the 64-bit client can find the module), so that different modules
+        with the same name do not share a file.
+        """
+        key = hashlib.sha256()
+        path = _find_module32(self._module32, self._append_path)
+        if path is None:
+            # the module is only available to the 32-bit server (e.g., in its site-packages)
+            key.update('{}|{}'.format(self._module32, '|'.join(self._append_path)).encode('utf-8'))
+        else:
+            key.update(os.path.abspath(path).encode('utf-8'))
+            try:
+                with open(path, 'rb') as f:
+                    key.update(f.read())
+            except (IOError, OSError):
+                pass
+        return os.path.join(PROXY_CACHE_DIRECTORY, key.hexdigest() + '.json')
+
+    def request32_async(self, method32, *args, **kwargs):
+        """
+        Send a request to the 32-bit server without waiting for the response.
+
+        The request is sent from a background thread so that the 64-bit process
+        can continue with other work (for example, preparing the data for the next
+        request) while the 32-bit library is processing the current request.
+        Requests are sent to the 32-bit server in the order that this method is called.
+
+        Args:
+            method32 (str): The name of the method to call in the
+                :class:`~.server32.Server32` subclass.
+
+            *args: The arguments that the ``method32`` method in the
+                :class:`~.server32.Server32` subclass requires.
+
+            **kwargs: The keyword arguments that the ``method32`` method in the
+                :class:`~.server32.Server32` subclass requires.
+
+        Returns:
+            :py:class:`concurrent.futures.Future`: The pending response from the 32-bit
+            server. Calling :py:meth:`~concurrent.futures.Future.result` returns the
+            response or raises the :py:class:`~http.client.HTTPException` that
+            :meth:`.request32` would have raised.
+
+        Raises:
+            ImportError: If the :py:mod:`concurrent.futures` module is not available
+                (for Python 2 install the `futures <https://pypi.python.org/pypi/futures>`_ package).
+        """
+        if not self._is_active:
+            raise HTTPException('The server is not active')
+
+        if self._executor is None:
+            if ThreadPoolExecutor is None:
+                raise ImportError('The concurrent.futures module is required. Run: pip install futures')
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        priority = self._get_priority(method32)
+        if self._batch_window is not None and method32 != 'LIB32_PATH':
+            future, is_leader = self._batch_append(method32, args, kwargs, priority)
+            if is_leader:
+                self._executor.submit(self._batch_flush)
+            return future
+
+        return self._executor.submit(self._request32_with_priority, priority, method32, args, kwargs)
+
+    @contextlib.contextmanager
+    def priority(self, level):
+        """
+        A context manager to set the priority of the requests that are sent by the current thread.
+
+        The 32-bit server processes the request with the highest priority first when
+        multiple requests are waiting, for example, to process a request to stop a
+        device before the queued requests that read data from the device::
+
+            with client.priority('interactive'):
+                client.emergency_stop()
+
+        Args:
+            level (str or int): The priority of the requests. Either a key in
+                :data:`~.client64.PRIORITIES` or an :class:`int` (a smaller
+                value has a higher priority).
+        """
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = self._priority_value(level)
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def set_priority(self, method32, level):
+        """
+        Set the default priority of the requests to a method of the :class:`~.server32.Server32` subclass.
+
+        The :meth:`.priority` context manager takes precedence over this default value.
+
+        Args:
+            method32 (str): The name of the method in the :class:`~.server32.Server32` subclass.
+            level (str or int): The priority of the requests. Either a key in
+                :data:`~.client64.PRIORITIES` or an :class:`int` (a smaller
+                value has a higher priority).
+        """
+        self._method_priorities[method32] = self._priority_value(level)
+
+    def set_busy_policy(self, retries=3, backoff=0.05):
+        """
+        Set how to react when the 32-bit server is too busy to accept a request.
+
+        The :class:`~.server32.Server32` rejects a request if its ``max_queue`` or
+        ``max_client_requests`` limit is reached. The request is sent again, up to
+        ``retries`` times, and the delay before each attempt is doubled, starting
+        at ``backoff`` seconds. If the server is still busy then a
+        :class:`~.client64.ServerBusyError` is raised. By default, requests are
+        not sent again.
+
+        Args:
+            retries (int, optional): The maximum number of times to send the request
+                again. Default is 3.
+
+            backoff (float, optional): The number of seconds to wait before sending
+                the request again the first time. Default is 0.05.
+        """
+        self._busy_retries = int(retries)
+        self._busy_backoff = float(backoff)
+
+    def register_idempotent(self, *method32):
+        """
+        Register methods of the :class:`~.server32.Server32` subclass as idempotent.
+
+        If multiple threads call :meth:`.request32` for a registered method with the
+        same arguments while an identical request is already in progress then only
+        one request is sent to the 32-bit server and all callers receive the same
+        response. Only register methods that do not modify the state of the 32-bit
+        library (for example, a method that returns the status of a device).
+
+        See also the :func:`~.client64.idempotent` decorator.
+
+        Args:
+            *method32 (str): The names of the methods in the :class:`~.server32.Server32`
+                subclass.
+        """
+        self._idempotent32.update(method32)
+
+    def enable_batching(self, window=200e-6, max_size=100):
+        """
+        Coalesce requests into micro-batches that are sent to the 32-bit server together.
+
+        When batching is enabled, requests that are made by :meth:`.request32` and
+        :meth:`.request32_async` (for example, from many threads) are buffered for at
+        most ``window`` seconds, or until ``max_size`` requests are buffered, and then
+        all buffered requests are sent to the 32-bit server in a single round trip.
+        Each caller still receives the response (or the exception) of its own request.
+
+        Args:
+            window (float, optional): The maximum number of seconds to wait for
+                additional requests before the buffered requests are sent. Default is 200e-6.
+
+            max_size (int, optional): The maximum number of requests in a batch. Default is 100.
+
+        Raises:
+            ImportError: If the :py:mod:`concurrent.futures` module is not available
+                (for Python 2 install the `futures <https://pypi.python.org/pypi/futures>`_ package).
+            ValueError: If ``window`` is negative or ``max_size`` is < 1.
+        """
+        if Future is None:
+            raise ImportError('The concurrent.futures module is required. Run: pip install futures')
+        if window < 0:
+            raise ValueError('The batching window must be >= 0, got {}'.format(window))
+        if max_size < 1:
+            raise ValueError('The maximum batch size must be >= 1, got {}'.format(max_size))
+        with self._batch_cond:
+            self._batch_window = float(window)
+            self._batch_max_size = int(max_size)
+
+    def disable_batching(self):
+        """
+        Stop coalescing requests into micro-batches, see :meth:`.enable_batching`.
+
+        Requests that are already buffered are still sent to the 32-bit server.
+        """
+        with self._batch_cond:
+            self._batch_window = None
+            self._batch_cond.notify_all()
+
+    def enable_argument_cache(self, min_size=65536):
+        """
+        Send only the digest of a large argument if the 32-bit server already has its content.
+
+        When the same large argument (e.g., a calibration table or a reference waveform)
+        is passed to the 32-bit server many times, the argument is only serialized and
+        sent the first time. Afterwards, the SHA-256 digest of the argument is sent and
+        the 32-bit server uses the argument from its cache (see
+        :attr:`.Server32.argument_cache32`). If the 32-bit server no longer has the
+        argument then the request is automatically sent again with the argument. An
+        argument that is larger than the cache of the 32-bit server is always sent.
+
+        Only the arguments that support the buffer protocol (e.g., :class:`bytes`,
+        :class:`bytearray`, :class:`array.array` and a C-contiguous
+        :class:`numpy.ndarray`) are cached, convert a large :class:`list` to an
+        :class:`array.array` to benefit from the cache.
+
+        Args:
+            min_size (int, optional): The minimum number of bytes of an argument for
+                it to be cached. Default is 65536.
+
+        Raises:
+            ValueError: If ``min_size`` is < 1.
+        """
+        if min_size < 1:
+            raise ValueError('The minimum size must be >= 1, got {}'.format(min_size))
+        self._blob_min_size = int(min_size)
+
+    def disable_argument_cache(self):
+        """Always send the arguments to the 32-bit server, see :meth:`.enable_argument_cache`."""
+        self._blob_min_size = None
+        with self._sent_blobs_lock:
+            self._sent_blobs.clear()
+
+    def _extract_blobs(self, args, kwargs):
+        """
+        Replace the large arguments with :py:data:`None`.
+
+        Returns the new args and kwargs, a list of the references, [location, digest, value]
+        (the value is :py:data:`None` if the 32-bit server should already have it), and
+        a list of the values of the references.
+        """
+        refs, values = [], []
+        args, kwargs = list(args), dict(kwargs)
+        locations = [(index, value) for index, value in enumerate(args)] + list(kwargs.items())
+        for location, value in locations:
+            digest = _digest(value, self._blob_min_size, self._blob_max_size)
+            if digest is None:
+                continue
+            with self._sent_blobs_lock:
+                sent = digest in self._sent_blobs
+                if sent:
+                    self._sent_blobs.pop(digest)
+                elif len(self._sent_blobs) >= _MAX_SENT_BLOBS:
+                    self._sent_blobs.popitem(last=False)
+                self._sent_blobs[digest] = True
+            refs.append([location, digest, None if sent else value])
+            values.append(value)
+            if isinstance(location, int):
+                args[location] = None
+            else:
+                kwargs[location] = None
+        return args, kwargs, refs, values
+
+    def _request32(self, method32, args, kwargs, priority):
+        """Send a request to the 32-bit server, either in a micro-batch or by itself."""
+        if self._batch_window is not None and method32 != 'LIB32_PATH':
+            future, is_leader = self._batch_append(method32, args, kwargs, priority)
+            if is_leader:
+                self._batch_flush()
+            return future.result()
+        return self._send_request32(method32, args, kwargs, priority)
+
+    def _request32_with_priority(self, priority, method32, args, kwargs):
+        """Call :meth:`.request32` from a different thread using the priority of the calling thread."""
+        with self.priority(priority):
+            return self.request32(method32, *args, **kwargs)
+
+    @staticmethod
+    def _priority_value(level):
+        """Convert a priority class to an integer."""
+        if isinstance(level, int):
+            return level
+        try:
+            return PRIORITIES[level]
+        except KeyError:
+            raise ValueError('Invalid priority {!r}. Must be an int or one of {}'.format(level, sorted(PRIORITIES)))
+
+    def _get_priority(self, method32):
+        """Returns the priority of a request from the current thread."""
+        priority = getattr(self._local, 'priority', None)
+        if priority is None:
+            priority = self._method_priorities.get(method32, PRIORITIES['normal'])
+        return priority
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """Check out a connection (and its temporary file) from the pool for the current thread."""
+        self._connections_available.acquire()
+        try:
+            with self._connections_lock:
+                if self._idle_connections:
+                    connection, temp_file = self._idle_connections.pop()
+                else:
+                    temp_file = '{}-{}'.format(self._pickle_temp_file, len(self._connections))
+                    connection = HTTPConnection(self.host, self.port)
+                    self._connections.append((connection, temp_file))
+            try:
+                yield connection, temp_file
+            except Exception:
+                # the connection could have a response that was not read, it reconnects when it is used again
+                connection.close()
+                raise
+            finally:
+                with self._connections_lock:
+                    self._idle_connections.append((connection, temp_file))
+        finally:
+            self._connections_available.release()
+
+    def _deduplicate(self, key, func, args, kwargs):
+        """Call ``func`` unless an identical call, ``key``, is in progress, then share its result."""
+        try:
+            key = pickle.dumps(key, protocol=self._pickle_protocol)
+        except Exception:  # cannot compare the arguments so the request cannot be shared
+            return func(*args, **kwargs)
+
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            is_owner = in_flight is None
+            if is_owner:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+
+        if not is_owner:
+            return in_flight.wait()
+
+        try:
+            in_flight.result = func(*args, **kwargs)
+        except Exception as e:
+            in_flight.exception = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            in_flight.event.set()
+        return in_flight.result
+
+    def _send_request32(self, method32, args, kwargs, priority):
+        """Send a single request to the 32-bit server and wait for the response."""
+        with self._connection() as (connection, temp_file):
+            # a method that has a scalar signature has its arguments packed by a struct
+            # codec (the fast path), if the arguments do not fit the codec then use the serializer
+            packed, codec = None, None
+            if not kwargs and method32 not in _RESERVED:
+                codec = self._codecs.get(method32)
+                if codec is not None:
+                    try:
+                        packed = codec[0].pack(*args)
+                    except struct.error:
+                        codec = None
+
+            # a large argument is sent by its digest if the server already has its content
+            refs = None
+            if codec is None and self._blob_min_size is not None and method32 not in _RESERVED:
+                a, kw, refs, values = self._extract_blobs(args, kwargs)
+                if refs:
+                    method32, args, kwargs = 'BLOB_REQUEST', (method32, a, kw, refs), {}
+
+            key = (method32, priority, temp_file, codec is not None)
+            request = self._request_paths.get(key)
+            if request is None:
+                capability = self._serializer.capability if codec is None else 'struct'
+                request = '/{}:{}:{}:{}:{}'.format(method32, capability, priority, self._client_id, temp_file)
+                self._request_paths[key] = request
+            retries, delay = self._busy_retries, self._busy_backoff
+            while True:
+                with open(temp_file, 'wb') as f:
+                    if codec is None:
+                        f.write(self._serializer.dumps((args, kwargs)))
+                    else:
+                        f.write(packed)
+                connection.request('GET', request)
+
+                response = connection.getresponse()
+                if response.status == 200:  # everything is OK
+                    if codec is not None:
+                        with open(temp_file, 'rb') as f:
+                            values = codec[1].unpack(f.read())
+                        return values[0] if values else None
+                    with open(temp_file, 'rb') as f:
+                        result = self._serializer.loads(f.read())
+                    max_size = response.getheader(ARGUMENT_CACHE_HEADER)
+                    if max_size:
+                        self._blob_max_size = int(max_size)
+                    formats = response.getheader(CODEC_HEADER)
+                    if formats and method32 not in _RESERVED:
+                        args_format, result_format = formats.split(';')
+                        self._codecs[method32] = (struct.Struct(str(args_format)), struct.Struct(str(result_format)))
+                    if self.numpy_arrays and method32 != 'BATCH_REQUEST':
+                        result = to_numpy(result)
+                    return result
+                msg = response.read().decode()
+                if response.status == 409 and refs:
+                    # the server does not have the content of an argument, send all of them
+                    for ref, value in zip(refs, values):
+                        ref[2] = value
+                    refs = None
+                    continue
+                if response.status != 503:
+                    raise HTTPException(msg)
+
+                # the server is busy, wait before trying again
+                if retries <= 0:
+                    raise ServerBusyError(msg)
+                time.sleep(delay)
+                retries -= 1
+                delay *= 2
+
+    def _batch_append(self, method32, args, kwargs, priority):
+        """Buffer a request. The first request in a new batch is responsible for sending the batch."""
+        future = Future()
+        with self._batch_cond:
+            self._batch_pending.append((future, method32, args, kwargs, priority))
+            size = len(self._batch_pending)
+            if size >= self._batch_max_size:
+                self._batch_cond.notify_all()
+        return future, size == 1
+
+    def _batch_flush(self):
+        """Wait for the batching window to expire (or the batch to be full) and then send the batch."""
+        while True:
+            with self._batch_cond:
+                window, max_size = self._batch_window, self._batch_max_size
+                if window is not None:
+                    deadline = time.time() + window
+                    while self._batch_window is not None and len(self._batch_pending) < max_size:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            break
+                        self._batch_cond.wait(remaining)
+                batch = self._batch_pending[:max_size]
+                del self._batch_pending[:max_size]
+                # requests that did not fit in this batch do not have a leader
+                has_leftover = len(self._batch_pending) > 0
+
+            self._batch_send(batch)
+            if not has_leftover:
+                break
+
+    def _batch_send(self, batch):
+        """Send the buffered requests and resolve the future of each request."""
+        if len(batch) == 1:
+            future, method32, args, kwargs, priority = batch[0]
+            try:
+                future.set_result(self._send_request32(method32, args, kwargs, priority))
+            except Exception as e:
+                future.set_exception(e)
+            return
+
+        try:
+            # the batch has the priority of its most important request
+            requests = [(method32, args, kwargs) for _, method32, args, kwargs, _ in batch]
+            priority = min(item[4] for item in batch)
+            responses = self._send_request32('BATCH_REQUEST', (requests,), {}, priority)
+        except Exception as e:
+            for item in batch:
+                item[0].set_exception(e)
+            return
+
+        for item, (ok, value) in zip(batch, responses):
+            if ok:
+                item[0].set_result(to_numpy(value) if self.numpy_arrays else value)
+            else:
+                item[0].set_exception(HTTPException(value))
 
     def shutdown_server(self):
         """
-        Shut down the server and delete the temporary file that is used to save the
-        serialized :py:mod:`pickle`\'d data which is passed between the 32-bit server
-        and the 64-bit client.
+        Shut down the server and delete the temporary files that are used to save the
+        serialized data which is passed between the 32-bit server and the 64-bit client.
 
         .. note::
            This method gets called automatically when the :class:`~.client64.Client64`
            object gets destroyed.
         """
         if self._is_active:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
             self.request32('SHUTDOWN_SERVER')
-            if os.path.isfile(self._pickle_temp_file):
-                os.remove(self._pickle_temp_file)
+            with self._connections_lock:
+                for connection, temp_file in self._connections:
+                    connection.close()
+                    if os.path.isfile(temp_file):
+                        os.remove(temp_file)
+                del self._connections[:]
+                del self._idle_connections[:]
             self.close()
             self._is_active = False
 
     def __del__(self):
         self.shutdown_server()
+
+
+class Proxy32(object):
+    """
+    Calls the methods of a :class:`~.server32.Server32` subclass as if they were local methods.
+
+    Do not instantiate this class directly, call :meth:`.Client64.proxy32`.
+
+    Args:
+        client (:class:`~.client64.Client64`): The client that sends the requests.
+        methods (dict): The description of the methods, see :meth:`.Server32.introspect`.
+    """
+
+    def __init__(self, client, methods):
+        self._client = client
+        for name, info in methods.items():
+            setattr(self, name, _stub(client.request32, name, info))
+
+    def __repr__(self):
+        return '<Proxy32 of {}>'.format(self._client._module32)
+
+
+def _stub(request32, name, info):
+    """Create a function that calls ``name`` on the 32-bit server."""
+    def stub(*args, **kwargs):
+        return request32(name, *args, **kwargs)
+    stub.__name__ = str(name)
+    stub.__doc__ = '{}{}\n\n{}'.format(name, info['signature'], info['doc'])
+    return stub
+
+
+def _find_module32(module32, directories):
+    """Returns the path of the module that the 32-bit server imports, or :py:data:`None` if it cannot be found."""
+    name = os.path.basename(module32)
+    if not name.endswith('.py'):
+        name += '.py'
+    folder = os.path.dirname(module32)
+    for directory in ([folder] if folder else [os.getcwd()]) + list(directories):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _read_json(path):
+    """Read a JSON file, returns :py:data:`None` if the file cannot be read."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """Write a JSON file (a cache is an optimization, so an error is ignored)."""
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    except (IOError, OSError):
+        pass
+
+
+class ServerBusyError(HTTPException):
+    """
+    Raised if the 32-bit server is too busy to accept a request.
+
+    See :meth:`.Client64.set_busy_policy`.
+    """
+
+
+def idempotent(method):
+    """
+    A decorator for a method of a :class:`~.client64.Client64` subclass that is idempotent.
+
+    If multiple threads call the decorated method with the same arguments while an
+    identical call is already in progress then the method is only executed once and
+    all callers receive the same value. Only decorate methods that do not modify the
+    state of the 32-bit library (for example, a method that returns the status of a
+    device).
+
+    See also :meth:`.Client64.register_idempotent`.
+
+    Example::
+
+        class MyClient(Client64):
+
+            @idempotent
+            def status(self):
+                return self.request32('status')
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, sorted(kwargs.items()))
+        return self._deduplicate(key, method, (self,) + args, kwargs)
+    return wrapper
+
+
+def _digest(value, min_size, max_size=None):
+    """
+    Returns the SHA-256 digest of an argument that supports the buffer protocol and
+    has at least ``min_size`` (and at most ``max_size``) bytes, otherwise :py:data:`None`.
+    """
+    try:
+        if IS_PYTHON2:
+            data = buffer(value)
+        else:
+            data = memoryview(value).cast('B')  # raises TypeError if not C-contiguous
+    except (TypeError, ValueError):
+        return None
+    if len(data) < min_size or (max_size is not None and len(data) > max_size):
+        return None
+    # the type is included so that, e.g., bytes and an array.array are different arguments
+    kind = '{}:{}:{}:{}'.format(type(value).__name__, getattr(value, 'typecode', ''),
+                                getattr(value, 'dtype', ''), getattr(value, 'shape', ''))
+    sha256 = hashlib.sha256(kind.encode())
+    sha256.update(data)
+    return sha256.hexdigest()
+
+
+def _ndarray_argument(np, arg, shape):
+    """Prepare an argument of a vectorized function to be sent to the 32-bit server."""
+    if isinstance(arg, (list, tuple)):
+        arg = np.asarray(arg)
+    elif not isinstance(arg, np.ndarray):
+        return arg
+    if arg.size == 1:
+        return arg.item()
+    flat = np.ascontiguousarray(np.broadcast_to(arg, shape)).ravel()
+    if flat.dtype.char not in array.typecodes:
+        return flat.tolist()
+    # an array.array is serialized as raw bytes and does not require numpy on the server
+    values = array.array(flat.dtype.char)
+    if IS_PYTHON2:
+        values.fromstring(flat.tobytes())
+    else:
+        values.frombytes(flat.tobytes())
+    return values
+
+
+class _InFlight(object):
+    """The response of a request that may be shared by multiple callers."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+
+    def wait(self):
+        self.event.wait()
+        if self.exception is not None:
+            raise self.exception
+        return self.result
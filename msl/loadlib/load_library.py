@@ -4,11 +4,23 @@ a `.NET Framework <http://pythonnet.github.io/>`_ library.
 """
 import os
 import sys
+import array
+import atexit
 import ctypes
+import _ctypes
+import shutil
+import tempfile
 import logging
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import xml.etree.ElementTree as ET
 
-from msl.loadlib import IS_WINDOWS, IS_LINUX, IS_MAC
+from msl.loadlib import IS_WINDOWS, IS_MAC
+from msl.loadlib.buffers import as_ctypes
+from msl.loadlib.resolver import find_library
+from msl.loadlib.reflection import index_assembly
 
 
 class LoadLibrary(object):
@@ -23,7 +35,9 @@ class LoadLibrary(object):
         * `CLR <http://pythonnet.github.io/>`_-type object if ``libtype`` = **'net'**.
 
     Args:
-        path (str): The path to the shared library.
+        path (str): The path to the shared library. The file extension is optional and
+            the path can also be the name of a shared library that is in a directory
+            that :func:`~msl.loadlib.resolver.find_library` searches.
 
         libtype (str, optional): The library type to use for the calling convention.
 
@@ -35,76 +49,136 @@ class LoadLibrary(object):
 
             Default is **'cdll'**.
 
+        isolated (bool, optional): Whether to load a private copy of the shared library.
+            The operating system loads a shared library only once per process, so every
+            :class:`LoadLibrary` object of the same file shares the global variables of
+            the library. A private copy (a temporary file with a unique name) has its
+            own global variables, so several isolated instances of a library that is
+            not reentrant can be called from different threads at the same time, see
+            :meth:`isolated_instances`. The libraries that the shared library depends on
+            must be found by the usual search path of the operating system since the
+            copy is not in the same directory as the original file. Default is
+            :py:data:`False`.
+
+        lazy (bool, optional): Whether to load the shared library when it is first
+            used (e.g., when the :attr:`lib` property is accessed or a function is
+            declared) instead of when the :class:`LoadLibrary` object is created. A
+            module that creates many :class:`LoadLibrary` objects, but only uses a few
+            of them, can then be imported quickly. Default is :py:data:`False`.
+
+        mode (int, optional): The flags to pass to ``dlopen``, e.g.,
+            ``os.RTLD_NOW | os.RTLD_GLOBAL``. Use ``os.RTLD_LAZY`` to resolve the
+            undefined symbols when the function that needs them is first called, or
+            ``os.RTLD_GLOBAL`` to make the symbols available to the libraries that are
+            loaded afterwards. Ignored on Windows and for a .NET library. Default is
+            the :py:mod:`ctypes` default (``RTLD_NOW | RTLD_LOCAL``).
+
     Raises:
         IOError: If the shared library cannot be loaded.
         TypeError: If the value of ``libtype`` is not supported.
     """
-    def __init__(self, path, libtype='cdll'):
+    def __init__(self, path, libtype='cdll', isolated=False, lazy=False, mode=None):
 
         self._net = None
+        self._lib = None
+        self._handle = None
+        self._net_index = None
+        self._libtype = libtype
+        self._isolated = isolated
+        self._mode = mode
+        self._functions = {}
+        self._pending = True
+        self._lock = threading.Lock()
+
+        # search for the shared library if the path is not the path of an existing file
+        resolved = find_library(path)
+        if resolved is None:
+            if not os.path.splitext(path)[1]:
+                path += _DEFAULT_EXTENSION
+            raise IOError('Cannot find the shared library ' + os.path.abspath(path) + '\n')
+        self._path = resolved
+
+        if libtype not in _LOADERS and libtype != 'net':
+            raise TypeError('Invalid library type: {}'.format(libtype))
+        if isolated and libtype == 'net':
+            raise TypeError('Cannot load an isolated instance of a .NET library')
 
-        #  assume a default extension if no extension was provided
-        if not os.path.splitext(path)[1]:
-            if IS_WINDOWS:
-                path += '.dll'
-            elif IS_LINUX:
-                path += '.so'
-            elif IS_MAC:
-                path += '.dylib'
-
-        self._path = os.path.abspath(path)
-        if not os.path.isfile(self._path):
-            raise IOError('Cannot find the shared library ' + self._path + '\n')
-
-        if libtype == 'cdll':
-            self._lib = ctypes.CDLL(self._path)
-        elif libtype == 'windll':
-            self._lib = ctypes.WinDLL(self._path)
-        elif libtype == 'oledll':
-            self._lib = ctypes.OleDLL(self._path)
-        elif libtype == 'net' and self.is_python_net_installed():
-            import clr
-            try:
-                # pythonnet can only load libraries that are .NET 4.0+
-                self._net = clr.System.Reflection.Assembly.LoadFile(self._path)
-            except clr.System.IO.FileLoadException as err:
-                # Example error message that can be displayed if the library is for .NET <4.0 is:
-                #
-                # " Mixed mode assembly is built against version 'v2.0.50727' of the
-                #  runtime and cannot be loaded in the 4.0 runtime without additional
-                #  configuration information. "
-                #
-                # To solve this problem, a <python-executable>.config file must exist and it must
-                # contain a useLegacyV2RuntimeActivationPolicy property that is set to be True
-                if "Mixed mode assembly" in str(err):
-                    status, msg = self.check_dot_net_config(sys.executable)
-                    if not status == 0:
-                        raise IOError(msg)
-                    else:
-                        update_msg = 'Checking .NET config returned "{}"'.format(msg)
-                        update_msg += ' and still cannot load library.\n'
-                        update_msg += str(err)
-                        raise IOError(update_msg)
-                raise IOError('The above "System.IO.FileLoadException" is not handled.\n')
-
-            # the shared library must available be in sys.path
-            head, tail = os.path.split(self._path)
-            sys.path.insert(0, head)
-
-            # don't include the library extension
-            clr.AddReference(os.path.splitext(tail)[0])
-
-            # import the .NET module from the library
-            exports = self._net.GetExportedTypes()
-            self._lib = __import__(exports[0].Namespace)
+        if not lazy:
+            self._load_library()
 
-        else:
-            raise TypeError('Invalid library type: {}'.format(libtype))
+    def _load_library(self):
+        """
+        Load the shared library (only once).
+
+        The :attr:`lib`, :attr:`net` and :attr:`net_index` properties only call this
+        method while ``_pending`` is :py:data:`True`, so ``_pending`` is cleared after
+        the library has been loaded. If loading fails then the next access tries again
+        (and raises the error again).
+        """
+        with self._lock:
+            if not self._pending:
+                return
+
+            libtype = self._libtype
+            if libtype in _LOADERS:
+                loader = getattr(ctypes, _LOADERS[libtype])
+                self._handle, self._lib = _load(loader, self._path, libtype, self._isolated, self._mode)
+            elif libtype == 'net' and self.is_python_net_installed():
+                self._load_net()
+            else:
+                raise TypeError('Invalid library type: {}'.format(libtype))
+            self._pending = False
+
+    def _load_net(self):
+        """Load a .NET library."""
+        import clr
+        try:
+            # pythonnet can only load libraries that are .NET 4.0+
+            self._net = clr.System.Reflection.Assembly.LoadFile(self._path)
+        except clr.System.IO.FileLoadException as err:
+            # Example error message that can be displayed if the library is for .NET <4.0 is:
+            #
+            # " Mixed mode assembly is built against version 'v2.0.50727' of the
+            #  runtime and cannot be loaded in the 4.0 runtime without additional
+            #  configuration information. "
+            #
+            # To solve this problem, a <python-executable>.config file must exist and it must
+            # contain a useLegacyV2RuntimeActivationPolicy property that is set to be True
+            if "Mixed mode assembly" in str(err):
+                status, msg = self.check_dot_net_config(sys.executable)
+                if not status == 0:
+                    raise IOError(msg)
+                else:
+                    update_msg = 'Checking .NET config returned "{}"'.format(msg)
+                    update_msg += ' and still cannot load library.\n'
+                    update_msg += str(err)
+                    raise IOError(update_msg)
+            raise IOError('The above "System.IO.FileLoadException" is not handled.\n')
+
+        # the shared library must available be in sys.path
+        head, tail = os.path.split(self._path)
+        sys.path.insert(0, head)
+
+        # don't include the library extension
+        clr.AddReference(os.path.splitext(tail)[0])
+
+        # import the .NET module from the library, the namespace is read from
+        # the index so that a cached index avoids reflecting over the assembly
+        self._net_index = index_assembly(self._path, self._net)
+        self._lib = __import__(self._net_index.namespace)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *ignore):
+        if self._libtype != 'net':
+            self.unload()
 
     def __repr__(self):
+        libtype = self._libtype if self._lib is None else str(self._lib.__class__)[8:-2]
         return '{} object at {}; libtype={}; path={}'.format(self.__class__.__name__,
                                                              hex(id(self)),
-                                                             str(self.lib.__class__)[8:-2],
+                                                             libtype,
                                                              self._path)
 
     @property
@@ -128,6 +202,8 @@ class LoadLibrary(object):
             * if ``libtype`` = **'oledll'** then a :class:`ctypes.OleDLL` object is returned
             * if ``libtype`` = **'net'** then the imported .NET module is returned
         """
+        if self._pending:
+            self._load_library()
         return self._lib
 
     @property
@@ -139,8 +215,418 @@ class LoadLibrary(object):
             object -- *only if the shared library is a .NET library, otherwise returns*
             :py:data:`None`.
         """
+        if self._pending:
+            self._load_library()
         return self._net
 
+    @property
+    def net_index(self):
+        """
+        Returns:
+            :class:`~msl.loadlib.reflection.ReflectionIndex`: The types and members of
+            the .NET assembly -- *only if the shared library is a .NET library, otherwise
+            returns* :py:data:`None`. The index is built when the assembly is first loaded
+            and then read from a file, see :mod:`msl.loadlib.reflection`.
+        """
+        if self._pending:
+            self._load_library()
+        return self._net_index
+
+    @property
+    def is_loaded(self):
+        """
+        Returns:
+            :py:class:`bool`: Whether the shared library is loaded, i.e., the library
+            is not waiting to be loaded (see the ``lazy`` argument) and :meth:`unload`
+            has not been called.
+        """
+        return self._lib is not None
+
+    def unload(self):
+        """
+        Release this object's reference to the shared library.
+
+        A shared library is loaded only once per process (unless it is ``isolated``).
+        Every :class:`LoadLibrary` object of the same file, ``libtype`` and ``mode``
+        shares the handle of the library and the library is unloaded (i.e., ``dlclose``
+        or ``FreeLibrary`` is called) when :meth:`unload` has been called for all of
+        these objects. The functions of the shared library must not be called after
+        the library has been unloaded. Calling :meth:`unload` more than once has no effect.
+
+        A :class:`LoadLibrary` object can also be used as a context manager to unload
+        the library, for example::
+
+            with LoadLibrary('library.so') as lib:
+                lib.lib.initialize()
+
+        Raises:
+            TypeError: If the shared library is a .NET library (an assembly cannot be unloaded).
+        """
+        if self._libtype == 'net':
+            raise TypeError('Cannot unload a .NET library')
+        with self._lock:
+            self._pending = False  # a lazy library is not loaded after it was unloaded
+            if self._handle is None:
+                return
+            handle, self._handle = self._handle, None
+            self._lib = None
+            self._functions.clear()
+        _release(handle)
+
+    @staticmethod
+    def loaded_libraries():
+        """
+        Get the statistics of the shared libraries that are loaded by :class:`LoadLibrary`.
+
+        Returns:
+            :class:`list` of :class:`dict`: For each shared library the ``'path'`` of
+            the file that was loaded, the ``'libtype'``, the ``dlopen`` ``'mode'``
+            (:py:data:`None` is the default mode), whether the library is
+            ``'isolated'``, the number of :class:`LoadLibrary` objects that refer to the
+            library (``'references'``) and the number of times that the loaded library
+            was reused instead of loading the file again (``'reused'``).
+        """
+        with _REGISTRY_LOCK:
+            return [{'path': handle.path, 'libtype': handle.libtype, 'mode': handle.mode, 'isolated': handle.isolated,
+                     'references': handle.references, 'reused': handle.reused}
+                    for handle in sorted(_REGISTRY.values(), key=lambda h: (h.path, h.libtype))]
+
+    @property
+    def isolated(self):
+        """
+        Returns:
+            :py:class:`bool`: Whether a private copy of the shared library was loaded.
+        """
+        return self._isolated
+
+    @classmethod
+    def isolated_instances(cls, path, n, libtype='cdll'):
+        """
+        Load isolated instances of a shared library.
+
+        Each instance has its own global variables, so a shared library that is not
+        reentrant can be called from ``n`` threads at the same time if each thread
+        uses its own instance. For example::
+
+            instances = LoadLibrary.isolated_instances('vendor.so', 4)
+            for lib in instances:
+                lib.declare('acquire', ctypes.c_int, [ctypes.c_int])
+
+            pool = ThreadPool(len(instances))
+            results = pool.map(lambda lib: lib.functions['acquire'](1000), instances)
+
+        Args:
+            path (str): The path to the shared library.
+            n (int): The number of instances to load.
+            libtype (str, optional): The library type, see :class:`LoadLibrary`.
+
+        Returns:
+            :class:`list` of :class:`LoadLibrary`: The isolated instances.
+        """
+        return [cls(path, libtype, isolated=True) for _ in range(n)]
+
+    @property
+    def functions(self):
+        """
+        Returns:
+            :py:class:`dict`: The functions that have been declared by :meth:`.declare`,
+            where the keys are the names of the functions.
+        """
+        return self._functions
+
+    def declare(self, name, restype=None, argtypes=None, roles=None, errcheck=None):
+        """
+        Declare the signature of a function in the shared library.
+
+        The function prototype is created, and the function is looked up in the shared
+        library, only once. The returned object converts the arguments using the
+        ``argtypes`` every time it is called and therefore it is not necessary to
+        set the :py:attr:`~ctypes._FuncPtr.restype` of the function before each call.
+
+        For example, the C function ``void scalar_multiply(double a, double* xin, int n, double* xout)``
+        can be declared as::
+
+            f = lib.declare('scalar_multiply', None, [ctypes.c_double, ctypes.POINTER(ctypes.c_double),
+                                                      ctypes.c_int, ctypes.POINTER(ctypes.c_double)])
+
+        A parameter that has the ``'out'`` role is not passed to the returned object.
+        The memory for the parameter is allocated automatically (the type of the
+        parameter must be a :py:func:`ctypes.POINTER` type) and its value is returned.
+        For example, the C function ``int get_value(int channel, double* value)``
+        can be declared as::
+
+            get_value = lib.declare('get_value', ctypes.c_int,
+                                    [('channel', ctypes.c_int), ('value', ctypes.POINTER(ctypes.c_double))],
+                                    roles=['in', 'out'])
+
+        and then ``value = get_value(1)``.
+
+        Args:
+            name (str): The name of the function in the shared library.
+
+            restype (optional): The :py:mod:`ctypes` type of the returned value.
+                Default is :py:data:`None` (i.e., ``void``).
+
+            argtypes (list, optional): The :py:mod:`ctypes` type of each parameter.
+                Each item can also be a (name, type) :py:class:`tuple` so that the
+                parameter can also be passed as a keyword argument.
+
+            roles (list[str], optional): The role of each parameter. Must be either
+                ``'in'``, ``'out'`` or ``'inout'``. Default is that each parameter is
+                an ``'in'`` parameter.
+
+            errcheck (callable, optional): See :py:attr:`~ctypes._FuncPtr.errcheck`.
+
+        Returns:
+            The :py:mod:`ctypes` function object.
+
+        Raises:
+            AttributeError: If the function does not exist in the shared library.
+            TypeError: If the shared library is a .NET library or if a type is not
+                a valid :py:mod:`ctypes` type.
+            ValueError: If a role is invalid or the number of roles is not equal to
+                the number of parameters.
+        """
+        if self._libtype == 'net':
+            raise TypeError('Cannot declare the function prototype of a .NET library')
+
+        names, types = [], []
+        for index, arg in enumerate(argtypes or []):
+            if isinstance(arg, tuple):
+                names.append(arg[0])
+                types.append(arg[1])
+            else:
+                names.append('arg{}'.format(index))
+                types.append(arg)
+
+        if roles is None:
+            roles = ['in'] * len(types)
+        elif len(roles) != len(types):
+            raise ValueError('The function {} has {} parameters but {} roles were specified'
+                             .format(name, len(types), len(roles)))
+
+        paramflags = []
+        for role, param in zip(roles, names):
+            try:
+                paramflags.append((_PARAMETER_ROLES[role], param))
+            except KeyError:
+                raise ValueError('Invalid role {!r} for parameter {!r} of {}. Must be one of {}'
+                                 .format(role, param, name, sorted(_PARAMETER_ROLES)))
+
+        if self._libtype == 'cdll':
+            factory = ctypes.CFUNCTYPE
+        else:
+            factory = ctypes.WINFUNCTYPE
+            if self._libtype == 'oledll' and restype is None:
+                restype = ctypes.HRESULT
+
+        function = factory(restype, *types)((name, self.lib), tuple(paramflags))
+        if errcheck is not None:
+            function.errcheck = errcheck
+        self._functions[name] = function
+        return function
+
+    def declare_fortran(self, name, restype=None, argtypes=None, string_lengths='end',
+                        string_length_type=ctypes.c_size_t):
+        """
+        Declare the signature of a FORTRAN function (or subroutine) in the shared library.
+
+        FORTRAN passes every argument by reference, stores multi-dimensional arrays in
+        column-major order and (usually) passes the length of each ``CHARACTER`` argument
+        as a hidden argument. The returned object takes care of these conventions so that
+        the arguments can be passed as Python objects. Each item in ``argtypes`` can be:
+
+        * a :py:mod:`ctypes` scalar type, e.g., :class:`ctypes.c_int32` for ``integer(4)``.
+          The value is passed by reference. If the value is an instance of the
+          :py:mod:`ctypes` type then FORTRAN can also modify the value.
+        * :class:`ctypes.c_char_p` for a ``CHARACTER`` argument. The value can be a
+          :class:`str`, :class:`bytes`, :class:`bytearray` or a :py:mod:`ctypes` array
+          of :class:`ctypes.c_char` (e.g., from :func:`ctypes.create_string_buffer`)
+          and the length of the value is passed as a hidden argument.
+        * a :py:func:`ctypes.POINTER` type for an array. The value can be any object
+          that :func:`~msl.loadlib.buffers.as_ctypes` accepts. A :class:`numpy.ndarray`
+          that was created with ``order='F'``, an :class:`array.array` or any other
+          one-dimensional buffer is passed without copying the data (so FORTRAN can
+          also write to it) and a nested :class:`list` is flattened in column-major order.
+
+        For example, the subroutine ``matrix_multiply(a, a1, r1, c1, a2, r2, c2)``, where
+        ``a``, ``a1`` and ``a2`` are ``double precision`` arrays and ``r1``, ``c1``,
+        ``r2`` and ``c2`` are ``integer(4)`` values, can be declared as::
+
+            matrix = ctypes.POINTER(ctypes.c_double)
+            f = lib.declare_fortran('matrix_multiply', None, [matrix, matrix, ctypes.c_int32, ctypes.c_int32,
+                                                              matrix, ctypes.c_int32, ctypes.c_int32])
+
+        Args:
+            name (str): The name of the function in the shared library.
+
+            restype (optional): The :py:mod:`ctypes` type of the returned value.
+                Default is :py:data:`None` (i.e., a ``subroutine``).
+
+            argtypes (list, optional): The type of each argument (see above).
+
+            string_lengths (str, optional): Where the compiler passes the hidden length
+                of each ``CHARACTER`` argument. Either ``'end'`` (after all other
+                arguments, the default for gfortran and Intel Fortran), ``'after'``
+                (immediately after each ``CHARACTER`` argument) or :py:data:`None`
+                if the lengths are not passed (e.g., ``!DEC$ ATTRIBUTES REFERENCE``).
+
+            string_length_type (optional): The :py:mod:`ctypes` type of a hidden length.
+
+        Returns:
+            A callable object that calls the FORTRAN function.
+
+        Raises:
+            AttributeError: If the function does not exist in the shared library.
+            TypeError: If the shared library is a .NET library.
+            ValueError: If the value of ``string_lengths`` is invalid.
+        """
+        if string_lengths not in ('end', 'after', None):
+            raise ValueError("Invalid string_lengths {!r}. Must be 'end', 'after' or None"
+                             .format(string_lengths))
+
+        kinds, types = [], []
+        for arg in argtypes or []:
+            if arg is ctypes.c_char_p:
+                kinds.append((_FORTRAN_STRING, None))
+                types.append(ctypes.c_char_p)
+                if string_lengths == 'after':
+                    types.append(string_length_type)
+            elif hasattr(arg, '_type_') and issubclass(arg, ctypes._Pointer):
+                kinds.append((_FORTRAN_ARRAY, arg._type_))
+                types.append(arg)
+            else:
+                kinds.append((_FORTRAN_SCALAR, arg))
+                types.append(ctypes.POINTER(arg))
+
+        if string_lengths == 'end':
+            types.extend([string_length_type] * sum(kind == _FORTRAN_STRING for kind, _ in kinds))
+
+        function = _FortranFunction(name, self.declare(name, restype, types), kinds,
+                                    string_lengths, string_length_type)
+        self._functions[name] = function
+        return function
+
+    def vectorize(self, function, args, typecode=None):
+        """
+        Call a scalar function for each element of the input arrays.
+
+        The arguments are broadcast against each other (an argument that is a scalar,
+        or an array of length 1, is used for every call) and the loop over the elements
+        is performed by :py:func:`map` so the overhead per element is only the cost of
+        calling ``function``.
+
+        For example, to evaluate the declared function ``double besselJ0(double x)`` at
+        many values of ``x``::
+
+            lib.declare('besselJ0', ctypes.c_double, [ctypes.c_double])
+            values = lib.vectorize('besselJ0', [x_values], typecode='d')
+
+        Args:
+            function: The name of a function that was declared by :meth:`declare` (or
+                :meth:`declare_fortran`) or any callable object.
+            args (list): The arguments to pass to ``function``. Each argument is either
+                a scalar or a sequence (e.g., a :class:`list` or an :class:`array.array`).
+            typecode (str, optional): The :class:`array.array` type code of the returned
+                values. Default is to return a :class:`list`.
+
+        Returns:
+            A :class:`list` or an :class:`array.array` of the returned values.
+
+        Raises:
+            ValueError: If ``function`` has not been declared or if the lengths of the
+                arrays cannot be broadcast.
+        """
+        function = self._declared(function)
+
+        sizes = set(len(arg) for arg in args if _is_sequence(arg))
+        sizes.discard(1)
+        if len(sizes) > 1:
+            raise ValueError('Cannot broadcast arrays of lengths {}'.format(sorted(sizes)))
+        size = sizes.pop() if sizes else 1
+
+        iterables = []
+        for arg in args:
+            if _is_sequence(arg) and len(arg) == size:
+                iterables.append(arg)
+            else:
+                iterables.append(itertools.repeat(arg[0] if _is_sequence(arg) else arg, size))
+
+        results = list(map(function, *iterables))
+        if typecode is None:
+            return results
+        return array.array(typecode, results)
+
+    def parallel_map(self, function, iterable_of_args, workers=None, chunksize=None):
+        """
+        Call a function of the shared library for each item of arguments in a pool of threads.
+
+        :py:mod:`ctypes` releases the GIL while a function in a shared library is
+        executing so a reentrant (thread-safe) function can run on several cores at the
+        same time. The items are split into chunks, each chunk is processed by a thread
+        in the pool and the :py:mod:`ctypes` objects of the arguments are created by the
+        thread that calls the function (so that the threads do not share argument objects).
+
+        For example::
+
+            lib.declare('integrate', ctypes.c_double, [ctypes.c_double, ctypes.c_double, ctypes.c_int])
+            results = lib.parallel_map('integrate', [(0, 1, 10**6), (1, 2, 10**6), (2, 3, 10**6)], workers=3)
+
+        .. attention::
+            Only use this method for a function that is reentrant. The function must not
+            modify global state in the shared library without synchronization.
+
+        Args:
+            function: The name of a function that was declared by :meth:`declare` (or
+                :meth:`declare_fortran`) or any callable object.
+            iterable_of_args: An iterable of the arguments to pass to ``function``. Each
+                item is a :class:`tuple` of arguments (or a scalar value if ``function``
+                has one parameter).
+            workers (int, optional): The number of threads. Default is the number of CPUs.
+            chunksize (int, optional): The number of items that a thread processes at a
+                time. Default is to split the items into 4 chunks per thread.
+
+        Returns:
+            :class:`list`: The returned value of each call, in the order of ``iterable_of_args``.
+
+        Raises:
+            ValueError: If ``function`` has not been declared.
+        """
+        function = self._declared(function)
+        items = [args if isinstance(args, tuple) else (args,) for args in iterable_of_args]
+        if not items:
+            return []
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        workers = max(1, min(workers, len(items)))
+        if chunksize is None:
+            chunksize = max(1, -(-len(items) // (workers * 4)))
+
+        def run(chunk):
+            return [function(*args) for args in chunk]
+
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        if workers == 1:
+            return [result for chunk in chunks for result in run(chunk)]
+
+        pool = ThreadPool(workers)
+        try:
+            results = pool.map(run, chunks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        return [result for chunk in results for result in chunk]
+
+    def _declared(self, function):
+        """Get a declared function by its name (a callable object is returned unchanged)."""
+        if callable(function):
+            return function
+        try:
+            return self._functions[function]
+        except KeyError:
+            raise ValueError('The function {!r} has not been declared'.format(function))
+
     @staticmethod
     def is_python_net_installed():
         """
@@ -257,6 +743,151 @@ class LoadLibrary(object):
             return 1, msg
 
 
+_PARAMETER_ROLES = {'in': 1, 'out': 2, 'inout': 3}
+
+if IS_WINDOWS:
+    _DEFAULT_EXTENSION = '.dll'
+elif IS_MAC:
+    _DEFAULT_EXTENSION = '.dylib'
+else:
+    _DEFAULT_EXTENSION = '.so'
+
+# the name of the ctypes class that loads each libtype
+_LOADERS = {'cdll': 'CDLL', 'windll': 'WinDLL', 'oledll': 'OleDLL'}
+
+# the handles of the loaded shared libraries, see _load() and _release()
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+_FORTRAN_SCALAR, _FORTRAN_STRING, _FORTRAN_ARRAY = range(3)
+
+
+class _Handle(object):
+    """The handle of a shared library that is shared by :class:`LoadLibrary` objects."""
+
+    def __init__(self, path, libtype, mode, isolated, handle):
+        self.path = path
+        self.libtype = libtype
+        self.mode = mode
+        self.isolated = isolated
+        self.handle = handle
+        self.references = 1
+        self.reused = 0
+
+
+def _load(loader, path, libtype, isolated, mode):
+    """
+    Load a shared library with a :py:mod:`ctypes` ``loader`` (or load a private copy
+    of it), reusing the handle of the library if it is already loaded.
+
+    Returns a (:class:`_Handle`, :py:mod:`ctypes` library) :class:`tuple`.
+    """
+    kwargs = {} if mode is None else {'mode': mode}
+    key = (path, libtype, mode)
+    with _REGISTRY_LOCK:
+        if not isolated:
+            handle = _REGISTRY.get(key)
+            if handle is not None:
+                handle.references += 1
+                handle.reused += 1
+                # a new object (so attributes, e.g., restype, are not shared) for the same handle
+                return handle, loader(path, handle=handle.handle)
+            lib = loader(path, **kwargs)
+        else:
+            # copy the library to a temporary file that has a unique name
+            root, ext = os.path.splitext(os.path.basename(path))
+            fd, copy = tempfile.mkstemp(prefix=root + '-', suffix=ext)
+            os.close(fd)
+            try:
+                shutil.copy2(path, copy)
+                lib = loader(copy, **kwargs)
+            finally:
+                if IS_WINDOWS:
+                    # a loaded DLL cannot be deleted, try again when Python exits
+                    atexit.register(_remove_file, copy)
+                else:
+                    # the loaded library remains mapped in memory after the file is removed
+                    _remove_file(copy)
+            path = copy
+            key = (path, libtype, mode)
+
+        handle = _Handle(path, libtype, mode, isolated, lib._handle)
+        _REGISTRY[key] = handle
+        return handle, lib
+
+
+def _release(handle):
+    """Release a reference to a shared library and unload the library if it is no longer used."""
+    with _REGISTRY_LOCK:
+        handle.references -= 1
+        if handle.references > 0:
+            return
+        del _REGISTRY[(handle.path, handle.libtype, handle.mode)]
+        if IS_WINDOWS:
+            _ctypes.FreeLibrary(handle.handle)
+        else:
+            _ctypes.dlclose(handle.handle)
+
+    if handle.isolated and IS_WINDOWS:
+        # the private copy can be deleted now that the DLL is not loaded
+        _remove_file(handle.path)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _is_sequence(obj):
+    """Whether ``obj`` is an array of values (a string is a scalar value)."""
+    if isinstance(obj, (str, bytes, bytearray, type(u''))):
+        return False
+    return hasattr(obj, '__len__') and hasattr(obj, '__getitem__')
+
+
+class _FortranFunction(object):
+    """Calls a FORTRAN function that was declared by :meth:`LoadLibrary.declare_fortran`."""
+
+    def __init__(self, name, function, kinds, string_lengths, string_length_type):
+        self.__name__ = name
+        self._function = function
+        self._kinds = kinds
+        self._string_lengths = string_lengths
+        self._string_length_type = string_length_type
+
+    def __repr__(self):
+        return '<FortranFunction {}>'.format(self.__name__)
+
+    def __call__(self, *args):
+        if len(args) != len(self._kinds):
+            raise TypeError('{}() takes {} arguments ({} given)'
+                            .format(self.__name__, len(self._kinds), len(args)))
+
+        values, lengths = [], []
+        for (kind, ctype), value in zip(self._kinds, args):
+            if kind == _FORTRAN_SCALAR:
+                values.append(ctypes.byref(value if isinstance(value, ctype) else ctype(value)))
+            elif kind == _FORTRAN_ARRAY:
+                values.append(as_ctypes(value, ctype, order='F'))
+            else:
+                if isinstance(value, bytearray):
+                    value = (ctypes.c_char * len(value)).from_buffer(value)
+                elif not isinstance(value, (bytes, ctypes.Array)):
+                    value = value.encode()
+                length = self._string_length_type(len(value))
+                values.append(value)
+                if self._string_lengths == 'after':
+                    values.append(length)
+                else:
+                    lengths.append(length)
+
+        if self._string_lengths == 'end':
+            values.extend(lengths)
+        return self._function(*values)
+
+
 NET_FRAMEWORK_DESCRIPTION = """
 <!--
   Created by the MSL-LoadLib package.
@@ -0,0 +1,221 @@
+"""
+An index of the types and members of a .NET assembly.
+
+Reflecting over a large assembly (i.e., calling ``GetExportedTypes()`` and then ``GetMethods()``,
+``GetProperties()``, ... for each type) can take seconds. The index is built once, when the
+assembly is first loaded, and saved to a file in :data:`CACHE_DIRECTORY`. The name of the
+index file is the SHA-256 hash of the assembly, so the index is rebuilt if the assembly changes.
+"""
+import os
+import json
+import hashlib
+
+CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.msl', 'loadlib', 'net-index')
+""":class:`str`: The directory where the index of an assembly is saved."""
+
+_FORMAT = 2  # increment if the structure of the index changes
+
+
+class ReflectionIndex(object):
+    """
+    The types and members of a .NET assembly.
+
+    Use :func:`index_assembly` to create an index.
+
+    Args:
+        data (dict): The index, see :func:`build_index`.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def __repr__(self):
+        return '<ReflectionIndex {} ({} types)>'.format(self.namespace, len(self._data['types']))
+
+    @property
+    def data(self):
+        """
+        Returns:
+            :class:`dict`: The index.
+        """
+        return self._data
+
+    @property
+    def namespace(self):
+        """
+        Returns:
+            :class:`str`: The namespace of the first exported type of the assembly.
+        """
+        return self._data['namespace']
+
+    @property
+    def sha256(self):
+        """
+        Returns:
+            :class:`str`: The SHA-256 hash of the assembly file.
+        """
+        return self._data['sha256']
+
+    def type_names(self):
+        """
+        Returns:
+            :class:`list` of :class:`str`: The full names of the exported types, in the
+            order that the assembly exports them.
+        """
+        return [t['full_name'] for t in self._data['types']]
+
+    def get_type(self, name):
+        """
+        Get the members of a type.
+
+        Args:
+            name (str): The full name, e.g., ``'SpelNetLib.Spel'``, or the
+                name, e.g., ``'Spel'``, of the type.
+
+        Returns:
+            :class:`dict`: The ``'name'``, ``'full_name'``, ``'namespace'``,
+            ``'methods'``, ``'properties'``, ``'fields'`` and ``'events'`` of the type.
+
+        Raises:
+            KeyError: If the assembly does not export the type.
+        """
+        for t in self._data['types']:
+            if t['full_name'] == name:
+                return t
+        for t in self._data['types']:
+            if t['name'] == name:
+                return t
+        raise KeyError('The assembly does not export the type {!r}'.format(name))
+
+    def member_names(self, name):
+        """
+        Get the names of the public members of a type.
+
+        Args:
+            name (str): The full name, or the name, of the type.
+
+        Returns:
+            :class:`list` of :class:`str`: The sorted names of the methods, properties,
+            fields and events of the type. The methods that implement a property or an
+            event (e.g., ``get_Count``) are not included.
+
+        Raises:
+            KeyError: If the assembly does not export the type.
+        """
+        t = self.get_type(name)
+        names = set(m['name'] for m in t['methods'] if not m['special'])
+        names.update(p['name'] for p in t['properties'])
+        names.update(f['name'] for f in t['fields'])
+        names.update(t['events'])
+        return sorted(names)
+
+
+def index_assembly(path, assembly=None, use_cache=True):
+    """
+    Get the index of a .NET assembly.
+
+    Args:
+        path (str): The path to the assembly file.
+        assembly: The loaded assembly (a ``System.Reflection.Assembly`` object). Only
+            required if the index must be built.
+        use_cache (bool, optional): Whether to load (and save) the index from (to) a file.
+
+    Returns:
+        :class:`ReflectionIndex`: The index, or :py:data:`None` if the index is not cached
+        and ``assembly`` is :py:data:`None`.
+    """
+    sha256 = _file_hash(path)
+    index_path = os.path.join(CACHE_DIRECTORY, sha256 + '.json')
+    if use_cache:
+        data = _read(index_path)
+        if data is not None and data.get('sha256') == sha256 and data.get('format') == _FORMAT:
+            return ReflectionIndex(data)
+
+    if assembly is None:
+        return None
+
+    data = build_index(assembly)
+    data['sha256'] = sha256
+    if use_cache:
+        _write(index_path, data)
+    return ReflectionIndex(data)
+
+
+def build_index(assembly):
+    """
+    Reflect over a .NET assembly.
+
+    Args:
+        assembly: The loaded assembly (a ``System.Reflection.Assembly`` object).
+
+    Returns:
+        :class:`dict`: The ``'namespace'`` and the ``'types'`` of the assembly. A type
+        whose members cannot be reflected (e.g., because a dependency of the assembly
+        is not available) has an ``'error'`` item.
+    """
+    types = []
+    for t in assembly.GetExportedTypes():
+        item = {
+            'name': str(t.Name),
+            'full_name': str(t.FullName),
+            'namespace': str(t.Namespace) if t.Namespace else None,
+            'methods': [],
+            'properties': [],
+            'fields': [],
+            'events': [],
+        }
+        try:
+            for m in t.GetMethods():
+                item['methods'].append({
+                    'name': str(m.Name),
+                    'returns': str(m.ReturnType),
+                    'parameters': [[str(p.Name), str(p.ParameterType)] for p in m.GetParameters()],
+                    'static': bool(m.IsStatic),
+                    'special': bool(m.IsSpecialName),  # e.g., the get_ and set_ methods of a property
+                })
+            item['properties'] = [{'name': str(p.Name), 'type': str(p.PropertyType)} for p in t.GetProperties()]
+            item['fields'] = [{'name': str(f.Name), 'type': str(f.FieldType)} for f in t.GetFields()]
+            item['events'] = [str(e.Name) for e in t.GetEvents()]
+        except Exception as err:
+            item['error'] = str(err)
+        types.append(item)
+
+    return {
+        'format': _FORMAT,
+        'namespace': types[0]['namespace'] if types else None,
+        'types': types,
+    }
+
+
+def _file_hash(path):
+    """The SHA-256 hash of a file."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _read(path):
+    """Read an index file."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    """Write an index file (the index is an optimization, so an error is ignored)."""
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp, 'w') as f:
+            json.dump(data, f)
+        if os.path.isfile(path):
+            os.remove(path)
+        os.rename(temp, path)
+    except (IOError, OSError):
+        pass
@@ -0,0 +1,203 @@
+"""
+Find the file of a shared library from its name.
+
+A shared library can be specified by its path (with or without the file extension) or by
+a bare name, e.g., ``'foo'``, which is resolved to ``foo.dll`` on Windows, to ``libfoo.so``
+(or a versioned file, e.g., ``libfoo.so.1``) on Linux and to ``libfoo.dylib`` on Mac OS X.
+
+The directories are searched in the following order:
+
+1. the current working directory,
+2. the ``directories`` that are passed to :func:`find_library`,
+3. the directories in :data:`SEARCH_DIRECTORIES`,
+4. the directories in the ``PATH`` (Windows), ``LD_LIBRARY_PATH`` (Linux) or
+   ``DYLD_LIBRARY_PATH`` (Mac OS X) environment variable.
+
+Finding a versioned file requires listing the contents of the directories, so the result
+of a search is saved in a cache file, :data:`CACHE_FILE`. A cached result is used until the
+modification time of one of the directories that were searched changes (i.e., a file was
+added to or removed from the directory).
+"""
+import os
+import re
+import json
+import threading
+
+from msl.loadlib import IS_WINDOWS, IS_MAC, IS_PYTHON_64BIT
+
+SEARCH_DIRECTORIES = []
+""":class:`list` of :class:`str`: Additional directories to search for a shared library."""
+
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.msl', 'loadlib', 'resolver-cache.json')
+""":class:`str`: The path to the file that caches the results of :func:`find_library`."""
+
+if IS_WINDOWS:
+    _EXTENSIONS = ('.dll',)
+    _ENVIRONMENT_VARIABLE = 'PATH'
+elif IS_MAC:
+    _EXTENSIONS = ('.dylib', '.so')
+    _ENVIRONMENT_VARIABLE = 'DYLD_LIBRARY_PATH'
+else:
+    _EXTENSIONS = ('.so',)
+    _ENVIRONMENT_VARIABLE = 'LD_LIBRARY_PATH'
+
+_VERSION = re.compile(r'\d+(?:\.\d+)*')
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def find_library(name, directories=None, use_cache=True):
+    """
+    Find the file of a shared library.
+
+    Args:
+        name (str): The name of the shared library, e.g., ``'foo'``, ``'libfoo.so'``
+            or ``'C:/libraries/foo'``. If ``name`` contains a directory then only
+            that directory is searched.
+        directories (list[str], optional): Additional directories to search
+            (after the current working directory).
+        use_cache (bool, optional): Whether to use (and update) the cache of the results.
+
+    Returns:
+        :class:`str`: The absolute path to the shared library file, or :py:data:`None`
+        if the shared library cannot be found.
+    """
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+
+    head, tail = os.path.split(name)
+    if head:
+        search = [os.path.abspath(head)]
+    else:
+        search = [os.getcwd()]
+        search.extend(os.path.abspath(d) for d in directories or [])
+        search.extend(os.path.abspath(d) for d in SEARCH_DIRECTORIES)
+        search.extend(d for d in os.environ.get(_ENVIRONMENT_VARIABLE, '').split(os.pathsep) if d)
+
+    # remove duplicate and non-existent directories (keeping the order)
+    unique = []
+    for directory in search:
+        if directory not in unique and os.path.isdir(directory):
+            unique.append(directory)
+
+    key = json.dumps([tail, unique, IS_PYTHON_64BIT])
+    if use_cache:
+        path = _cached(key)
+        if path is not None:
+            return path
+
+    names = _candidate_names(tail)
+    mtimes = {}
+    for directory in unique:
+        mtimes[directory] = os.path.getmtime(directory)
+        path = _find_in_directory(directory, tail, names)
+        if path is not None:
+            if use_cache:
+                _update_cache(key, path, mtimes)
+            return path
+    return None
+
+
+def clear_cache():
+    """Delete the cached results of :func:`find_library`."""
+    global _cache
+    with _cache_lock:
+        _cache = {}
+        try:
+            os.remove(CACHE_FILE)
+        except OSError:
+            pass
+
+
+def _candidate_names(name):
+    """The file names of a shared library, in the order of preference."""
+    if os.path.splitext(name)[1]:
+        names = [name]
+    else:
+        names = [name + ext for ext in _EXTENSIONS]
+    if not IS_WINDOWS and not name.startswith('lib'):
+        names.extend('lib' + n for n in list(names))
+    return names
+
+
+def _find_in_directory(directory, name, names):
+    """Find a shared library (which can have a version number in its file name) in a directory."""
+    for n in names:
+        path = os.path.join(directory, n)
+        if os.path.isfile(path):
+            return path
+
+    if IS_WINDOWS:
+        return None
+
+    # a versioned file, e.g., libfoo.so.1.2 or libfoo.1.dylib
+    try:
+        files = os.listdir(directory)
+    except OSError:
+        return None
+
+    versions = []
+    for n in names:
+        root, ext = os.path.splitext(n)
+        for f in files:
+            if f.startswith(n + '.'):
+                version = f[len(n) + 1:]
+            elif IS_MAC and f.startswith(root + '.') and f.endswith(ext):
+                version = f[len(root) + 1:-len(ext)]
+            else:
+                continue
+            if _VERSION.match(version) and _VERSION.match(version).group() == version:
+                versions.append((tuple(int(v) for v in version.split('.')), f))
+
+    for _, f in sorted(versions, reverse=True):
+        path = os.path.join(directory, f)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _load_cache():
+    """Load the cache file (only once)."""
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_FILE, 'r') as f:
+                _cache = json.load(f)
+        except (IOError, OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _cached(key):
+    """Get a cached result if none of the directories that were searched have changed."""
+    with _cache_lock:
+        entry = _load_cache().get(key)
+    if entry is None or not os.path.isfile(entry['path']):
+        return None
+    for directory, mtime in entry['mtimes'].items():
+        try:
+            if os.path.getmtime(directory) != mtime:
+                return None
+        except OSError:
+            return None
+    return entry['path']
+
+
+def _update_cache(key, path, mtimes):
+    """Save a result in the cache file."""
+    with _cache_lock:
+        cache = _load_cache()
+        cache[key] = {'path': path, 'mtimes': mtimes}
+        try:
+            directory = os.path.dirname(CACHE_FILE)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            temp = '{}.{}.tmp'.format(CACHE_FILE, os.getpid())
+            with open(temp, 'w') as f:
+                json.dump(cache, f)
+            if os.path.isfile(CACHE_FILE) and IS_WINDOWS:
+                os.remove(CACHE_FILE)
+            os.rename(temp, CACHE_FILE)
+        except (IOError, OSError):
+            pass  # the cache is an optimization, a read-only home directory is not an error
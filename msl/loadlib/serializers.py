@@ -0,0 +1,356 @@
+"""
+Serialize the arguments and the returned value of a request to the 32-bit server.
+
+The :class:`~.client64.Client64` selects a serializer (see the ``serializer`` argument)
+and the name of the serializer is included in each request so that the
+:class:`~.server32.Server32` decodes the arguments, and encodes the returned value,
+with the same serializer. The following serializers are available:
+
+* :class:`PickleSerializer` (``'pickle'``, the default) can serialize almost any
+  Python object, but unpickling data can execute arbitrary code.
+* :class:`TypedSerializer` (``'typed'``) is a compact binary format for :py:data:`None`,
+  :class:`bool`, :class:`int`, :class:`float`, :class:`complex`, :class:`str`,
+  :class:`bytes`, :class:`bytearray`, :class:`list`, :class:`tuple`, :class:`dict`
+  and :class:`array.array`. Decoding the data cannot create any other type of object.
+* :class:`JSONSerializer` (``'json'``) for interoperability (a :class:`tuple` is
+  decoded as a :class:`list` and the keys of a :class:`dict` must be strings).
+
+A custom serializer is a subclass of :class:`Serializer` that is registered with
+:func:`register` by the module of the :class:`~.client64.Client64` subclass *and* by
+the module of the :class:`~.server32.Server32` subclass.
+"""
+import sys
+import json
+import array
+import struct
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from msl.loadlib import IS_PYTHON2
+
+_SERIALIZERS = {}
+
+
+class Serializer(object):
+    """
+    The base class of a serializer.
+
+    Args:
+        option (str, optional): An option of the serializer (e.g., the protocol of
+            :class:`PickleSerializer`) that is sent to the 32-bit server with the name.
+    """
+
+    name = None
+    """:class:`str`: The name of the serializer. Must not contain a ``':'`` or a ``'.'``."""
+
+    def __init__(self, option=None):
+        self.option = option
+
+    def __repr__(self):
+        return '<{} {!r}>'.format(self.__class__.__name__, self.capability)
+
+    @property
+    def capability(self):
+        """
+        Returns:
+            :class:`str`: The name (and the option) of the serializer that is included
+            in a request, see :func:`get`.
+        """
+        if self.option is None:
+            return self.name
+        return '{}.{}'.format(self.name, self.option)
+
+    def dumps(self, obj):
+        """
+        Encode an object.
+
+        Args:
+            obj: The object, i.e., an (args, kwargs) :class:`tuple` of a request or the
+                value that a method of the :class:`~.server32.Server32` subclass returns.
+
+        Returns:
+            :class:`bytes`: The encoded object.
+
+        Raises:
+            TypeError: If the object cannot be encoded.
+        """
+        raise NotImplementedError
+
+    def loads(self, data):
+        """
+        Decode an object.
+
+        Args:
+            data (bytes): The encoded object.
+
+        Returns:
+            The decoded object.
+        """
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    """
+    Serialize with :py:mod:`pickle`.
+
+    Args:
+        option (int or str, optional): The :py:mod:`pickle` protocol. Default is
+            :py:data:`pickle.HIGHEST_PROTOCOL`.
+    """
+
+    name = 'pickle'
+
+    def __init__(self, option=None):
+        super(PickleSerializer, self).__init__(int(pickle.HIGHEST_PROTOCOL if option is None else option))
+
+    def dumps(self, obj):
+        return pickle.dumps(obj, protocol=self.option)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class JSONSerializer(Serializer):
+    """Serialize with :py:mod:`json`."""
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data.decode('utf-8'))
+
+
+class TypedSerializer(Serializer):
+    """
+    Serialize with a compact binary format that only supports the following types:
+    :py:data:`None`, :class:`bool`, :class:`int`, :class:`float`, :class:`complex`,
+    :class:`str`, :class:`bytes`, :class:`bytearray`, :class:`list`, :class:`tuple`,
+    :class:`dict` and :class:`array.array`.
+
+    Each value is a one-character tag that is followed by the value in little-endian
+    byte order. The items of an :class:`array.array` are copied as a single block together
+    with the type code and the size of an item, since the size of some type codes (e.g.,
+    ``'l'`` and ``'u'``) depends on the platform. The receiver creates an array with a
+    type code that has the same kind and size of an item (e.g., ``'q'`` for an ``'l'``
+    array from 64-bit Linux on 32-bit Windows).
+    """
+
+    name = 'typed'
+
+    def dumps(self, obj):
+        chunks = []
+        _encode(obj, chunks.append)
+        return b''.join(chunks)
+
+    def loads(self, data):
+        obj, offset = _decode(data, 0)
+        if offset != len(data):
+            raise ValueError('The data has {} unexpected bytes'.format(len(data) - offset))
+        return obj
+
+
+def register(serializer):
+    """
+    Register a serializer so that it can be selected by its name.
+
+    Can be used as a class decorator.
+
+    Args:
+        serializer: A subclass of :class:`Serializer`.
+
+    Returns:
+        The ``serializer`` class.
+
+    Raises:
+        TypeError: If ``serializer`` is not a subclass of :class:`Serializer`.
+        ValueError: If the name of the ``serializer`` is invalid.
+    """
+    if not (isinstance(serializer, type) and issubclass(serializer, Serializer)):
+        raise TypeError('A serializer must be a subclass of Serializer, got {!r}'.format(serializer))
+    name = serializer.name
+    if not name or ':' in name or '.' in name:
+        raise ValueError('Invalid serializer name {!r}'.format(name))
+    _SERIALIZERS[name] = serializer
+    return serializer
+
+
+def get(capability):
+    """
+    Get a serializer.
+
+    Args:
+        capability (str or Serializer): The name of a registered serializer, optionally
+            followed by ``'.'`` and an option, e.g., ``'pickle.2'``. If a
+            :class:`Serializer` instance then it is returned.
+
+    Returns:
+        :class:`Serializer`: The serializer.
+
+    Raises:
+        ValueError: If there is no serializer with the name.
+    """
+    if isinstance(capability, Serializer):
+        return capability
+    name, _, option = capability.partition('.')
+    try:
+        cls = _SERIALIZERS[name]
+    except KeyError:
+        raise ValueError('No serializer is registered with the name {!r}. Must be one of {}'
+                         .format(name, sorted(_SERIALIZERS)))
+    return cls(option or None)
+
+
+for _serializer in (PickleSerializer, JSONSerializer, TypedSerializer):
+    register(_serializer)
+del _serializer
+
+if IS_PYTHON2:
+    _text_type, _bytes_type, _int_types = unicode, str, (int, long)
+else:
+    _text_type, _bytes_type, _int_types = str, bytes, (int,)
+
+_INT64 = struct.Struct('<q')
+_DOUBLE = struct.Struct('<d')
+_COMPLEX = struct.Struct('<dd')
+_SIZE = struct.Struct('<I')
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+# the array type codes of each kind of item, see _array_typecode()
+_ARRAY_KINDS = ('bhilq', 'BHILQ', 'fd', 'uw')
+
+
+def _encode(obj, write):
+    """Encode an object for :class:`TypedSerializer`."""
+    if obj is None:
+        write(b'N')
+    elif obj is True:
+        write(b'T')
+    elif obj is False:
+        write(b'F')
+    elif isinstance(obj, _int_types):
+        if -2**63 <= obj < 2**63:
+            write(b'i' + _INT64.pack(obj))
+        else:
+            data = str(obj).encode('ascii')
+            write(b'I' + _SIZE.pack(len(data)) + data)
+    elif isinstance(obj, float):
+        write(b'd' + _DOUBLE.pack(obj))
+    elif isinstance(obj, complex):
+        write(b'c' + _COMPLEX.pack(obj.real, obj.imag))
+    elif isinstance(obj, _text_type):
+        data = obj.encode('utf-8')
+        write(b's' + _SIZE.pack(len(data)) + data)
+    elif isinstance(obj, _bytes_type):
+        write(b'b' + _SIZE.pack(len(obj)) + obj)
+    elif isinstance(obj, bytearray):
+        write(b'B' + _SIZE.pack(len(obj)) + bytes(obj))
+    elif isinstance(obj, (list, tuple)):
+        write((b'l' if isinstance(obj, list) else b't') + _SIZE.pack(len(obj)))
+        for item in obj:
+            _encode(item, write)
+    elif isinstance(obj, dict):
+        write(b'm' + _SIZE.pack(len(obj)))
+        for key, value in obj.items():
+            _encode(key, write)
+            _encode(value, write)
+    elif isinstance(obj, array.array):
+        if _BIG_ENDIAN:
+            obj = array.array(obj.typecode, obj)
+            obj.byteswap()
+        data = obj.tostring() if IS_PYTHON2 else obj.tobytes()
+        header = obj.typecode.encode('ascii') + struct.pack('<B', obj.itemsize)
+        write(b'a' + header + _SIZE.pack(len(data)) + data)
+    else:
+        raise TypeError('The typed serializer does not support {!r} objects'.format(type(obj).__name__))
+
+
+def _decode(data, offset):
+    """Decode an object for :class:`TypedSerializer`, returns the object and the new offset."""
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'T':
+        return True, offset
+    if tag == b'F':
+        return False, offset
+    if tag == b'i':
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == b'd':
+        return _DOUBLE.unpack_from(data, offset)[0], offset + 8
+    if tag == b'c':
+        real, imag = _COMPLEX.unpack_from(data, offset)
+        return complex(real, imag), offset + 16
+    if tag not in (b'l', b't', b'm', b's', b'b', b'B', b'I', b'a'):
+        raise ValueError('Invalid tag {!r} at byte {}'.format(tag, offset - 1))
+    if tag == b'a':
+        typecode = data[offset:offset + 1].decode('ascii')
+        itemsize = struct.unpack_from('<B', data, offset + 1)[0]
+        offset += 2
+    size = _SIZE.unpack_from(data, offset)[0]
+    offset += 4
+    if tag == b'l' or tag == b't' or tag == b'm':
+        items = []
+        for _ in range(size * 2 if tag == b'm' else size):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        if tag == b'l':
+            return items, offset
+        if tag == b't':
+            return tuple(items), offset
+        return dict(zip(items[::2], items[1::2])), offset
+    end = offset + size
+    if end > len(data):
+        raise ValueError('The data is truncated')
+    chunk = data[offset:end]
+    if tag == b's':
+        return chunk.decode('utf-8'), end
+    if tag == b'b':
+        return bytes(chunk), end
+    if tag == b'B':
+        return bytearray(chunk), end
+    if tag == b'I':
+        return int(chunk.decode('ascii')), end
+    return _decode_array(typecode, itemsize, chunk), end
+
+
+def _array_typecode(typecode, itemsize):
+    """
+    Returns the local array type code that has the same kind of item as ``typecode``
+    and an item size of ``itemsize`` bytes, or :py:data:`None`.
+    """
+    for codes in _ARRAY_KINDS:
+        if typecode in codes:
+            # prefer the same type code
+            for code in [typecode] + [c for c in codes if c != typecode]:
+                try:
+                    if array.array(str(code)).itemsize == itemsize:
+                        return code
+                except ValueError:  # the type code is not available in this version of Python
+                    pass
+            return None
+    return None
+
+
+def _decode_array(typecode, itemsize, chunk):
+    """Create an array.array from the bytes of the items that were encoded on (possibly) another platform."""
+    code = _array_typecode(typecode, itemsize)
+    if code is None:
+        if typecode in 'uw' and itemsize in (2, 4):
+            # a unicode array whose character size differs from the local size
+            text = bytes(chunk).decode('utf-16-le' if itemsize == 2 else 'utf-32-le')
+            return array.array(str('u'), text)
+        raise TypeError('Cannot decode an array of type code {!r} with {}-byte items on this platform'
+                        .format(typecode, itemsize))
+    values = array.array(str(code))
+    if IS_PYTHON2:
+        values.fromstring(bytes(chunk))
+    else:
+        values.frombytes(chunk)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
@@ -7,29 +7,47 @@ from 64-bit Python.
 """
 import os
 import sys
+import copy
+import heapq
+import ctypes
+import struct
+import hashlib
+import inspect
+import itertools
 import traceback
 import threading
 import subprocess
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
-
+from collections import OrderedDict
 from msl.loadlib import LoadLibrary
 from msl.loadlib import IS_PYTHON2, IS_PYTHON3
+from msl.loadlib import serializers
+from msl.loadlib.buffers import BufferPool
+from msl.loadlib.resolver import find_library
 from msl.loadlib.freeze_server32 import SERVER_FILENAME
 
 if IS_PYTHON2:
     from BaseHTTPServer import HTTPServer
     from BaseHTTPServer import BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
 elif IS_PYTHON3:
     from http.server import HTTPServer
     from http.server import BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
 else:
     raise NotImplementedError('Python major version is not 2 or 3')
 
+CODEC_HEADER = 'X-Struct-Codec'
+""":class:`str`: The header of a response that contains the :py:mod:`struct` formats of
+the arguments and of the returned value of the method (separated by a ``';'``), see
+:attr:`.Server32.exposed32`."""
+
+ARGUMENT_CACHE_HEADER = 'X-Argument-Cache-Size'
+""":class:`str`: The header of a response that contains the maximum number of bytes of the
+arguments that are cached, see :attr:`.Server32.argument_cache32`. A larger argument is
+never cached so the client always sends it."""
 
-class Server32(HTTPServer):
+
+class Server32(ThreadingMixIn, HTTPServer):
     """
     Loads a 32-bit shared library which is then hosted on a 32-bit server.
 
@@ -50,8 +68,9 @@ class Server32(HTTPServer):
     'Python 3.5.2 |Continuum Analytics, Inc.| (default, Jul  5 2016, 11:45:57) [MSC v.1900 32 bit (Intel)]'
 
     Args:
-        path (str): The full path to the 32-bit library *or* only the
-            filename if the library file is located in the current working directory.
+        path (str): The full path to the 32-bit library *or* only the name of the
+            library, see :func:`~msl.loadlib.resolver.find_library`. The directory of
+            the module of the :class:`Server32` subclass is also searched.
 
         libtype (str): The library type to use for the calling convention.
             Must be either **cdll**, **windll**, **oledll** or **net**.
@@ -67,16 +86,253 @@ class Server32(HTTPServer):
         quiet (bool): Whether to hide :py:data:`sys.stdout` messages from
             the server.
 
+        max_queue (int, optional): The maximum number of requests that can be waiting
+            for the shared library while another request is being processed. If the queue
+            is full then a request replaces the waiting request that has the lowest priority
+            (if it has a lower priority than the new request), otherwise the new request is
+            rejected. The :class:`~.client64.Client64` of a rejected request raises
+            :class:`~.client64.ServerBusyError`. Default is :py:data:`None` (unbounded).
+
+        max_client_requests (int, optional): The maximum number of requests from the
+            same :class:`~.client64.Client64` object (each object sends a unique ID with
+            its requests) that can be queued or processed at the same time. Default is
+            :py:data:`None` (unlimited).
+
+    Each request is received in its own thread; however, only one request at a time
+    calls the shared library. Waiting requests are processed in order of their priority
+    (see :meth:`.Client64.priority`) and then in the order that they were received.
+
     Raises:
         IOError: If the shared library cannot be loaded.
         TypeError: If the value of ``libtype`` is not supported.
 
     .. _standard: https://docs.python.org/3.5/py-modindex.html
     """
-    def __init__(self, path, libtype, host, port, quiet):
+    daemon_threads = True
+
+    exposed32 = {}
+    """:class:`dict`: The functions of the shared library that a client can call directly.
+
+    A function that only needs its arguments to be converted to :py:mod:`ctypes` types
+    does not require a wrapper method in the :class:`Server32` subclass. Each key is the
+    name that a client uses, see :meth:`.Client64.request32`, and each value is a
+    :class:`dict` of the keyword arguments for :meth:`declare` (i.e., ``restype``,
+    ``argtypes``, ``roles`` and ``errcheck``), or for :meth:`declare_fortran` if the
+    value contains ``'fortran': True``. The ``'function'`` item is the name of the
+    function in the shared library (default is the key). For example::
+
+        class Cpp32(Server32):
+            exposed32 = {
+                'add': {'restype': ctypes.c_int32, 'argtypes': [('a', ctypes.c_int32), ('b', ctypes.c_int32)]},
+            }
+
+    The functions are declared when the :class:`Server32` subclass is created and a
+    request calls the :py:mod:`ctypes` function object without an intermediate Python
+    method, which reduces the time that each request takes.
+
+    If a function only has scalar parameters (and returns a scalar) then the response
+    to the first request of the function tells the client the :py:mod:`struct` formats
+    of the function, see :data:`CODEC_HEADER`, and the client packs the arguments of
+    the following requests with a :class:`struct.Struct` instead of the serializer.
+    """
+
+    serializers32 = None
+    """:class:`tuple` of :class:`str`: The names of the serializers that a client can use,
+    see :mod:`~msl.loadlib.serializers`. For example, ``('typed',)`` rejects requests
+    that would have to be unpickled. Default is :py:data:`None` (every registered serializer).
+    """
+
+    argument_cache32 = 256 * 1024 * 1024
+    """:class:`int`: The maximum number of bytes of the large arguments that are cached,
+    see :meth:`.Client64.enable_argument_cache`. The least-recently used arguments are
+    removed from the cache first. Default is 256 MB.
+    """
+
+    def __init__(self, path, libtype, host, port, quiet, max_queue=None, max_client_requests=None):
         HTTPServer.__init__(self, (host, int(port)), RequestHandler)
         self.quiet = quiet
-        self._library = LoadLibrary(path, libtype)
+        self.max_queue = max_queue
+        self.max_client_requests = max_client_requests
+        module = sys.modules.get(self.__class__.__module__)
+        directories = [os.path.dirname(module.__file__)] if getattr(module, '__file__', None) else []
+        self._library = LoadLibrary(find_library(path, directories) or path, libtype)
+        self._buffer_pool = BufferPool()
+        self._exposed = self._expose()
+        self._codecs = {}
+        self._codec_formats = {}
+        for name, spec in self.exposed32.items():
+            formats = _struct_formats(spec)
+            if formats is not None:
+                self._codecs[name] = (struct.Struct(formats[0]), struct.Struct(formats[1]))
+                self._codec_formats[name] = ';'.join(formats)
+        self._introspection = None
+        self._serializers = {}
+        self._blobs = _BlobStore(self.argument_cache32)
+
+        # only one request at a time can call the library, see _admit() and _release()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._waiting = []
+        self._evicted = set()
+        self._client_counts = {}
+        self._counter = itertools.count()
+
+    def _expose(self):
+        """Declare the functions in :attr:`exposed32`."""
+        exposed = {}
+        for name, spec in self.exposed32.items():
+            if hasattr(self, name):
+                raise ValueError('Cannot expose {!r}, the {} class already has an attribute with '
+                                 'this name'.format(name, self.__class__.__name__))
+            kwargs = dict(spec)
+            function = kwargs.pop('function', name)
+            if kwargs.pop('fortran', False):
+                exposed[name] = self.declare_fortran(function, **kwargs)
+            else:
+                exposed[name] = self.declare(function, **kwargs)
+        return exposed
+
+    def _serializer(self, capability):
+        """Returns the serializer that a request uses, see :attr:`serializers32`."""
+        try:
+            return self._serializers[capability]
+        except KeyError:
+            pass
+        serializer = serializers.get(capability)
+        if self.serializers32 is not None and serializer.name not in self.serializers32:
+            raise ValueError('The {!r} serializer is not allowed, must be one of {}'
+                             .format(serializer.name, list(self.serializers32)))
+        self._serializers[capability] = serializer
+        return serializer
+
+    def _method(self, name):
+        """Returns the exposed function or the method of the :class:`Server32` subclass."""
+        try:
+            return self._exposed[name]
+        except KeyError:
+            return getattr(self, name)
+
+    def introspect(self):
+        """
+        Describe the methods that a client can call.
+
+        The description is used by :meth:`.Client64.proxy32` to create a method for each
+        public method of the :class:`Server32` subclass (and for each function in
+        :attr:`exposed32`) so that a mirror :class:`~.client64.Client64` subclass does
+        not have to be written by hand.
+
+        Returns:
+            :class:`dict`: The ``'version'`` of the module of the :class:`Server32`
+            subclass (its ``__version__`` and the SHA-256 hash of its source file) and
+            the ``'methods'``, a :class:`dict` of the ``'signature'`` and ``'doc'`` of
+            each method. A function in :attr:`exposed32` that only has scalar parameters
+            also has a ``'codec'``, the :py:mod:`struct` formats of its arguments and of
+            its returned value, which the client uses instead of the serializer.
+        """
+        if self._introspection is not None:
+            return self._introspection
+
+        methods = {}
+        for name in dir(self.__class__):
+            if name.startswith('_') or hasattr(Server32, name):
+                continue
+            if inspect.isroutine(getattr(self.__class__, name)):
+                method = getattr(self, name)
+                methods[name] = {'signature': _signature(method), 'doc': inspect.getdoc(method) or ''}
+
+        for name, spec in self.exposed32.items():
+            roles = spec.get('roles') or ['in'] * len(spec.get('argtypes') or [])
+            params = []
+            for index, (arg, role) in enumerate(zip(spec.get('argtypes') or [], roles)):
+                if role != 'out':
+                    params.append(arg[0] if isinstance(arg, tuple) else 'arg{}'.format(index))
+            methods[name] = {'signature': '({})'.format(', '.join(params)),
+                             'doc': 'Calls the {!r} function of the shared library.'.format(spec.get('function', name))}
+            if name in self._codecs:
+                methods[name]['codec'] = self._codec_formats[name].split(';')
+
+        self._introspection = {'version': _module_version(sys.modules.get(self.__class__.__module__)),
+                               'methods': methods}
+        return self._introspection
+
+    def declare(self, name, restype=None, argtypes=None, roles=None, errcheck=None):
+        """
+        Declare the signature of a function in the shared library.
+
+        See :meth:`.LoadLibrary.declare` for more details.
+
+        Returns:
+            The :py:mod:`ctypes` function object.
+        """
+        return self._library.declare(name, restype, argtypes, roles, errcheck)
+
+    def declare_fortran(self, name, restype=None, argtypes=None, string_lengths='end',
+                        string_length_type=ctypes.c_size_t):
+        """
+        Declare the signature of a FORTRAN function in the shared library.
+
+        See :meth:`.LoadLibrary.declare_fortran` for more details.
+
+        Returns:
+            A callable object that calls the FORTRAN function.
+        """
+        return self._library.declare_fortran(name, restype, argtypes, string_lengths, string_length_type)
+
+    def vectorize(self, method, args, typecode=None):
+        """
+        Call a method of the :class:`Server32` subclass for each element of the input arrays.
+
+        This method is called by :meth:`.Client64.vectorize32` so that a scalar function
+        can be evaluated at many values in a single request. See
+        :meth:`.LoadLibrary.vectorize` for more details.
+
+        Args:
+            method (str): The name of the method of the :class:`Server32` subclass
+                (or of a function in :attr:`exposed32`).
+            args (list): The arguments to pass to ``method``.
+            typecode (str, optional): The :class:`array.array` type code of the returned values.
+
+        Returns:
+            A :class:`list` or an :class:`array.array` of the returned values.
+        """
+        return self._library.vectorize(self._method(method), args, typecode)
+
+    def parallel_map(self, method, iterable_of_args, workers=None, chunksize=None):
+        """
+        Call a method of the :class:`Server32` subclass for each item of arguments in a pool of threads.
+
+        A client can call this method with, for example,
+        ``self.request32('parallel_map', 'method_name', [(1, 2), (3, 4)], 2)``.
+        See :meth:`.LoadLibrary.parallel_map` for more details.
+
+        Args:
+            method (str): The name of the method of the :class:`Server32` subclass
+                (or of a function in :attr:`exposed32`). The method must only call reentrant functions of the shared library.
+            iterable_of_args: An iterable of the arguments to pass to ``method``.
+            workers (int, optional): The number of threads.
+            chunksize (int, optional): The number of items that a thread processes at a time.
+
+        Returns:
+            :class:`list`: The returned value of each call, in order.
+        """
+        return self._library.parallel_map(self._method(method), iterable_of_args, workers, chunksize)
+
+    @property
+    def buffer_pool(self):
+        """
+        Returns:
+            :class:`~msl.loadlib.buffers.BufferPool`: The pool of output buffers that the
+            methods of the :class:`Server32` subclass can reuse between requests.
+        """
+        return self._buffer_pool
+
+    @property
+    def queue_length(self):
+        """
+        Returns:
+            :py:class:`int`: The number of requests that are waiting for the shared library.
+        """
+        return len(self._waiting)
 
     @property
     def path(self):
@@ -119,6 +375,67 @@ class Server32(HTTPServer):
         """
         return self._library.net
 
+    @property
+    def net_index(self):
+        """
+        Returns:
+            :class:`~msl.loadlib.reflection.ReflectionIndex`: The types and members of
+            the .NET assembly -- *only if the shared library is a .NET library, otherwise
+            returns* :py:data:`None`. Reading the index is much faster than reflecting
+            over the assembly, see :mod:`msl.loadlib.reflection`.
+        """
+        return self._library.net_index
+
+    def _admit(self, client, priority):
+        """
+        Wait until it is the turn of a request from ``client`` to call the library.
+
+        A request with a smaller ``priority`` value gets its turn first. If the queue
+        is full then the request replaces the waiting request that has the largest
+        ``priority`` value (which is rejected), if that value is larger than ``priority``.
+
+        Raises:
+            ServerBusy: If the queue is full, if ``client`` has too many requests or
+                if a request with a smaller ``priority`` value replaced this request.
+        """
+        with self._cond:
+            count = self._client_counts.get(client, 0)
+            if self.max_client_requests is not None and count >= self.max_client_requests:
+                raise ServerBusy('Too many requests from client {} ({} requests)'.format(client, count))
+            if self.max_queue is not None and self._busy and len(self._waiting) >= self.max_queue:
+                lowest = max(self._waiting)
+                if lowest[0] <= priority:
+                    raise ServerBusy('The request queue is full ({} requests)'.format(len(self._waiting)))
+                self._waiting.remove(lowest)
+                heapq.heapify(self._waiting)
+                self._evicted.add(lowest)
+                self._cond.notify_all()
+            self._client_counts[client] = count + 1
+
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._waiting, ticket)
+            while ticket not in self._evicted and (self._busy or self._waiting[0] != ticket):
+                self._cond.wait()
+            if ticket in self._evicted:
+                self._evicted.remove(ticket)
+                self._decrement(client)
+                raise ServerBusy('The request queue is full, a request with a higher priority replaced this request')
+            heapq.heappop(self._waiting)
+            self._busy = True
+
+    def _release(self, client):
+        """Allow the next request to call the library."""
+        with self._cond:
+            self._busy = False
+            self._decrement(client)
+            self._cond.notify_all()
+
+    def _decrement(self, client):
+        """Decrement the number of requests from ``client`` (the lock must be acquired)."""
+        self._client_counts[client] -= 1
+        if self._client_counts[client] == 0:
+            del self._client_counts[client]
+
     @staticmethod
     def version():
         """
@@ -147,6 +464,154 @@ class Server32(HTTPServer):
         os.system('start ' + ' '.join((exe, '--interactive')))
 
 
+def _signature(method):
+    """Returns the signature of a bound method (without ``self``) as a string."""
+    try:
+        if IS_PYTHON2:
+            spec = inspect.getargspec(method)
+            return inspect.formatargspec(spec.args[1:], spec.varargs, spec.keywords, spec.defaults)
+        return str(inspect.signature(method))
+    except (TypeError, ValueError):  # e.g., a builtin function
+        return '(*args, **kwargs)'
+
+
+def _struct_formats(spec):
+    """
+    Returns the :py:mod:`struct` formats of the arguments and of the returned value of
+    a function in :attr:`.Server32.exposed32`, or :py:data:`None` if the function has
+    a parameter (or returns a value) that is not a scalar.
+    """
+    if spec.get('roles') and any(role != 'in' for role in spec['roles']):
+        return None
+    if spec.get('errcheck') is not None:
+        return None
+    codes = []
+    for arg in spec.get('argtypes') or []:
+        code = _struct_code(arg[1] if isinstance(arg, tuple) else arg)
+        if code is None:
+            return None
+        codes.append(code)
+    restype = spec.get('restype')
+    result = '' if restype is None else _struct_code(restype)
+    if result is None:
+        return None
+    # standard sizes (and no padding) so that a 64-bit client can pack the arguments
+    return '<' + ''.join(codes), '<' + result
+
+
+def _struct_code(ctype):
+    """Returns the :py:mod:`struct` code of a :py:mod:`ctypes` scalar type, or :py:data:`None`."""
+    code = getattr(ctype, '_type_', None)
+    if not isinstance(code, str) or not isinstance(ctype, type) or not issubclass(ctype, ctypes._SimpleCData):
+        return None
+    if code in 'fd?':
+        return code
+    if code in 'bBhHiIlLqQ':
+        # the size of a C integer type depends on the platform of the server
+        size = ctypes.sizeof(ctype)
+        signed = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[size]
+        return signed if code.islower() else signed.upper()
+    return None
+
+
+def _module_version(module):
+    """Returns the ``__version__`` and the SHA-256 hash of the source file of a module."""
+    version = str(getattr(module, '__version__', ''))
+    path = getattr(module, '__file__', None)
+    if path:
+        root, ext = os.path.splitext(path)
+        if ext in ('.pyc', '.pyo') and os.path.isfile(root + '.py'):
+            path = root + '.py'
+        try:
+            with open(path, 'rb') as f:
+                version += ':' + hashlib.sha256(f.read()).hexdigest()
+        except (IOError, OSError):
+            pass
+    return version
+
+
+class _BlobMiss(Exception):
+    """Raised if the content of a cached argument is not available (anymore)."""
+
+
+class _BlobStore(object):
+    """A least-recently used cache of the large arguments of requests, by their digest."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._nbytes = 0
+        self._blobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, method, args, kwargs, refs):
+        """
+        Insert the arguments that the client sent by reference.
+
+        Each item in ``refs`` is [location, digest, value], the value is :py:data:`None`
+        if the client expects the argument to be cached.
+
+        Raises:
+            _BlobMiss: If an argument is not cached.
+        """
+        args, kwargs = list(args), dict(kwargs)
+        missing = []
+        for location, digest, value in refs:
+            if value is None:
+                value = self.get(digest)
+                if value is None:
+                    missing.append(digest)
+                    continue
+            else:
+                self.put(digest, value)
+            # the method could modify the argument so the cached value must not be passed
+            if not isinstance(value, bytes):
+                value = copy.copy(value)
+            if isinstance(location, int):
+                args[location] = value
+            else:
+                kwargs[location] = value
+        if missing:
+            raise _BlobMiss('The server does not have the arguments ' + ', '.join(missing))
+        return method, args, kwargs
+
+    def get(self, digest):
+        with self._lock:
+            item = self._blobs.pop(digest, None)
+            if item is None:
+                return None
+            self._blobs[digest] = item  # the most-recently used item is last
+            return item[0]
+
+    def put(self, digest, value):
+        nbytes = _nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            item = self._blobs.pop(digest, None)
+            if item is not None:
+                self._nbytes -= item[1]
+            while self._blobs and self._nbytes + nbytes > self.max_bytes:
+                self._nbytes -= self._blobs.popitem(last=False)[1][1]
+            self._blobs[digest] = (value, nbytes)
+            self._nbytes += nbytes
+
+
+def _nbytes(value):
+    """Returns the number of bytes of an object that supports the buffer protocol."""
+    try:
+        if IS_PYTHON2:
+            return len(buffer(value))
+        return memoryview(value).nbytes
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+class ServerBusy(Exception):
+    """
+    Raised by the :class:`~.server32.Server32` if a request cannot be queued.
+    """
+
+
 class RequestHandler(BaseHTTPRequestHandler):
     """
     Handles the request that was sent to the 32-bit server.
@@ -162,36 +627,101 @@ class RequestHandler(BaseHTTPRequestHandler):
             return
 
         try:
-            method, pickle_protocol, pickle_temp_file = request.split(':', 2)
+            method, capability, priority, client, temp_file = request.split(':', 4)
+
+            # the arguments of an exposed function that has a scalar signature are
+            # packed with its struct codec instead of being serialized
+            if capability == 'struct':
+                serializer, codec = None, self.server._codecs[method]
+            else:
+                serializer, codec = self.server._serializer(capability), None
+
+            cached = False
             if method == 'LIB32_PATH':
                 response = self.server.path
+            elif method == 'QUEUE_LENGTH':
+                response = self.server.queue_length
+            elif method == 'BUFFER_POOL_STATISTICS':
+                response = self.server.buffer_pool.statistics()
+            elif method == 'INTROSPECT':
+                with open(temp_file, 'rb') as f:
+                    cached_version = serializer.loads(f.read())[0][0]
+                response = self.server.introspect()
+                if response['version'] == cached_version:
+                    response = {'version': cached_version}  # the client already has the methods
             else:
-                with open(pickle_temp_file, 'rb') as f:
-                    args = pickle.load(f)
-                    kwargs = pickle.load(f)
-                response = getattr(self.server, method)(*args, **kwargs)
-
-            with open(pickle_temp_file, 'wb') as f:
-                pickle.dump(response, f, protocol=int(pickle_protocol))
+                with open(temp_file, 'rb') as f:
+                    if codec is None:
+                        args, kwargs = serializer.loads(f.read())
+                    else:
+                        args, kwargs = codec[0].unpack(f.read()), {}
+                cached = method == 'BLOB_REQUEST'
+                if cached:
+                    # the client sent the digest of a large argument instead of its value
+                    method, args, kwargs = self.server._blobs.resolve(*args)
+                self.server._admit(client, int(priority))
+                try:
+                    if method == 'BATCH_REQUEST':
+                        response = []
+                        for name, a, kw in args[0]:
+                            try:
+                                response.append((True, self.server._method(name)(*a, **kw)))
+                            except Exception:
+                                response.append((False, self._exception_message()))
+                    else:
+                        response = self.server._method(method)(*args, **kwargs)
+                finally:
+                    self.server._release(client)
+
+            with open(temp_file, 'wb') as f:
+                if codec is None:
+                    f.write(serializer.dumps(response))
+                elif codec[1].size:
+                    f.write(codec[1].pack(response))
 
             self.send_response(200)
+            if cached:
+                self.send_header(ARGUMENT_CACHE_HEADER, str(self.server._blobs.max_bytes))
+            if codec is None and method in self.server._codec_formats:
+                # the client packs the arguments of the next request with the struct codec
+                self.send_header(CODEC_HEADER, self.server._codec_formats[method])
             self.end_headers()
 
-        except Exception:
-            self.send_response(501)
+        except _BlobMiss as e:
+            self.send_response(409)
             self.send_header('Content-type', 'text/plain')
             self.end_headers()
+            self.wfile.write(str(e).encode())
 
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            tb_list = traceback.extract_tb(exc_traceback)
-            tb = tb_list[min(len(tb_list)-1, 1)]  # get the Server32 subclass exception
+        except ServerBusy as e:
+            self.send_response(503)
+            self.send_header('Content-type', 'text/plain')
+            self.end_headers()
+            self.wfile.write(str(e).encode())
 
-            msg = '\n  File "{}", line {}, in {}'.format(tb[0], tb[1], tb[2])
-            if tb[3]:
-                msg += '\n    {}'.format(tb[3])
-            msg += '\n{}: {}'.format(exc_type.__name__, exc_value)
+        except Exception:
+            self.send_response(501)
+            self.send_header('Content-type', 'text/plain')
+            self.end_headers()
+            self.wfile.write(self._exception_message().encode())
 
-            self.wfile.write(msg.encode())
+    @staticmethod
+    def _exception_message():
+        """
+        Returns:
+            :py:class:`str`: A description of the exception that is currently being handled
+            which points to where the exception occurred in the :class:`~.server32.Server32`
+            subclass.
+        """
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        tb_list = traceback.extract_tb(exc_traceback)
+        tb = tb_list[min(len(tb_list)-1, 1)]  # get the Server32 subclass exception
+
+        msg = '\n  File "{}", line {}, in {}'.format(tb[0], tb[1], tb[2])
+        if tb[3]:
+            msg += '\n    {}'.format(tb[3])
+        msg += '\n{}: {}'.format(exc_type.__name__, exc_value)
+        return msg
 
     def log_message(self, fmt, *args):
         """
@@ -0,0 +1,168 @@
+import os
+import socket
+import threading
+import subprocess
+
+import pytest
+
+from msl.loadlib import IS_WINDOWS
+from msl.loadlib import Client64
+from msl.loadlib import client64
+
+C_SOURCE = """
+#include <stddef.h>
+
+static int counter = 0;
+
+int add(int a, int b) {
+    return a + b;
+}
+
+int increment(void) {
+    return ++counter;
+}
+
+int square(int x) {
+    return x * x;
+}
+
+int divide(int a, int b, int* quotient, int* remainder) {
+    if (b == 0) return -1;
+    *quotient = a / b;
+    *remainder = a % b;
+    return 0;
+}
+
+void accumulate(int* total, int value) {
+    *total += value;
+}
+
+/* CPU bound, the midpoint rule for the integral of x*x from a to b */
+double integrate(double a, double b, int n) {
+    int i;
+    double x, h = (b - a) / n, total = 0.0;
+    for (i = 0; i < n; ++i) {
+        x = a + (i + 0.5) * h;
+        total += x * x;
+    }
+    return total * h;
+}
+
+/* the FORTRAN calling convention: each argument is passed by reference and the
+   hidden length of each CHARACTER argument is passed at the end or after the argument */
+
+void upper_(char* text, size_t text_len) {
+    size_t i;
+    for (i = 0; i < text_len; ++i) {
+        if (text[i] >= 'a' && text[i] <= 'z') text[i] -= 32;
+    }
+}
+
+int lengths_end_(const char* a, const int* k, const char* b, size_t a_len, size_t b_len) {
+    return (int)(a_len * 1000 + b_len * 10) + *k + (a[0] == 'x') * 100000;
+}
+
+int lengths_after_(const char* a, size_t a_len, const int* k, const char* b, size_t b_len) {
+    return (int)(a_len * 1000 + b_len * 10) + *k + (a[0] == 'x') * 100000;
+}
+
+int first_char_(const char* text) {
+    return text[0];
+}
+
+void scale_(double* x, const double* factor) {
+    *x *= *factor;
+}
+
+double sum_(const double* values, const int* n) {
+    int i;
+    double total = 0.0;
+    for (i = 0; i < *n; ++i) total += values[i];
+    return total;
+}
+"""
+
+UNDEFINED_SOURCE = """
+extern int missing_symbol(void);
+
+int call_missing(void) {
+    return missing_symbol();
+}
+"""
+
+
+def compile_library(directory, name, source):
+    """Compile a shared library with the C compiler (skips the test if a compiler is not available)."""
+    if IS_WINDOWS:
+        pytest.skip('compiling a shared library is not supported on Windows')
+    c_file = os.path.join(directory, name + '.c')
+    with open(c_file, 'w') as f:
+        f.write(source)
+    path = os.path.join(directory, 'lib' + name + '.so')
+    try:
+        subprocess.check_call(['cc', '-shared', '-fPIC', '-o', path, c_file])
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip('a C compiler is not available')
+    return path
+
+
+@pytest.fixture(scope='session')
+def c_library(tmpdir_factory):
+    """The path to a shared library that is compiled from :data:`C_SOURCE`."""
+    return compile_library(str(tmpdir_factory.mktemp('c_library')), 'counter', C_SOURCE)
+
+
+@pytest.fixture(scope='session')
+def undefined_library(tmpdir_factory):
+    """The path to a shared library that cannot be loaded (it has an undefined symbol)."""
+    return compile_library(str(tmpdir_factory.mktemp('undefined_library')), 'undefined', UNDEFINED_SOURCE)
+
+
+@pytest.fixture
+def start_server(monkeypatch):
+    """
+    Start a Server32 subclass in a thread of this process (instead of in the frozen
+    32-bit executable) and connect a client to it.
+
+    Returns a function, ``start(server_class, client_class=Client64, **kwargs)``, that
+    returns the server and the client. The ``kwargs`` are passed to the client, if
+    ``port`` is the port of a server that was started then the client connects to it.
+    """
+    classes = {}
+    servers = []
+    clients = []
+
+    class Popen(object):
+        def __init__(self, cmd, **kwargs):
+            host, port = cmd[cmd.index('--host') + 1], int(cmd[cmd.index('--port') + 1])
+            if any(server.server_address[1] == port for server in servers):
+                return  # the client connects to a server that is running
+            server_class = classes[cmd[cmd.index('--module') + 1]]
+            server = server_class(host, port, True)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            servers.append(server)
+
+    # the client checks that the server executable exists, any file in the package will do
+    monkeypatch.setattr(client64, 'SERVER_FILENAME', os.path.basename(client64.__file__))
+    monkeypatch.setattr(subprocess, 'Popen', Popen)
+
+    def start(server_class, client_class=Client64, **kwargs):
+        classes[server_class.__name__] = server_class
+        if 'port' not in kwargs:
+            # a random port could be the local port of a connection
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('127.0.0.1', 0))
+            kwargs['port'] = s.getsockname()[1]
+            s.close()
+        client = client_class(server_class.__name__, **kwargs)
+        clients.append(client)
+        return servers[-1], client
+
+    yield start
+
+    for client in reversed(clients):
+        client.shutdown_server()
+    for server in servers:
+        server.server_close()
@@ -0,0 +1,84 @@
+import os
+import ctypes
+
+from msl.loadlib import bindings
+
+HEADER = """
+#define EXPORT __declspec(dllexport)
+#define BUFFER_SIZE 16
+
+typedef unsigned int uint;
+
+typedef enum { IDLE, BUSY = 5, ERROR } Status;
+
+typedef struct _Point {
+    double x, y;
+    struct _Point* next;
+    char label[BUFFER_SIZE];
+} Point, *PPoint;
+
+extern "C" {
+    EXPORT Status get_status(uint timeout);
+    EXPORT void get_point(Point* p);
+    EXPORT PPoint make_points(int n, const double values[]);
+    EXPORT int format(const char* fmt, ...);
+}
+"""
+
+
+def test_parse_cpp_lib():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, 'msl', 'examples', 'loadlib', 'cpp_lib.h')
+    header = bindings.parse_header(path)
+    functions = dict((f.name, f) for f in header.functions)
+    assert ['add', 'subtract', 'add_or_subtract', 'scalar_multiply', 'reverse_string_v1',
+            'reverse_string_v2'] == [f.name for f in header.functions]
+    assert 'ctypes.c_int' == functions['add'].restype
+    assert [('a', 'ctypes.c_int'), ('b', 'ctypes.c_int')] == functions['add'].params
+    assert 'ctypes.c_float' == functions['subtract'].restype
+    assert ('do_addition', 'ctypes.c_bool') == functions['add_or_subtract'].params[2]
+    assert 'None' == functions['scalar_multiply'].restype
+    assert ('xin', 'ctypes.POINTER(ctypes.c_double)') == functions['scalar_multiply'].params[1]
+    assert 'ctypes.c_char_p' == functions['reverse_string_v2'].restype
+
+
+def test_generate_bindings():
+    header = bindings.parse_string(HEADER)
+
+    # variadic functions are skipped
+    assert ['get_status', 'get_point', 'make_points'] == [f.name for f in header.functions]
+
+    namespace = {}
+    exec(bindings.generate_bindings(header), namespace)
+    assert 16 == namespace['BUFFER_SIZE']
+    assert (0, 5, 6) == (namespace['IDLE'], namespace['BUSY'], namespace['ERROR'])
+
+    point = namespace['Point']
+    assert ctypes.sizeof(ctypes.c_double) * 2 + ctypes.sizeof(ctypes.c_void_p) + 16 == ctypes.sizeof(point)
+
+    functions = namespace['FUNCTIONS']
+    assert (ctypes.c_int, [('timeout', ctypes.c_uint)]) == functions['get_status']
+    assert (None, [('p', ctypes.POINTER(point))]) == functions['get_point']
+    restype, argtypes = functions['make_points']
+    assert ctypes.POINTER(point) == restype
+    assert [('n', ctypes.c_int), ('values', ctypes.POINTER(ctypes.c_double))] == argtypes
+
+
+def test_generate_server32_client64():
+    header = bindings.parse_string(HEADER)
+
+    server = bindings.generate_server32(header, 'My32', 'my_lib32', 'my_bindings')
+    assert 'class My32(Server32):' in server
+    assert "self._get_status = self.declare('get_status', *FUNCTIONS['get_status'])" in server
+    compile(server, 'my32.py', 'exec')
+
+    client = bindings.generate_client64(header, 'My64', 'my32')
+    assert 'class My64(Client64):' in client
+    assert "return self.request32('make_points', n, values)" in client
+    compile(client, 'my64.py', 'exec')
+
+
+def test_function_pointer_parameter():
+    header = bindings.parse_string('int apply(int (*cb)(int), int x);\nint g(int x);\nint (*handler)(int);')
+    # a function that has a callback parameter is not mistaken for a function pointer variable
+    assert ['apply', 'g'] == [f.name for f in header.functions]
+    assert [('cb', 'ctypes.c_void_p'), ('x', 'ctypes.c_int')] == header.functions[0].params
@@ -0,0 +1,187 @@
+import os
+import array
+import ctypes
+import pickle
+
+import pytest
+
+from msl.loadlib import buffers
+
+
+def test_as_ctypes_shares_memory():
+    a = array.array('d', [1.0, 2.0, 3.0])
+    c = buffers.as_ctypes(a, ctypes.c_double)
+    assert isinstance(c, ctypes.Array)
+    c[0] = -1.0
+    assert -1.0 == a[0]
+
+    c = buffers.as_ctypes(a, ctypes.c_double, copy=True)
+    c[1] = -2.0
+    assert 2.0 == a[1]
+
+    assert c is buffers.as_ctypes(c, ctypes.c_double)
+
+
+def test_as_ctypes_converts():
+    assert [1.0, 2.0, 3.0] == list(buffers.as_ctypes([1, 2, 3], ctypes.c_double))
+    assert [1.0, 2.0] == list(buffers.as_ctypes(array.array('i', [1, 2]), ctypes.c_double))
+    assert b'abc' == buffers.as_ctypes(b'abc', ctypes.c_char).raw
+
+    # read-only memory is copied
+    data = array.array('d', [4.0, 5.0]).tobytes() if hasattr(array.array, 'tobytes') else None
+    if data is not None:
+        c = buffers.as_ctypes(memoryview(data).cast('d'), ctypes.c_double)
+        assert [4.0, 5.0] == list(c)
+
+
+def test_nbytes():
+    # memoryview.nbytes is not available in Python 2
+    assert 24 == buffers._nbytes(memoryview(bytearray(24)))
+    assert 3 == buffers._nbytes(memoryview(b'abc'))
+    if hasattr(memoryview, 'cast'):
+        assert 48 == buffers._nbytes(memoryview(bytearray(48)).cast('d', [2, 3]))
+
+
+def test_empty():
+    a = buffers.empty(ctypes.c_int32, 5, use_numpy=False)
+    assert isinstance(a, array.array)
+    assert [0] * 5 == list(a)
+    buffers.as_ctypes(a, ctypes.c_int32)[4] = 7
+    assert 7 == a[4]
+
+    with pytest.raises(TypeError):
+        buffers.typecode(ctypes.c_bool)
+
+
+def test_to_numpy():
+    np = pytest.importorskip('numpy')
+    a = array.array('d', [1.0, 2.0, 3.0])
+    n = buffers.to_numpy(a)
+    assert isinstance(n, np.ndarray)
+    assert np.float64 == n.dtype
+    a[0] = -1.0  # shares memory
+    assert -1.0 == n[0]
+
+    out = buffers.to_numpy((a, 'x'))
+    assert isinstance(out, tuple)
+    assert isinstance(out[0], np.ndarray)
+    assert 'x' == out[1]
+    assert [1, 2] == buffers.to_numpy([1, 2])
+
+
+def test_as_ctypes_fortran_order():
+    matrix = [[1, 2, 3], [4, 5, 6]]
+    assert [1.0, 4.0, 2.0, 5.0, 3.0, 6.0] == list(buffers.as_ctypes(matrix, ctypes.c_double, order='F'))
+    assert [1.0, 2.0, 3.0, 4.0, 5.0, 6.0] == list(buffers.as_ctypes(matrix, ctypes.c_double))
+
+    # a one-dimensional buffer does not depend on the order
+    a = array.array('d', [1.0, 2.0])
+    buffers.as_ctypes(a, ctypes.c_double, order='F')[0] = -1.0
+    assert -1.0 == a[0]
+
+    with pytest.raises(ValueError):
+        buffers.as_ctypes(a, ctypes.c_double, order='X')
+
+    assert 6 == len(buffers.empty(ctypes.c_double, (2, 3), use_numpy=False))
+
+
+def test_struct_array():
+
+    class Point(ctypes.Structure):
+        _fields_ = [('x', ctypes.c_double), ('y', ctypes.c_double)]
+
+    class Record(ctypes.Structure):
+        _fields_ = [('id', ctypes.c_int16),
+                    ('name', ctypes.c_char * 10),
+                    ('values', ctypes.c_float * 3),
+                    ('point', Point),
+                    ('ptr', ctypes.c_void_p)]
+
+    records = (Record * 3)()
+    for i, record in enumerate(records):
+        record.id = i
+        record.name = b'record' + str(i).encode()
+        record.values[2] = 1.5 * i
+        record.point.y = -i
+
+    sa = pickle.loads(pickle.dumps(buffers.StructArray.from_ctypes(records)))
+    assert 3 == len(sa)
+    assert ctypes.sizeof(records) == len(sa.data)
+
+    rebuilt = sa.to_ctypes()
+    assert ctypes.sizeof(records) == ctypes.sizeof(rebuilt)
+    for i, record in enumerate(rebuilt):
+        assert i == record.id
+        assert b'record' + str(i).encode() == record.name
+        assert 1.5 * i == record.values[2]
+        assert -i == record.point.y
+
+    single = buffers.StructArray.from_ctypes(records[1]).to_ctypes()
+    assert isinstance(single, ctypes.Structure)
+    assert 1 == single.id
+
+    with pytest.raises(TypeError):
+        buffers.StructArray.from_ctypes([1, 2])
+
+
+def test_struct_array_numpy():
+    np = pytest.importorskip('numpy')
+
+    class Point(ctypes.Structure):
+        _fields_ = [('x', ctypes.c_int8), ('y', ctypes.c_double)]
+
+    points = (Point * 2)((1, 2.0), (3, 4.0))
+    a = buffers.to_numpy(buffers.StructArray.from_ctypes(points))
+    assert isinstance(a, np.ndarray)
+    assert [1, 3] == a['x'].tolist()
+    assert [2.0, 4.0] == a['y'].tolist()
+
+
+def test_buffer_pool():
+    pool = buffers.BufferPool(max_per_size=1)
+    with pool.borrow(ctypes.c_double, 4) as a:
+        a[0] = 1.0
+    with pool.borrow(ctypes.c_double, 4) as b:
+        assert b is a
+        assert 1.0 == b[0]
+    assert 0.0 == pool.acquire(ctypes.c_double, 4, zero=True)[0]
+
+    c = pool.acquire(ctypes.c_double, 4)
+    pool.release(a)
+    pool.release(c)  # the pool already has one unused buffer of this size
+
+    stats = pool.statistics()
+    assert 2 == stats['allocated']
+    assert 2 == stats['reused']
+    assert 1 == stats['discarded']
+    assert 1 == stats['available']
+    assert 32 == stats['nbytes']
+    assert 0.5 == stats['reuse_ratio']
+
+    pool.clear()
+    assert 0 == pool.statistics()['available']
+
+
+def test_shared_array():
+    shared = buffers.SharedArray(ctypes.c_double, 3)
+    assert 3 == len(shared)
+    assert pickle.loads(pickle.dumps(shared)) is shared
+
+    # a SharedArray that is attached to the same file shares the memory
+    attached = buffers.SharedArray(ctypes.c_double, 3, path=shared.path)
+    buffers.as_ctypes(shared, ctypes.c_double)[1] = 2.5
+    assert [0.0, 2.5, 0.0] == attached.tolist()
+    attached[2] = -1.0
+    assert -1.0 == shared[2]
+    attached.close()
+    assert os.path.isfile(shared.path)
+    assert pickle.loads(pickle.dumps(shared)) is shared
+
+    with pytest.raises(TypeError):
+        buffers.as_ctypes(shared, ctypes.c_int16)
+
+    shared.close()
+    assert not os.path.isfile(shared.path)
+
+    with pytest.raises(ValueError):
+        buffers.SharedArray(ctypes.c_double, 0)
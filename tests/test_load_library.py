@@ -0,0 +1,214 @@
+import time
+import array
+import ctypes
+import threading
+import multiprocessing
+
+import pytest
+
+from msl.loadlib import LoadLibrary
+from msl.loadlib import load_library
+
+
+def test_lazy(c_library):
+    lib = LoadLibrary(c_library, lazy=True)
+    assert not lib.is_loaded
+    assert 3 == lib.lib.add(1, 2)
+    assert lib.is_loaded
+    lib.unload()
+    assert not lib.is_loaded
+
+
+def test_lazy_failure(undefined_library):
+    lib = LoadLibrary(undefined_library, lazy=True)
+    for _ in range(2):
+        with pytest.raises(OSError, match='undefined symbol'):
+            lib.lib
+        assert not lib.is_loaded
+
+
+def test_lazy_threads(c_library, monkeypatch):
+    original = load_library._load
+
+    def slow_load(*args):
+        time.sleep(0.05)  # the other threads access the library while it is being loaded
+        return original(*args)
+
+    monkeypatch.setattr(load_library, '_load', slow_load)
+    lib = LoadLibrary(c_library, lazy=True)
+    start = threading.Event()
+    results = []
+
+    def first_access():
+        start.wait()
+        results.append(lib.lib)
+
+    threads = [threading.Thread(target=first_access) for _ in range(8)]
+    for t in threads:
+        t.start()
+    start.set()
+    for t in threads:
+        t.join()
+
+    assert 8 == len(results)
+    assert all(r is not None and r is results[0] for r in results)
+    lib.unload()
+
+
+def test_isolated_instances(c_library):
+    a, b = LoadLibrary.isolated_instances(c_library, 2)
+    assert a.isolated and b.isolated
+    assert a.lib._handle != b.lib._handle
+    # each instance has its own global variables
+    assert [1, 2, 3] == [a.lib.increment() for _ in range(3)]
+    assert [1, 2] == [b.lib.increment() for _ in range(2)]
+    assert 4 == a.lib.increment()
+
+    shared = LoadLibrary(c_library)
+    assert shared.lib._handle not in (a.lib._handle, b.lib._handle)
+    for lib in (a, b, shared):
+        lib.unload()
+
+
+def test_unload(c_library):
+    def references():
+        for item in LoadLibrary.loaded_libraries():
+            if item['path'] == c_library and not item['isolated']:
+                return item['references']
+        return 0
+
+    assert 0 == references()
+    a = LoadLibrary(c_library)
+    with LoadLibrary(c_library) as b:
+        assert a.lib._handle == b.lib._handle
+        assert 2 == references()
+        # the same library is shared, so is its state
+        assert a.lib.increment() + 1 == b.lib.increment()
+    assert not b.is_loaded
+    assert a.is_loaded
+    assert 1 == references()
+    a.unload()
+    assert 0 == references()
+    a.unload()  # no effect
+
+    # the library was dlclose'd, so its state is reset when it is loaded again
+    c = LoadLibrary(c_library)
+    assert 1 == c.lib.increment()
+    c.unload()
+
+
+def test_declare_fortran(c_library):
+    with LoadLibrary(c_library) as lib:
+        upper = lib.declare_fortran('upper_', None, [ctypes.c_char_p])
+        text = bytearray(b'hello')
+        upper(text)
+        assert bytearray(b'HELLO') == text
+        buffer = ctypes.create_string_buffer(b'abc', 3)
+        upper(buffer)
+        assert b'ABC' == buffer.raw
+
+        # the hidden lengths of the CHARACTER arguments
+        args = [ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p]
+        end = lib.declare_fortran('lengths_end_', ctypes.c_int, args)
+        assert 100000 + 3000 + 20 + 7 == end('xyz', 7, b'ab')
+        after = lib.declare_fortran('lengths_after_', ctypes.c_int, args, string_lengths='after')
+        assert 4000 + 50 + 1 == after(bytearray(b'abcd'), 1, u'abcde')
+        first = lib.declare_fortran('first_char_', ctypes.c_int, [ctypes.c_char_p], string_lengths=None)
+        assert ord('q') == first('q')
+
+        # scalars are passed by reference
+        scale = lib.declare_fortran('scale_', None, [ctypes.c_double, ctypes.c_double])
+        x = ctypes.c_double(1.5)
+        scale(x, 4)
+        assert 6.0 == x.value
+        scale(1.5, 4.0)  # a copy of the value is passed
+
+        total = lib.declare_fortran('sum_', ctypes.c_double, [ctypes.POINTER(ctypes.c_double), ctypes.c_int])
+        assert 10.0 == total([1.0, 2.0, 3.0, 4.0], 4)
+        assert 6.0 == total(array.array('d', [1.0, 2.0, 3.0, 4.0]), 3)
+
+        with pytest.raises(TypeError):
+            total([1.0], 1, 2)
+        with pytest.raises(ValueError, match='string_lengths'):
+            lib.declare_fortran('upper_', None, [ctypes.c_char_p], string_lengths='before')
+
+
+def test_parallel_map(c_library):
+    with LoadLibrary(c_library) as lib:
+        lib.declare('integrate', ctypes.c_double, [ctypes.c_double, ctypes.c_double, ctypes.c_int])
+        items = [(0, b, 1000) for b in range(1, 21)]
+        expected = [b ** 3 / 3.0 for b in range(1, 21)]
+        for workers, chunksize in [(1, None), (4, None), (3, 1), (2, 7), (30, 100)]:
+            results = lib.parallel_map('integrate', items, workers=workers, chunksize=chunksize)
+            assert 20 == len(results)
+            assert all(abs(r - e) < 1e-3 * e for r, e in zip(results, expected))
+
+        # an item that is not a tuple is the only argument
+        lib.declare('square', ctypes.c_int, [ctypes.c_int])
+        assert [i * i for i in range(10)] == lib.parallel_map('square', range(10), workers=3, chunksize=2)
+        assert [] == lib.parallel_map('integrate', [])
+
+        with pytest.raises(ValueError, match='has not been declared'):
+            lib.parallel_map('unknown', [(1,)])
+
+
+def test_parallel_map_speedup(c_library):
+    # a benchmark, the function releases the GIL so the threads can run on different cores
+    with LoadLibrary(c_library) as lib:
+        lib.declare('integrate', ctypes.c_double, [ctypes.c_double, ctypes.c_double, ctypes.c_int])
+        items = [(0, 1, 2000000)] * 16
+        workers = min(4, multiprocessing.cpu_count())
+
+        t0 = time.time()
+        serial = lib.parallel_map('integrate', items, workers=1)
+        t1 = time.time()
+        parallel = lib.parallel_map('integrate', items, workers=workers)
+        t2 = time.time()
+
+        assert serial == parallel
+        speedup = (t1 - t0) / (t2 - t1)
+        print('parallel_map: {} workers, speedup {:.2f}x'.format(workers, speedup))
+        if workers > 1:
+            assert speedup > 1.2
+
+
+def test_declare(c_library):
+    with LoadLibrary(c_library) as lib:
+        add = lib.declare('add', ctypes.c_int, [('a', ctypes.c_int), ('b', ctypes.c_int)])
+        assert add is lib.functions['add']
+        assert 3 == add(1, 2)
+        assert 3 == add(1, b=2)
+        assert 3 == add(b=2, a=1)
+
+        # the values of the 'out' parameters are returned instead of the returned value
+        int_p = ctypes.POINTER(ctypes.c_int)
+        divide = lib.declare('divide', ctypes.c_int,
+                             [('a', ctypes.c_int), ('b', ctypes.c_int), ('quotient', int_p), ('remainder', int_p)],
+                             roles=['in', 'in', 'out', 'out'])
+        assert [3, 2] == list(divide(17, 5))
+
+        # an 'inout' parameter is passed and its value is returned
+        accumulate = lib.declare('accumulate', None, [('total', int_p), ('value', ctypes.c_int)],
+                                 roles=['inout', 'in'])
+        total = ctypes.c_int(7)
+        assert 10 == accumulate(total, 3).value
+        assert 10 == total.value
+
+        def check(result, function, args):
+            if result != 0:
+                raise ZeroDivisionError('divide by zero')
+            return args[2].value, args[3].value
+
+        divide = lib.declare('divide', ctypes.c_int,
+                             [('a', ctypes.c_int), ('b', ctypes.c_int), ('quotient', int_p), ('remainder', int_p)],
+                             roles=['in', 'in', 'out', 'out'], errcheck=check)
+        assert (4, 1) == divide(9, 2)
+        with pytest.raises(ZeroDivisionError):
+            divide(1, 0)
+
+        with pytest.raises(ValueError, match='2 parameters but 1 roles'):
+            lib.declare('add', ctypes.c_int, [ctypes.c_int, ctypes.c_int], roles=['in'])
+        with pytest.raises(ValueError, match='Invalid role'):
+            lib.declare('add', ctypes.c_int, [ctypes.c_int, ctypes.c_int], roles=['in', 'output'])
+        with pytest.raises(AttributeError):
+            lib.declare('missing', ctypes.c_int)
@@ -1,4 +1,8 @@
 import os
+import array
+import ctypes
+import threading
+
 import pytest
 
 from msl import loadlib
@@ -124,3 +128,161 @@ def test_dummy():
     assert kwargs['x'] == x
     assert kwargs['y'] == y
     assert kwargs['my_dict'] == my_dict
+
+
+def test_request32_async():
+    futures = [c.request32_async('add', i, 2*i) for i in range(10)]
+    assert [3*i for i in range(10)] == [future.result() for future in futures]
+
+    future = f.request32_async('besselJ0', 8.0)
+    assert abs(0.171650807137 - future.result()) < eps
+
+
+def test_batching():
+    c.enable_batching(window=0.01, max_size=25)
+    try:
+        futures = [c.request32_async('add', i, 1) for i in range(100)]
+        assert [i + 1 for i in range(100)] == [future.result() for future in futures]
+        assert 3 == c.add(1, 2)
+    finally:
+        c.disable_batching()
+
+    with pytest.raises(ValueError):
+        c.enable_batching(window=-1)
+    with pytest.raises(ValueError):
+        c.enable_batching(max_size=0)
+
+
+def test_idempotent():
+    c.register_idempotent('add')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(c.add(1, 2))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [3] * 20 == results
+    assert {} == c._in_flight
+
+
+def test_queue_length():
+    assert 0 == c.queue_length32
+    assert 0 == f.queue_length32
+
+
+def test_priority():
+    with c.priority('interactive'):
+        assert 3 == c.add(1, 2)
+    with c.priority(5):
+        assert 3 == c.add(1, 2)
+    with pytest.raises(ValueError):
+        with c.priority('urgent'):
+            pass
+
+
+def test_vectorize():
+    add = c.vectorize32('add')
+    assert [11, 12, 13] == add([1, 2, 3], 10)
+    assert [5, 6, 7] == add([1, 2, 3], [4])
+    with pytest.raises(loadlib.client64.HTTPException):
+        add([1, 2], [1, 2, 3])
+
+    factorial = f.vectorize32('factorial', typecode='d')
+    assert [1.0, 2.0, 6.0, 24.0] == list(factorial([1, 2, 3, 4]))
+
+
+def test_parallel_map():
+    assert [2 * i for i in range(20)] == c.request32('parallel_map', 'add', [(i, i) for i in range(20)], 4)
+
+
+def test_proxy32():
+    cpp = c.proxy32(use_cache=False)
+    assert 3 == cpp.add(1, 2)
+    assert abs(10.0 - cpp.subtract(20.0, 10.0)) < eps
+    assert '0987654321' == cpp.reverse_string_v1('1234567890')
+    assert cpp.scalar_multiply.__doc__.startswith('scalar_multiply(a, xin, out=None)')
+    assert 'add' in c.introspect32()['methods']
+
+
+def test_struct_codecs():
+    from msl.loadlib.server32 import _struct_formats
+    assert ('<id', '<?') == _struct_formats({'restype': ctypes.c_bool, 'argtypes': [ctypes.c_int32, ('x', ctypes.c_double)]})
+    assert ('<', '<') == _struct_formats({})
+    assert _struct_formats({'restype': ctypes.c_char_p}) is None
+    assert _struct_formats({'argtypes': [ctypes.POINTER(ctypes.c_int)]}) is None
+    assert _struct_formats({'argtypes': [ctypes.c_int], 'roles': ['out']}) is None
+
+    assert -1002 == c.add(-1000, -2)  # the response contains the struct formats
+    assert 'add' in c._codecs
+    assert 'scalar_multiply' not in c._codecs
+    assert -1002 == c.add(-1000, -2)
+    assert abs(0.0 - c.add_or_subtract(0.1234, -0.1234, True)) < eps
+
+
+def test_argument_cache():
+    from msl.loadlib.server32 import _BlobStore
+    store = _BlobStore(16)
+    store.put('a', b'12345678')
+    store.put('b', b'12345678')
+    assert b'12345678' == store.get('a')
+    store.put('c', b'12345678')  # 'b' is the least-recently used
+    assert store.get('b') is None
+    assert store.get('a') is not None and store.get('c') is not None
+    store.put('d', b'0' * 17)  # too large
+    assert store.get('d') is None
+
+    x = array.array('d', range(10000))
+    c.enable_argument_cache(min_size=1024)
+    try:
+        expected = [2.0 * v for v in x]
+        for _ in range(3):
+            assert expected == list(c.scalar_multiply(2.0, x))
+    finally:
+        c.disable_argument_cache()
+
+
+def test_isolated_instances():
+    bits = '64' if loadlib.IS_PYTHON_64BIT else '32'
+    path = os.path.join(os.path.dirname(__file__), '..', 'msl', 'examples', 'loadlib', 'cpp_lib' + bits)
+    if not loadlib.IS_WINDOWS:
+        pytest.skip('the example library is only available for Windows')
+    libs = loadlib.LoadLibrary.isolated_instances(path, 2)
+    assert all(lib.isolated for lib in libs)
+    assert libs[0].lib._handle != libs[1].lib._handle
+    assert 3 == libs[0].lib.add(1, 2)
+    assert 3 == libs[1].lib.add(1, 2)
+
+
+def test_unload():
+    bits = '64' if loadlib.IS_PYTHON_64BIT else '32'
+    path = os.path.join(os.path.dirname(__file__), '..', 'msl', 'examples', 'loadlib', 'cpp_lib' + bits)
+    if not loadlib.IS_WINDOWS:
+        pytest.skip('the example library is only available for Windows')
+
+    def references():
+        for item in loadlib.LoadLibrary.loaded_libraries():
+            if item['path'] == os.path.abspath(path + '.dll'):
+                return item['references']
+        return 0
+
+    a = loadlib.LoadLibrary(path)
+    with loadlib.LoadLibrary(path) as b:
+        assert a.lib._handle == b.lib._handle
+        assert 2 == references()
+    assert not b.is_loaded
+    assert 1 == references()
+    a.unload()
+    assert 0 == references()
+
+
+def test_lazy():
+    bits = '64' if loadlib.IS_PYTHON_64BIT else '32'
+    path = os.path.join(os.path.dirname(__file__), '..', 'msl', 'examples', 'loadlib', 'cpp_lib' + bits)
+    if not loadlib.IS_WINDOWS:
+        pytest.skip('the example library is only available for Windows')
+
+    lib = loadlib.LoadLibrary(path, lazy=True)
+    assert not lib.is_loaded
+    assert 3 == lib.lib.add(1, 2)
+    assert lib.is_loaded
+    lib.unload()
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from msl.loadlib import reflection
+
+
+class Item(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __str__(self):
+        return self.FullName
+
+
+class Type(Item):
+
+    def GetMethods(self):
+        return self.methods
+
+    def GetProperties(self):
+        return [Item(Name='Count', PropertyType='System.Int32')]
+
+    def GetFields(self):
+        return []
+
+    def GetEvents(self):
+        return [Item(Name='Changed')]
+
+
+class Assembly(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def GetExportedTypes(self):
+        self.calls += 1
+        add = Item(Name='Add', ReturnType='System.Int32', IsStatic=False,
+                   GetParameters=lambda: [Item(Name='a', ParameterType='System.Int32'),
+                                          Item(Name='b', ParameterType='System.Int32')])
+        add.IsSpecialName = False
+        getter = Item(Name='get_Count', ReturnType='System.Int32', IsStatic=False, IsSpecialName=True,
+                      GetParameters=lambda: [])
+        # a method (that is not a property accessor) can have a name that starts with get_
+        method = Item(Name='get_Value', ReturnType='System.Int32', IsStatic=True, IsSpecialName=False,
+                      GetParameters=lambda: [])
+        return [Type(Name='Calc', FullName='Lib.Calc', Namespace='Lib', methods=[add, getter, method])]
+
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmpdir, monkeypatch):
+    monkeypatch.setattr(reflection, 'CACHE_DIRECTORY', str(tmpdir.join('cache')))
+
+
+def test_index_assembly(tmpdir):
+    path = str(tmpdir.join('lib.dll'))
+    with open(path, 'wb') as f:
+        f.write(b'version 1')
+
+    assert reflection.index_assembly(path) is None
+
+    assembly = Assembly()
+    index = reflection.index_assembly(path, assembly)
+    assert not os.path.isfile(path + '.index.json')
+    assert os.path.isfile(os.path.join(reflection.CACHE_DIRECTORY, index.sha256 + '.json'))
+    assert index.namespace == 'Lib'
+    assert index.type_names() == ['Lib.Calc']
+    assert index.get_type('Calc') is index.get_type('Lib.Calc')
+    assert index.get_type('Calc')['methods'][0]['parameters'] == [['a', 'System.Int32'], ['b', 'System.Int32']]
+    assert index.member_names('Calc') == ['Add', 'Changed', 'Count', 'get_Value']
+    with pytest.raises(KeyError):
+        index.get_type('Unknown')
+
+    # the index is read from the file
+    assert reflection.index_assembly(path, assembly).data == index.data
+    assert assembly.calls == 1
+
+    # the index is rebuilt if the assembly changes
+    with open(path, 'wb') as f:
+        f.write(b'version 2')
+    assert reflection.index_assembly(path) is None
+    assert reflection.index_assembly(path, assembly).sha256 != index.sha256
+    assert assembly.calls == 2
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from msl.loadlib import resolver, IS_WINDOWS, IS_MAC
+
+
+@pytest.fixture(autouse=True)
+def cache_file(tmpdir, monkeypatch):
+    monkeypatch.setattr(resolver, 'CACHE_FILE', str(tmpdir.join('cache.json')))
+    monkeypatch.setattr(resolver, '_cache', None)
+
+
+def touch(path):
+    with open(path, 'w'):
+        pass
+    return path
+
+
+def test_find_library(tmpdir):
+    a = tmpdir.mkdir('a')
+    b = tmpdir.mkdir('b')
+
+    if IS_WINDOWS:
+        expected = touch(str(b.join('foo.dll')))
+    elif IS_MAC:
+        expected = touch(str(b.join('libfoo.dylib')))
+    else:
+        touch(str(b.join('libfoo.so.1.2')))
+        expected = touch(str(b.join('libfoo.so.1.10')))
+
+    assert resolver.find_library('foo') is None
+    assert expected == resolver.find_library('foo', [str(a), str(b)])
+    assert os.path.isfile(resolver.CACHE_FILE)
+
+    # the cached result is not used after a directory that is searched first changes
+    closer = touch(str(a.join(os.path.basename(expected))))
+    assert closer == resolver.find_library('foo', [str(a), str(b)])
+
+    assert closer == resolver.find_library(closer)
+    assert resolver.find_library(str(a.join('bar'))) is None
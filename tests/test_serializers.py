@@ -0,0 +1,71 @@
+import array
+import struct
+
+import pytest
+
+from msl.loadlib import serializers
+
+
+def test_typed():
+    s = serializers.get('typed')
+    obj = (
+        [None, True, False, -1, 2**70, 1.5, 2 - 3j, u'\u03a9hm', b'\x00\xff', bytearray(b'ab')],
+        {'values': array.array('d', [1.0, 2.5]), 'nested': ((1,), [])},
+    )
+    data = s.dumps(obj)
+    assert obj == s.loads(data)
+    assert isinstance(s.loads(data)[1]['values'], array.array)
+
+    with pytest.raises(TypeError):
+        s.dumps(object())
+    with pytest.raises(ValueError):
+        s.loads(data + b'N')
+    with pytest.raises(ValueError):
+        s.loads(b'x')
+
+
+def test_typed_array_itemsize():
+    s = serializers.get('typed')
+
+    # an 'l' array from a platform where the size of a long differs from the local size
+    local = array.array('l').itemsize
+    other = 4 if local == 8 else 8
+    fmt = '<3i' if other == 4 else '<3q'
+    data = b'al' + struct.pack('<BI', other, 3 * other) + struct.pack(fmt, 1, -2, 3)
+    values = s.loads(data)
+    assert isinstance(values, array.array)
+    assert values.itemsize == other
+    assert [1, -2, 3] == values.tolist()
+
+    # a unicode array with 2-byte characters (Windows)
+    text = u'\u03a9hm'
+    data = b'au' + struct.pack('<BI', 2, 6) + text.encode('utf-16-le')
+    assert text == s.loads(data).tounicode()
+
+    with pytest.raises(TypeError):
+        s.loads(b'al' + struct.pack('<BI', 3, 3) + b'abc')
+
+
+def test_get_and_register(monkeypatch):
+    assert 2 == serializers.get('pickle.2').option
+    assert 'pickle.2' == serializers.get('pickle.2').capability
+    assert 'json' == serializers.get('json').capability
+    assert [[1, 2], {'a': None}] == serializers.get('json').loads(serializers.get('json').dumps(((1, 2), {'a': None})))
+
+    with pytest.raises(ValueError):
+        serializers.get('unknown')
+
+    # do not leak the registered serializer into other tests
+    monkeypatch.setattr(serializers, '_SERIALIZERS', dict(serializers._SERIALIZERS))
+
+    @serializers.register
+    class Repr(serializers.Serializer):
+        name = 'repr'
+
+    assert isinstance(serializers.get('repr'), Repr)
+    assert 'repr' in serializers._SERIALIZERS
+
+    with pytest.raises(TypeError):
+        serializers.register(object)
+    with pytest.raises(ValueError):
+        serializers.register(type('Bad', (serializers.Serializer,), {'name': 'a.b'}))
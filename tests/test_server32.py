@@ -0,0 +1,303 @@
+import time
+import array
+import ctypes
+import threading
+
+import pytest
+
+from msl.loadlib import Server32
+from msl.loadlib.client64 import HTTPException
+from msl.loadlib.client64 import ServerBusyError
+
+
+class Counter32(Server32):
+    """Hosts the shared library of the ``c_library`` fixture."""
+
+    library = None
+    options = {}
+
+    def __init__(self, host, port, quiet):
+        Server32.__init__(self, self.library, 'cdll', host, port, quiet, **self.options)
+        self.calls = []
+
+    def add(self, a, b):
+        return self.lib.add(a, b)
+
+    def increment(self):
+        return self.lib.increment()
+
+    def record(self, value, seconds=0):
+        self.calls.append(value)
+        time.sleep(seconds)
+        return value
+
+    def fail(self):
+        raise ValueError('failed')
+
+
+@pytest.fixture
+def server_class(c_library):
+    return type('Counter32', (Counter32,), {'library': c_library})
+
+
+def test_request32_async(start_server, server_class):
+    server, client = start_server(server_class)
+    future = client.request32_async('record', 'slow', 0.2)
+    assert not future.done()
+    futures = [client.request32_async('add', i, i) for i in range(10)]
+    assert 'slow' == future.result()
+    assert [2 * i for i in range(10)] == [f.result() for f in futures]
+    with pytest.raises(HTTPException, match='failed'):
+        client.request32_async('fail').result()
+
+
+def test_batching(start_server, server_class, monkeypatch):
+    server, client = start_server(server_class)
+    admitted = []
+    admit = server._admit
+
+    def count_admit(*args):
+        admitted.append(args)
+        return admit(*args)
+
+    monkeypatch.setattr(server, '_admit', count_admit)
+
+    client.enable_batching(window=0.2, max_size=10)
+    futures = [client.request32_async('add', i, 1) for i in range(10)]
+    # the batch is full so it is sent before the window expires
+    assert [i + 1 for i in range(10)] == [f.result(timeout=5) for f in futures]
+    assert 1 == len(admitted)
+
+    # the batch is flushed when the window expires, an error only fails its own request
+    del admitted[:]
+    f1 = client.request32_async('fail')
+    f2 = client.request32_async('add', 2, 2)
+    assert 4 == f2.result(timeout=5)
+    with pytest.raises(HTTPException, match='failed'):
+        f1.result()
+    assert 1 == len(admitted)
+
+    client.disable_batching()
+    assert 10 == client.request32('add', 5, 5)
+    assert 2 == len(admitted)
+
+
+def test_idempotent(start_server, server_class):
+    server, client = start_server(server_class)
+    client.register_idempotent('record')
+    results = []
+
+    def call():
+        results.append(client.request32('record', 'status', 0.2))
+
+    threads = [threading.Thread(target=call) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert ['status'] * 10 == results
+    assert ['status'] == server.calls
+    assert not client._in_flight
+
+    # a different argument is a different request
+    client.request32('record', 'other')
+    assert ['status', 'other'] == server.calls
+
+
+def test_max_client_requests(start_server, server_class):
+    cls = type('Busy32', (server_class,), {'options': {'max_client_requests': 1}})
+    server, client = start_server(cls)
+    _, other = start_server(cls, port=client.port)
+    errors = []
+
+    def slow(c):
+        try:
+            c.request32('record', 'slow', 0.3)
+        except ServerBusyError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=slow, args=(client,))
+    thread.start()
+    time.sleep(0.1)
+    with pytest.raises(ServerBusyError, match='Too many requests'):
+        client.request32('add', 1, 2)
+    assert 3 == other.request32('add', 1, 2)  # the limit is per client
+    thread.join()
+    assert not errors
+
+    # the client retries a rejected request
+    client.set_busy_policy(retries=5, backoff=0.1)
+    thread = threading.Thread(target=slow, args=(client,))
+    thread.start()
+    time.sleep(0.1)
+    assert 3 == client.request32('add', 1, 2)
+    thread.join()
+
+
+def test_priority(start_server, server_class):
+    server, client = start_server(server_class)
+
+    def call(level, value, seconds):
+        with client.priority(level):
+            client.request32('record', value, seconds)
+
+    threads = [threading.Thread(target=call, args=('bulk', 'running', 0.3))]
+    threads.extend(threading.Thread(target=call, args=('bulk', 'bulk{}'.format(i), 0)) for i in range(3))
+    threads.append(threading.Thread(target=call, args=('interactive', 'interactive', 0)))
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    for t in threads:
+        t.join()
+    assert ['running', 'interactive', 'bulk0', 'bulk1', 'bulk2'] == server.calls
+
+
+def test_max_queue_priority(start_server, server_class):
+    cls = type('Queue32', (server_class,), {'options': {'max_queue': 1}})
+    server, client = start_server(cls)
+    results = {}
+
+    def call(level, value, seconds):
+        try:
+            with client.priority(level):
+                results[value] = client.request32('record', value, seconds)
+        except ServerBusyError:
+            results[value] = 'busy'
+
+    threads = [threading.Thread(target=call, args=args) for args in [
+        ('bulk', 'running', 0.3), ('bulk', 'waiting', 0), ('interactive', 'interactive', 0), ('bulk', 'late', 0)]]
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    for t in threads:
+        t.join()
+    # the interactive request replaced the waiting bulk request
+    assert {'running': 'running', 'waiting': 'busy', 'interactive': 'interactive', 'late': 'busy'} == results
+    assert not server._client_counts and not server._evicted
+
+
+def test_connection_pool(start_server, server_class):
+    server, client = start_server(server_class, max_connections=2)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(client.request32('add', i, 1))) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert list(range(1, 21)) == sorted(results)
+    assert len(client._connections) <= 2
+
+
+def test_vectorize32(start_server, server_class):
+    server, client = start_server(server_class)
+    add = client.vectorize32('add')
+    assert [11, 12, 13] == add([1, 2, 3], 10)
+    add = client.vectorize32('add', typecode='i')
+    assert array.array('i', [2, 4, 6]) == add([1, 2, 3], [1, 2, 3])
+
+
+def test_vectorize32_numpy(start_server, server_class):
+    np = pytest.importorskip('numpy')
+    server, client = start_server(server_class)
+    result = client.vectorize32('add', typecode='i')(np.arange(6).reshape(2, 3), 1)
+    assert isinstance(result, np.ndarray)
+    assert (2, 3) == result.shape
+    assert [[1, 2, 3], [4, 5, 6]] == result.tolist()
+
+
+def test_parallel_map(start_server, server_class):
+    server, client = start_server(server_class)
+    assert [2 * i for i in range(20)] == client.request32('parallel_map', 'add', [(i, i) for i in range(20)], 4)
+    assert [] == client.request32('parallel_map', 'add', [], 2)
+
+
+def test_exposed32(start_server, server_class):
+    exposed32 = {
+        'sum': {'function': 'add', 'restype': ctypes.c_int, 'argtypes': [('a', ctypes.c_int), ('b', ctypes.c_int)]},
+        'next': {'function': 'increment', 'restype': ctypes.c_int},
+    }
+    server, client = start_server(type('Exposed32', (server_class,), {'exposed32': exposed32}))
+
+    methods = client.introspect32()['methods']
+    assert '(a, b)' == methods['sum']['signature']
+    assert ['<ii', '<i'] == methods['sum']['codec']
+    assert '(a, b)' == methods['add']['signature']
+    assert 'codec' not in methods['add']
+
+    # the response to the first request contains the struct formats
+    assert not client._codecs
+    assert 3 == client.request32('sum', 1, 2)
+    assert 'sum' in client._codecs
+    assert -1 == client.request32('sum', 1, -2)
+    assert 2 ** 31 - 1 == client.request32('sum', 2 ** 31 - 2, 1)
+    assert 1 == client.request32('next')
+    assert 2 == client.proxy32(use_cache=False).next()
+
+    with pytest.raises(ValueError, match='already has an attribute'):
+        type('Exposed32', (server_class,), {'exposed32': {'add': {}}})('127.0.0.1', 0, True)
+
+
+def test_argument_cache(start_server, server_class, monkeypatch):
+    server, client = start_server(server_class)
+    client.enable_argument_cache(min_size=64)
+    resolved = []
+    resolve = server._blobs.resolve
+
+    def record_resolve(method, args, kwargs, refs):
+        sent = [ref[2] is not None for ref in refs]
+        try:
+            result = resolve(method, args, kwargs, refs)
+        except Exception as e:
+            resolved.append((sent, type(e).__name__))
+            raise
+        resolved.append((sent, None))
+        return result
+
+    monkeypatch.setattr(server._blobs, 'resolve', record_resolve)
+
+    data = b'x' * 100
+    assert data == client.request32('record', data)
+    assert data == client.request32('record', data)
+    assert [([True], None), ([False], None)] == resolved
+    assert b'small' == client.request32('record', b'small')  # not cached
+    assert 2 == len(resolved)
+
+    # the server evicted the argument, the client sends the request again with the argument
+    del resolved[:]
+    server._blobs._blobs.clear()
+    server._blobs._nbytes = 0
+    assert data == client.request32('record', data)
+    assert [([False], '_BlobMiss'), ([True], None)] == resolved
+    assert [data, data, b'small', data] == server.calls
+
+
+def test_argument_cache_too_large(start_server, server_class, monkeypatch):
+    cls = type('SmallCache32', (server_class,), {'argument_cache32': 128})
+    server, client = start_server(cls)
+    client.enable_argument_cache(min_size=64)
+    misses = []
+    resolve = server._blobs.resolve
+
+    def record_resolve(*args):
+        try:
+            return resolve(*args)
+        except Exception as e:
+            misses.append(e)
+            raise
+
+    monkeypatch.setattr(server._blobs, 'resolve', record_resolve)
+
+    # the server cannot cache the argument, so it is not sent by its digest
+    data = b'x' * 200
+    for _ in range(3):
+        assert data == client.request32('record', data)
+    assert 128 == client._blob_max_size
+    assert not server._blobs._blobs
+    assert not misses  # no request was sent again
+    assert [data] * 3 == server.calls
+
+    # an argument that fits in the cache of the server is still cached
+    small = b'y' * 100
+    for _ in range(2):
+        assert small == client.request32('record', small)
+    assert 1 == len(server._blobs._blobs)